@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Incident hotspots and time-of-day heatmaps, counted as incidents are saved
+
+    python analytics.py rebuild           Recount every stored incident (backfill or repair)
+    python analytics.py hotspots [N]      Print the N busiest interchanges
+"""
+
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from heapq import nlargest
+
+from models import Database
+from timeparse import central_tz
+
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+HOURS = 24
+CELLS = len(WEEKDAYS) * HOURS
+
+# Corridor recorded for incidents the classifier could not place
+UNKNOWN_CORRIDOR = 'unknown'
+
+
+@lru_cache(maxsize=16384)
+def _cell_for_hour(epoch_hour):
+    # Central Time offsets are whole hours, so a whole epoch hour lands in one cell
+    local = datetime.fromtimestamp(epoch_hour * 3600, central_tz)
+    return local.weekday() * HOURS + local.hour
+
+
+def heatmap_cell(ts):
+    """Weekday-major cell (weekday * 24 + hour, Central Time) for an epoch timestamp"""
+    return _cell_for_hour(int(ts) // 3600)
+
+
+def count_incidents(rows):
+    """(cell counts, hotspot counts) for (corridor, cross_street, category, ts) rows"""
+    cells, hotspots = Counter(), Counter()
+    for corridor, cross_street, category, ts in rows:
+        corridor, category = corridor or UNKNOWN_CORRIDOR, category or 'other'
+        cells[corridor, category, heatmap_cell(ts)] += 1
+        if cross_street and corridor != UNKNOWN_CORRIDOR:
+            hotspots[corridor, cross_street, category] += 1
+    return cells, hotspots
+
+
+def add_cells(matrices, cells):
+    """Add cell counts into {(corridor, category): array of CELLS counters}"""
+    for (corridor, category, cell), count in cells.items():
+        matrix = matrices.get((corridor, category))
+        if matrix is None:
+            matrix = matrices[corridor, category] = array('q', bytes(8 * CELLS))
+        matrix[cell] += count
+
+
+class IncidentHeatmap:
+    """Corridor x weekday x hour counts and interchange totals, in memory and mirrored to SQLite
+
+    Each (corridor, category) pair owns a flat array of 7 * 24 counters. Saved
+    incidents bump the counters as they arrive, so requests never touch the
+    incidents table.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.matrices = {}
+        self.hotspots = Counter()
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Replace the in-memory counts with what is stored in SQLite"""
+        conn = self.db.get_connection()
+        cells = Counter({(row['corridor'], row['category'], row['weekday'] * HOURS + row['hour']): row['count']
+                         for row in conn.execute('SELECT * FROM incident_heatmap')})
+        hotspots = Counter({(row['corridor'], row['cross_street'], row['category']): row['count']
+                            for row in conn.execute('SELECT * FROM incident_hotspots')})
+        conn.close()
+        self._replace(cells, hotspots)
+
+    def _replace(self, cells, hotspots):
+        matrices = {}
+        add_cells(matrices, cells)
+        with self._lock:
+            self.matrices = matrices
+            self.hotspots = hotspots
+
+    def record(self, incidents):
+        """Count newly saved Incident objects; returns how many were counted"""
+        now = time.time()
+        cells, hotspots = count_incidents((incident.corridor, incident.cross_street, incident.category,
+                                           incident.incident_ts or now) for incident in incidents)
+        if not cells:
+            return 0
+
+        conn = self.db.get_connection()
+        try:
+            self._upsert(conn, cells, hotspots)
+            conn.commit()
+        finally:
+            conn.close()
+
+        with self._lock:
+            add_cells(self.matrices, cells)
+            self.hotspots.update(hotspots)
+        return sum(cells.values())
+
+    @staticmethod
+    def _upsert(conn, cells, hotspots):
+        conn.executemany('''
+            INSERT INTO incident_heatmap (corridor, category, weekday, hour, count) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (corridor, category, weekday, hour) DO UPDATE SET count = count + excluded.count
+        ''', [(corridor, category, cell // HOURS, cell % HOURS, count)
+              for (corridor, category, cell), count in cells.items()])
+        conn.executemany('''
+            INSERT INTO incident_hotspots (corridor, cross_street, category, count) VALUES (?, ?, ?, ?)
+            ON CONFLICT (corridor, cross_street, category) DO UPDATE SET count = count + excluded.count
+        ''', [key + (count,) for key, count in hotspots.items()])
+
+    def rebuild(self):
+        """Recount every stored incident from scratch; returns how many were counted"""
+        conn = self.db.get_connection()
+        try:
+            cells, hotspots = count_incidents(conn.execute('''
+                SELECT corridor, cross_street, category,
+                       coalesce(incident_ts, CAST(strftime('%s', scraped_at) AS INTEGER)) AS ts
+                FROM incidents
+            '''))
+            conn.execute('DELETE FROM incident_heatmap')
+            conn.execute('DELETE FROM incident_hotspots')
+            self._upsert(conn, cells, hotspots)
+            conn.commit()
+        finally:
+            conn.close()
+
+        self._replace(cells, hotspots)
+        return sum(cells.values())
+
+    def heatmap(self, corridor=None, category=None):
+        """7 x 24 nested lists of counts (Monday first, hour 0 first) over matching corridors/categories"""
+        total = array('q', bytes(8 * CELLS))
+        with self._lock:
+            for (matrix_corridor, matrix_category), matrix in self.matrices.items():
+                if corridor not in (None, matrix_corridor) or category not in (None, matrix_category):
+                    continue
+                for cell in range(CELLS):
+                    total[cell] += matrix[cell]
+        return [total[day * HOURS:(day + 1) * HOURS].tolist() for day in range(len(WEEKDAYS))]
+
+    def top_hotspots(self, limit=10, corridor=None, category=None):
+        """Busiest interchanges as dicts, most incidents first"""
+        totals = Counter()
+        with self._lock:
+            for (hotspot_corridor, cross_street, hotspot_category), count in self.hotspots.items():
+                if corridor not in (None, hotspot_corridor) or category not in (None, hotspot_category):
+                    continue
+                totals[hotspot_corridor, cross_street] += count
+        top = nlargest(limit, totals.items(), key=lambda item: item[1])
+        return [{'corridor': hotspot_corridor, 'cross_street': cross_street, 'count': count}
+                for (hotspot_corridor, cross_street), count in top]
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == 'rebuild':
+        start = time.perf_counter()
+        counted = IncidentHeatmap(Database()).rebuild()
+        print(f"🗺️  Recounted {counted} incidents in {time.perf_counter() - start:.1f}s")
+    elif command == 'hotspots':
+        limit = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+        for hotspot in IncidentHeatmap(Database()).top_hotspots(limit):
+            print(f"{hotspot['count']:>7}  {hotspot['corridor']} @ {hotspot['cross_street']}")
+    else:
+        print(__doc__)
+
+
+if __name__ == "__main__":
+    main()
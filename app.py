@@ -1,42 +1,49 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import check_password_hash
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
 import atexit
+import hmac
+import io
 import logging
+import secrets
+from collections import Counter
 from datetime import datetime, timedelta
-import re
-from collections import deque
-import pytz
 
 from config import Config
-from models import Database, Incident, Subscriber, HazmatSubscriber, AdminUser, SentAlert, Settings
+from models import (Database, Incident, Subscriber, HazmatSubscriber, AdminUser, SentAlert, Settings, SubscriberArea,
+                    SubscriptionRule, AlertOutbox, OUTBOX_STATES, WebhookSubscription, webhook_channel_name)
 from scraper import TranStarScraper
-from email_service import EmailService
+from email_service import EmailService, SMTP_TIMEOUT
+from event_log import EventLog, event_to_dict
+from coordinator import CycleCoordinator
+from async_pipeline import AsyncPipeline
+from coalescer import AlertCoalescer
+from channels import ChannelDispatcher, build_channels
+from classification import CATEGORIES
+from corridors import CORRIDORS
+import metrics
+from timeparse import central_tz
+from analytics import IncidentHeatmap, WEEKDAYS, HOURS
+from export import EXPORT_FORMATS, export_stream
+from subscriber_io import IMPORT_FORMATS, SUBSCRIBER_COLUMNS, iter_import_rows, is_valid_email, subscriber_record
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# In-memory circular buffer for scraping logs (keeps last 100 log entries)
-scrape_logs = deque(maxlen=100)
-central_tz = pytz.timezone('America/Chicago')
-
-def add_scrape_log(message, level='info'):
-    """Add a log entry with timestamp"""
-    timestamp = datetime.now(central_tz).strftime('%Y-%m-%d %I:%M:%S %p CST')
-    scrape_logs.append({
-        'timestamp': timestamp,
-        'message': message,
-        'level': level
-    })
+def add_scrape_log(message, level='info', **fields):
+    """Record a structured scrape event (cycle_id, stage, duration_ms, counts)"""
+    event_log.record(message, level, **fields)
     # Also log to regular logger
     if level == 'error':
         logger.error(message)
     elif level == 'warning':
         logger.warning(message)
+    elif level == 'debug':
+        logger.debug(message)
     else:
         logger.info(message)
 
@@ -53,6 +60,17 @@ login_manager.login_message = 'Please log in to access the admin panel.'
 db = Database()
 scraper = TranStarScraper()
 email_service = EmailService()
+# New incidents wait here for the next digest instead of each cycle sending its own email
+coalescer = AlertCoalescer(email_service)
+pipeline = AsyncPipeline(scraper, email_service, coalescer=coalescer) if Config.PIPELINE_MODE == 'async' else None
+# Incidents a restart left unalerted rejoin the digest; interrupted sends are failed for review, not resent
+coalescer.add(email_service.recover_outbox())
+# Webhook, chat and SMS pushes go out every cycle, ahead of the email digest
+dispatcher = ChannelDispatcher(db, build_channels())
+# Structured scrape events: ring buffer for the live view, spilled to SQLite in batches
+event_log = EventLog(db)
+# Corridor x weekday x hour counts behind /api/analytics, bumped as incidents are saved
+heatmap = IncidentHeatmap(db)
 
 # User class for Flask-Login
 class User(UserMixin):
@@ -69,37 +87,118 @@ def load_user(username):
 # Background scheduler for scraping
 scheduler = BackgroundScheduler()
 
-def scheduled_scrape():
-    """Background task to scrape for incidents"""
+def log_stage_timings(cycle_id, timers):
+    """Record one event per timed stage of a cycle"""
+    for timer in timers:
+        for stage, seconds in timer.totals.items():
+            add_scrape_log(f"⏱️  {stage}: {seconds * 1000:.1f} ms", 'debug', cycle_id=cycle_id, stage=stage,
+                           duration_ms=round(seconds * 1000, 2))
+
+def run_cycle(job, deadline):
+    """Scrape and alert once; only ever called through the cycle coordinator"""
+    cycle_id = job.id
     try:
-        add_scrape_log("🔄 Starting scheduled scrape...")
-        new_incidents = scraper.run_scrape_cycle()
+        add_scrape_log(f"🔄 Starting {job.source} scrape...", cycle_id=cycle_id)
+        if pipeline is not None:
+            return run_pipelined_cycle(cycle_id, deadline)
+        new_incidents = scraper.run_scrape_cycle(deadline)
+        log_stage_timings(cycle_id, [scraper.timer])
+        
+        if not new_incidents:
+            add_scrape_log("ℹ️  No new incidents found", cycle_id=cycle_id, counts={'new_incidents': 0})
+            # Channel pushes that failed earlier are retried, and a window opened by earlier cycles may have elapsed
+            push_channels(cycle_id, [], deadline)
+            success = send_digest(cycle_id, deadline)
+            return {'new_incidents': 0, 'alerts_sent': bool(success)}
+        
+        add_scrape_log(f"✅ Found {len(new_incidents)} new incidents!", 'info', cycle_id=cycle_id,
+                       counts={'new_incidents': len(new_incidents)})
+        heatmap.record(incident for incident, incident_id in new_incidents)
+        
+        # Log incident details
+        for incident, incident_id in new_incidents:
+            add_scrape_log(f"📍 {incident.location}: {incident.description}", cycle_id=cycle_id)
+        
+        # Buffer for the digest before anything else can fail; it goes out now if the window
+        # elapsed or one is high severity
+        coalescer.add(new_incidents)
+        push_channels(cycle_id, new_incidents, deadline)
+        success = send_digest(cycle_id, deadline)
+        return {'new_incidents': len(new_incidents), 'alerts_sent': bool(success)}
         
-        if new_incidents:
-            add_scrape_log(f"✅ Found {len(new_incidents)} new incidents!", 'info')
-            
-            # Log incident details
-            for incident, incident_id in new_incidents:
-                add_scrape_log(f"📍 {incident.location}: {incident.description}")
-            
-            add_scrape_log("📧 Sending alerts to subscribers...")
-            
-            # Send regular alerts to all subscribers
-            success = email_service.send_alert(new_incidents)
-            if success:
-                add_scrape_log("✅ Regular alerts sent successfully", 'info')
-            else:
-                add_scrape_log("❌ Failed to send regular alerts", 'error')
-
-            # Send hazmat-specific alerts to hazmat subscribers
-            hazmat_success = email_service.send_hazmat_alert(new_incidents)
-            if hazmat_success:
-                add_scrape_log("✅ Hazmat alerts sent successfully", 'info')
-        else:
-            add_scrape_log("ℹ️  No new incidents found")
-            
     except Exception as e:
-        add_scrape_log(f"❌ Error in scheduled scrape: {e}", 'error')
+        add_scrape_log(f"❌ Error in {job.source} scrape: {e}", 'error', cycle_id=cycle_id)
+        raise
+
+def push_channels(cycle_id, incidents, deadline):
+    """Push incidents to the configured webhook/chat/SMS channels concurrently; never raises"""
+    try:
+        results = dispatcher.push(incidents, deadline)
+    except Exception as e:
+        # The email digest must still go out; outbox rows already written are retried next cycle
+        add_scrape_log(f"❌ Channel push failed: {e}", 'error', cycle_id=cycle_id, stage='channels')
+        return
+    for name, success in sorted(results.items()):
+        if success:
+            add_scrape_log(f"📡 Pushed to {name}", cycle_id=cycle_id, stage='channels')
+        else:
+            add_scrape_log(f"📡 Push to {name} failed; queued for the next cycle", 'warning', cycle_id=cycle_id,
+                           stage='channels')
+
+def send_digest(cycle_id, deadline):
+    """Send the coalesced digest if it is due; None when incidents stay buffered"""
+    pending = len(coalescer)
+    if not pending:
+        return None
+    success = coalescer.flush(deadline)
+    if success is None:
+        add_scrape_log(f"📥 {pending} incidents buffered for the next alert digest", cycle_id=cycle_id,
+                       counts={'pending_alerts': pending})
+        return None
+    
+    log_stage_timings(cycle_id, [email_service.timer])
+    if success:
+        add_scrape_log(f"✅ Alert digest sent for {pending} incidents", 'info', cycle_id=cycle_id)
+    else:
+        add_scrape_log("❌ Failed to send alerts; digest kept for the next window", 'error', cycle_id=cycle_id)
+    return success
+
+def run_pipelined_cycle(cycle_id, deadline):
+    """Scrape and alert with incidents streamed through the async pipeline"""
+    result = pipeline.run(deadline)
+    # Alert batches send concurrently, so only the scrape side has one timer per cycle
+    log_stage_timings(cycle_id, [scraper.timer])
+    # Channels get the cycle's incidents (and earlier failures); recovered ones still go out through the digest
+    push_channels(cycle_id, result.new_incidents, deadline)
+    send_digest(cycle_id, deadline)
+    
+    if not result.new_incidents:
+        add_scrape_log("ℹ️  No new incidents found", cycle_id=cycle_id, counts={'new_incidents': 0})
+        return {'new_incidents': 0, 'alerts_sent': False}
+    
+    add_scrape_log(f"✅ Found {len(result.new_incidents)} new incidents!", 'info', cycle_id=cycle_id,
+                   counts={'new_incidents': len(result.new_incidents), 'alert_batches': len(result.batches_sent)})
+    heatmap.record(incident for incident, incident_id in result.new_incidents)
+    for incident, incident_id in result.new_incidents:
+        add_scrape_log(f"📍 {incident.location}: {incident.description}", cycle_id=cycle_id)
+    
+    if result.alerts_sent:
+        slowest = max(result.alert_latencies)
+        add_scrape_log(f"✅ Alerts sent successfully (slowest {slowest:.2f}s after cycle start)", 'info',
+                       cycle_id=cycle_id)
+    elif result.batches_sent:
+        # Batches still buffered in the coalescer were already logged by send_digest
+        add_scrape_log("❌ Failed to send alerts; digest kept for the next window", 'error', cycle_id=cycle_id)
+    return {'new_incidents': len(result.new_incidents), 'alerts_sent': result.alerts_sent}
+
+# Single-flight coordinator: scheduled and manual triggers never run two cycles at once
+coordinator = CycleCoordinator(run_cycle, Config.CYCLE_DEADLINE)
+
+def scheduled_scrape():
+    """Background task to scrape for incidents"""
+    job = coordinator.run('scheduled')
+    if job.source != 'scheduled':
+        add_scrape_log(f"⏭️  Scheduled scrape joined in-flight {job.source} cycle", cycle_id=job.id)
 
 def send_daily_summary():
     """Background task to send daily summary email at midnight"""
@@ -137,6 +236,8 @@ scheduler.start()
 
 # Shut down the scheduler when exiting the app
 atexit.register(lambda: scheduler.shutdown())
+atexit.register(event_log.close)
+atexit.register(lambda: email_service.drain(timeout=SMTP_TIMEOUT))
 
 @app.route('/')
 def index():
@@ -178,8 +279,9 @@ def dashboard():
     recent_incidents = Incident.get_recent(db, hours=24)
     
     # Get system stats
-    total_subscribers = len(Subscriber.get_all(db))
-    active_subscribers = len(Subscriber.get_all_active(db))
+    subscriber_counts = Subscriber.counts(db)
+    total_subscribers = subscriber_counts['total']
+    active_subscribers = subscriber_counts['active']
     alerts_today = SentAlert.get_recent_count(db, hours=24)
     alerts_this_hour = SentAlert.get_recent_count(db, hours=1)
     
@@ -201,12 +303,22 @@ def dashboard():
                          next_run=next_run,
                          scrape_interval=Config.SCRAPE_INTERVAL)
 
+def listing_args():
+    """(q, status, active, after) for a subscriber listing: email prefix, status filter and keyset cursor"""
+    status = request.args.get('status', '')
+    active = {'active': True, 'inactive': False}.get(status)
+    if active is None:
+        status = ''
+    return request.args.get('q', '').strip(), status, active, request.args.get('after') or None
+
 @app.route('/subscribers')
 @login_required
 def subscribers():
-    """Subscriber management page"""
-    all_subscribers = Subscriber.get_all(db)
-    return render_template('subscribers.html', subscribers=all_subscribers)
+    """Subscriber management page, one keyset page at a time"""
+    q, status, active, after = listing_args()
+    page, next_after = Subscriber.page(db, q, active, after, Config.SUBSCRIBER_PAGE_SIZE)
+    return render_template('subscribers.html', subscribers=page, counts=Subscriber.counts(db), q=q,
+                           status=status, after=after, next_after=next_after)
 
 @app.route('/add_subscriber', methods=['POST'])
 @login_required
@@ -215,8 +327,7 @@ def add_subscriber():
     email = request.form['email'].strip().lower()
     
     # Validate email format
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if not re.match(email_pattern, email):
+    if not is_valid_email(email):
         flash('Invalid email format', 'error')
         return redirect(url_for('subscribers'))
     
@@ -253,6 +364,59 @@ def toggle_subscriber():
     
     return redirect(url_for('subscribers'))
 
+@app.route('/api/subscribers/import', methods=['POST'])
+@login_required
+def api_import_subscribers():
+    """Bulk add subscribers from an uploaded file (or the request body) as csv, ndjson or json"""
+    upload = request.files.get('file')
+    default_format = upload.filename.rsplit('.', 1)[-1] if upload and '.' in (upload.filename or '') else 'csv'
+    fmt = request.args.get('format', default_format).lower()
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({'error': f"Unsupported format: {fmt} (use {', '.join(IMPORT_FORMATS)})"}), 400
+    
+    # Parsed as it is read; validation and inserts happen a chunk at a time in one transaction
+    stream = io.TextIOWrapper(upload.stream if upload else request.stream, encoding='utf-8-sig', newline='')
+    try:
+        results = Subscriber.add_many(db, iter_import_rows(stream, fmt))
+    except ValueError as e:
+        return jsonify({'error': f'Could not read {fmt} import, nothing was added: {e}'}), 400
+    
+    counts = Counter(outcome for _, _, outcome in results)
+    logger.info(f"📥 Imported subscribers: {dict(counts)}")
+    return jsonify({
+        'counts': counts,
+        'results': [{'line': line, 'email': email, 'outcome': outcome} for line, email, outcome in results],
+    })
+
+@app.route('/api/subscribers/export')
+@login_required
+def api_export_subscribers():
+    """Stream every subscriber as csv (importable as-is) or ndjson"""
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unsupported format: {fmt} (use {' or '.join(EXPORT_FORMATS)})"}), 400
+    chunks = export_stream(fmt, Subscriber.iter_all(db), SUBSCRIBER_COLUMNS, subscriber_record)
+    return Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename=subscribers.{fmt}'})
+
+@app.route('/api/subscribers/bulk', methods=['POST'])
+@login_required
+def api_bulk_subscribers():
+    """Activate, deactivate, toggle or remove many subscribers: {"action": ..., "emails": [...]}"""
+    data = request.get_json(silent=True) or {}
+    emails = data.get('emails')
+    if not isinstance(emails, list) or not all(isinstance(email, str) for email in emails):
+        return jsonify({'error': 'emails must be a list of addresses'}), 400
+    try:
+        results = Subscriber.update_many(db, data.get('action'), emails)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'counts': Counter(outcome for _, outcome in results),
+        'results': [{'email': email, 'outcome': outcome} for email, outcome in results],
+    })
+
 @app.route('/test_email', methods=['POST'])
 @login_required
 def test_email():
@@ -260,8 +424,7 @@ def test_email():
     test_email = request.form['test_email'].strip().lower()
     
     # Validate email format
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if not re.match(email_pattern, test_email):
+    if not is_valid_email(test_email):
         flash('Invalid email format', 'error')
         return redirect(url_for('subscribers'))
     
@@ -278,9 +441,11 @@ def test_email():
 @app.route('/hazmat_subscribers')
 @login_required
 def hazmat_subscribers():
-    """Hazmat subscriber management page"""
-    all_hazmat_subscribers = HazmatSubscriber.get_all(db)
-    return render_template('hazmat_subscribers.html', hazmat_subscribers=all_hazmat_subscribers)
+    """Hazmat subscriber management page, one keyset page at a time"""
+    q, status, active, after = listing_args()
+    page, next_after = HazmatSubscriber.page(db, q, active, after, Config.SUBSCRIBER_PAGE_SIZE)
+    return render_template('hazmat_subscribers.html', hazmat_subscribers=page, counts=HazmatSubscriber.counts(db),
+                           q=q, status=status, after=after, next_after=next_after)
 
 @app.route('/add_hazmat_subscriber', methods=['POST'])
 @login_required
@@ -289,8 +454,7 @@ def add_hazmat_subscriber():
     email = request.form['email'].strip().lower()
     
     # Validate email format
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if not re.match(email_pattern, email):
+    if not is_valid_email(email):
         flash('Invalid email format', 'error')
         return redirect(url_for('hazmat_subscribers'))
     
@@ -327,36 +491,131 @@ def toggle_hazmat_subscriber():
     
     return redirect(url_for('hazmat_subscribers'))
 
+def json_getlist(data):
+    """getlist for a JSON body, where list fields must be JSON lists"""
+    def getlist(key):
+        value = data.get(key) or []
+        if not isinstance(value, list):
+            raise ValueError(f'{key} must be a list')
+        return value
+    return getlist
+
+def filter_fields(data, getlist):
+    """Validated categories, corridors and min_severity of a rule or webhook filter; raises ValueError"""
+    categories = [str(category) for category in getlist('categories') if category]
+    unknown = set(categories) - set(CATEGORIES)
+    if unknown:
+        raise ValueError(f"unknown categories: {', '.join(sorted(unknown))}")
+    corridors = [str(corridor) for corridor in getlist('corridors') if corridor]
+    unknown = set(corridors) - set(CORRIDORS)
+    if unknown:
+        raise ValueError(f"unknown corridors: {', '.join(sorted(unknown))}")
+    try:
+        min_severity = int(data.get('min_severity') or 1)
+    except (TypeError, ValueError):
+        raise ValueError('min_severity must be a number between 1 and 5')
+    if not 1 <= min_severity <= 5:
+        raise ValueError('min_severity must be between 1 and 5')
+    
+    return {'categories': categories or None, 'min_severity': min_severity, 'corridors': corridors or None}
+
+def webhook_fields(data, getlist):
+    """Validated WebhookSubscription.add arguments from a form or JSON body; raises ValueError"""
+    name = str(data.get('name', '')).strip()
+    url = str(data.get('url', '')).strip()
+    if not name:
+        raise ValueError('name is required')
+    if not url.startswith(('http://', 'https://')):
+        raise ValueError('url must be an http:// or https:// address')
+    
+    return {'name': name, 'url': url, 'secret': str(data.get('secret') or '').strip() or secrets.token_hex(32),
+            **filter_fields(data, getlist)}
+
+def webhook_summary(subscription, counts):
+    """Webhook subscription for listings: no secret, plus its outbox counts"""
+    summary = {key: subscription[key] for key in subscription.keys() if key != 'secret'}
+    summary['active'] = bool(summary['active'])
+    summary['channel'] = webhook_channel_name(subscription['id'])
+    summary['deliveries'] = counts.get(summary['channel'], dict.fromkeys(OUTBOX_STATES, 0))
+    return summary
+
+@app.route('/webhooks')
+@login_required
+def webhooks():
+    """Webhook subscription management page"""
+    counts = AlertOutbox.channel_counts(db)
+    subscriptions = [webhook_summary(row, counts) for row in WebhookSubscription.get_all(db)]
+    return render_template('webhooks.html', webhooks=subscriptions, categories=CATEGORIES,
+                           corridors=sorted(CORRIDORS))
+
+@app.route('/add_webhook', methods=['POST'])
+@login_required
+def add_webhook():
+    """Add a webhook subscription from the admin form"""
+    try:
+        fields = webhook_fields(request.form, request.form.getlist)
+    except ValueError as e:
+        flash(f'Invalid webhook: {e}', 'error')
+        return redirect(url_for('webhooks'))
+    
+    if WebhookSubscription.add(db, **fields):
+        flash(f"Webhook {fields['name']} added. Signing secret: {fields['secret']}", 'success')
+    else:
+        flash(f"Webhook {fields['name']} already exists", 'error')
+    return redirect(url_for('webhooks'))
+
+@app.route('/remove_webhook', methods=['POST'])
+@login_required
+def remove_webhook():
+    """Remove a webhook subscription"""
+    if WebhookSubscription.remove(db, request.form.get('id', type=int)):
+        flash('Webhook removed', 'success')
+    else:
+        flash('Webhook not found', 'error')
+    return redirect(url_for('webhooks'))
+
+@app.route('/toggle_webhook', methods=['POST'])
+@login_required
+def toggle_webhook():
+    """Pause or resume a webhook subscription"""
+    if WebhookSubscription.toggle_active(db, request.form.get('id', type=int)):
+        flash('Webhook status updated!', 'success')
+    else:
+        flash('Webhook not found', 'error')
+    return redirect(url_for('webhooks'))
+
+@app.route('/retry_webhook', methods=['POST'])
+@login_required
+def retry_webhook():
+    """Queue a webhook's dead-lettered deliveries again; they go out with the next push"""
+    subscription_id = request.form.get('id', type=int)
+    incidents = AlertOutbox.retry_failed(db, webhook_channel_name(subscription_id))
+    flash(f'Requeued dead letters for {len(incidents)} incidents', 'success')
+    return redirect(url_for('webhooks'))
+
 
 @app.route('/manual_scrape', methods=['POST'])
 @login_required
 def manual_scrape():
-    """Manually trigger a scrape"""
-    try:
-        add_scrape_log("🔄 Manual scrape initiated by user")
-        new_incidents = scraper.run_scrape_cycle()
-        
-        if new_incidents:
-            add_scrape_log(f"✅ Manual scrape found {len(new_incidents)} new incidents!")
-            for incident, incident_id in new_incidents:
-                add_scrape_log(f"📍 {incident.location}: {incident.description}")
-            
-            success = email_service.send_alert(new_incidents)
-            if success:
-                add_scrape_log("✅ Alerts sent successfully")
-                flash(f'Manual scrape completed! Found {len(new_incidents)} new incidents and sent alerts.', 'success')
-            else:
-                add_scrape_log("❌ Failed to send alerts", 'error')
-                flash(f'Manual scrape found {len(new_incidents)} new incidents but failed to send alerts.', 'error')
-        else:
-            add_scrape_log("ℹ️  Manual scrape: No new incidents found")
-            flash('Manual scrape completed! No new incidents found.', 'info')
-            
-    except Exception as e:
-        add_scrape_log(f"❌ Manual scrape failed: {str(e)}", 'error')
-        flash(f'Manual scrape failed: {str(e)}', 'error')
+    """Manually trigger a scrape in the background and return its job id"""
+    job = coordinator.submit('manual')
+    if request.is_json or request.accept_mimetypes.best == 'application/json':
+        return jsonify(job.to_dict()), 202
     
-    return redirect(url_for('dashboard'))
+    if job.source == 'manual':
+        flash(f'Manual scrape started (job {job.id}). Progress appears in the scrape log.', 'info')
+    else:
+        flash(f'A {job.source} scrape is already running (job {job.id}); following it instead.', 'info')
+    return redirect(url_for('dashboard', job=job.id))
+
+@app.route('/api/scrape_jobs/<job_id>')
+@login_required
+def api_scrape_job(job_id):
+    """API endpoint to poll a scrape job"""
+    job = coordinator.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
 
 @app.route('/test_daily_summary', methods=['POST'])
 @login_required
@@ -407,14 +666,13 @@ def toggle_stalls():
 def api_stats():
     """API endpoint for dashboard stats"""
     recent_incidents = Incident.get_recent(db, hours=24)
-    total_subscribers = len(Subscriber.get_all(db))
-    active_subscribers = len(Subscriber.get_all_active(db))
+    subscriber_counts = Subscriber.counts(db)
     alerts_today = SentAlert.get_recent_count(db, hours=24)
     
     return jsonify({
         'recent_incidents_count': len(recent_incidents),
-        'total_subscribers': total_subscribers,
-        'active_subscribers': active_subscribers,
+        'total_subscribers': subscriber_counts['total'],
+        'active_subscribers': subscriber_counts['active'],
         'alerts_today': alerts_today,
         'scraper_running': scheduler.running,
         'timestamp': datetime.now().isoformat()
@@ -440,14 +698,293 @@ def api_recent_incidents():
     
     return jsonify(incidents_data)
 
+def parse_search_time(value, end_of_day=False):
+    """Epoch seconds from an epoch string or a Central Time YYYY-MM-DD date"""
+    if value is None or value == '':
+        return None
+    if value.isdigit():
+        return int(value)
+    day = datetime.strptime(value, '%Y-%m-%d')
+    if end_of_day:
+        day += timedelta(days=1)
+    return int(central_tz.localize(day).timestamp())
+
+@app.route('/api/incidents/search')
+@login_required
+def api_search_incidents():
+    """Full-text incident search (q) with corridor, min_severity, since/until filters; page with after"""
+    query = request.args.get('q', '').strip()
+    limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+    try:
+        since = parse_search_time(request.args.get('since'))
+        until = parse_search_time(request.args.get('until'), end_of_day=True)
+        after = request.args.get('after')
+        if after:
+            key, last_id = after.rsplit(':', 1)
+            after = (float(key), int(last_id))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid search parameter: {e}'}), 400
+    
+    incidents = Incident.search(db, query or None, corridor=request.args.get('corridor') or None,
+                                min_severity=request.args.get('min_severity', type=int),
+                                since=since, until=until, after=after, limit=limit)
+    
+    response = jsonify([{
+        'id': incident['id'],
+        'location': incident['location'],
+        'description': incident['description'],
+        'incident_time': incident['incident_time'],
+        'incident_ts': incident['incident_ts'],
+        'corridor': incident['corridor'],
+        'category': incident['category'],
+        'severity': incident['severity'],
+        'score': incident['score'],
+    } for incident in incidents])
+    if len(incidents) == limit:
+        key, last_id = Incident.search_cursor(incidents[-1])
+        response.headers['X-Next-After'] = f"{key!r}:{last_id}"
+    return response
+
+@app.route('/api/incidents/export')
+@login_required
+def api_export_incidents():
+    """Stream incidents with incident_ts in [from, to] as CSV or NDJSON, oldest first"""
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unsupported format: {fmt} (use {' or '.join(EXPORT_FORMATS)})"}), 400
+    try:
+        start = parse_search_time(request.args.get('from'))
+        end = parse_search_time(request.args.get('to'), end_of_day=True)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid export range: {e}'}), 400
+    
+    # Rows are read a chunk at a time as the client consumes the response
+    chunks = Incident.iter_range(db, start, end)
+    return Response(stream_with_context(export_stream(fmt, chunks)), mimetype=EXPORT_FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename=incidents.{fmt}'})
+
+@app.route('/api/analytics/heatmap')
+@login_required
+def api_analytics_heatmap():
+    """Incident counts by Central Time weekday and hour, optionally for one corridor and/or category"""
+    corridor = request.args.get('corridor') or None
+    category = request.args.get('category') or None
+    counts = heatmap.heatmap(corridor, category)
+    return jsonify({
+        'corridor': corridor,
+        'category': category,
+        'weekdays': list(WEEKDAYS),
+        'hours': list(range(HOURS)),
+        'counts': counts,
+        'total': sum(map(sum, counts)),
+    })
+
+@app.route('/api/analytics/hotspots')
+@login_required
+def api_analytics_hotspots():
+    """Interchanges with the most incidents, optionally for one corridor and/or category"""
+    limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+    return jsonify(heatmap.top_hotspots(limit, corridor=request.args.get('corridor') or None,
+                                        category=request.args.get('category') or None))
+
+@app.route('/api/analytics/rebuild', methods=['POST'])
+@login_required
+def api_analytics_rebuild():
+    """Recount the heatmap and hotspots from the full incident history"""
+    counted = heatmap.rebuild()
+    add_scrape_log(f"🗺️  Rebuilt incident analytics from {counted} incidents")
+    return jsonify({'incidents': counted})
+
+@app.route('/api/subscriber_areas')
+@login_required
+def api_subscriber_areas():
+    """API endpoint listing a subscriber's areas of interest"""
+    email = request.args.get('email', '').strip().lower()
+    areas = SubscriberArea.get_for_email(db, email)
+    return jsonify([dict(area) for area in areas])
+
+@app.route('/api/subscriber_areas', methods=['POST'])
+@login_required
+def api_add_subscriber_area():
+    """API endpoint to add a corridor, radius or polygon area of interest"""
+    data = request.get_json(silent=True) or {}
+    email = str(data.get('email', '')).strip().lower()
+    area_type = data.get('type')
+    label = data.get('label')
+    
+    try:
+        if area_type == 'corridor':
+            area_id = SubscriberArea.add_corridor(db, email, data['corridor'], label=label)
+        elif area_type == 'radius':
+            area_id = SubscriberArea.add_radius(db, email, float(data['lat']), float(data['lon']),
+                                                float(data['radius_km']), label=label)
+        elif area_type == 'polygon':
+            polygon = [(float(lat), float(lon)) for lat, lon in data['polygon']]
+            if len(polygon) < 3:
+                return jsonify({'error': 'Polygon needs at least 3 points'}), 400
+            area_id = SubscriberArea.add_polygon(db, email, polygon, label=label)
+        else:
+            return jsonify({'error': 'type must be corridor, radius or polygon'}), 400
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid area: {e}'}), 400
+    
+    return jsonify({'id': area_id}), 201
+
+@app.route('/api/subscriber_areas/<int:area_id>', methods=['DELETE'])
+@login_required
+def api_remove_subscriber_area(area_id):
+    """API endpoint to remove an area of interest"""
+    if SubscriberArea.remove(db, area_id):
+        return jsonify({'removed': area_id})
+    return jsonify({'error': 'Area not found'}), 404
+
+@app.route('/api/subscription_rules')
+@login_required
+def api_subscription_rules():
+    """API endpoint listing subscription rules"""
+    return jsonify([dict(rule) for rule in SubscriptionRule.get_all(db)])
+
+@app.route('/api/subscription_rules', methods=['POST'])
+@login_required
+def api_add_subscription_rule():
+    """API endpoint to add a category/severity/corridor/time-window subscription rule"""
+    data = request.get_json(silent=True) or {}
+    email = str(data.get('email', '')).strip().lower()
+    if not email or '@' not in email:
+        return jsonify({'error': 'Please enter a valid email address'}), 400
+    
+    template = data.get('template', 'standard')
+    if template not in ('standard', 'hazmat'):
+        return jsonify({'error': 'template must be standard or hazmat'}), 400
+    if template == 'standard' and not Subscriber.exists(db, email):
+        return jsonify({'error': f'{email} is not a subscriber; add them before giving them rules'}), 400
+    
+    try:
+        start_minute = data.get('start_minute')
+        end_minute = data.get('end_minute')
+        rule_id = SubscriptionRule.add(
+            db, email,
+            **filter_fields(data, json_getlist(data)),
+            start_minute=int(start_minute) if start_minute is not None else None,
+            end_minute=int(end_minute) if end_minute is not None else None,
+            template=template,
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid rule: {e}'}), 400
+    
+    if rule_id is None:
+        return jsonify({'error': 'Rule already exists'}), 409
+    return jsonify({'id': rule_id}), 201
+
+@app.route('/api/subscription_rules/<int:rule_id>', methods=['DELETE'])
+@login_required
+def api_remove_subscription_rule(rule_id):
+    """API endpoint to remove a subscription rule"""
+    if SubscriptionRule.remove(db, rule_id):
+        return jsonify({'removed': rule_id})
+    return jsonify({'error': 'Rule not found'}), 404
+
+@app.route('/api/outbox')
+@login_required
+def api_outbox():
+    """Alert deliveries per outbox state"""
+    return jsonify(AlertOutbox.counts(db))
+
+@app.route('/api/outbox/retry', methods=['POST'])
+@login_required
+def api_outbox_retry():
+    """Queue failed deliveries again; they go out with the next digest"""
+    incidents = email_service.retry_failed()
+    coalescer.add(incidents)
+    return jsonify({'success': True, 'incidents': len(incidents)})
+
+@app.route('/api/webhooks')
+@login_required
+def api_webhooks():
+    """API endpoint listing webhook subscriptions with their delivery counts"""
+    counts = AlertOutbox.channel_counts(db)
+    return jsonify([webhook_summary(row, counts) for row in WebhookSubscription.get_all(db)])
+
+@app.route('/api/webhooks', methods=['POST'])
+@login_required
+def api_add_webhook():
+    """API endpoint to subscribe a webhook endpoint; returns its signing secret once"""
+    data = request.get_json(silent=True) or {}
+    try:
+        fields = webhook_fields(data, json_getlist(data))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid webhook: {e}'}), 400
+    
+    subscription_id = WebhookSubscription.add(db, **fields)
+    if subscription_id is None:
+        return jsonify({'error': 'Webhook already exists'}), 409
+    return jsonify({'id': subscription_id, 'secret': fields['secret']}), 201
+
+@app.route('/api/webhooks/<int:subscription_id>', methods=['DELETE'])
+@login_required
+def api_remove_webhook(subscription_id):
+    """API endpoint to remove a webhook subscription"""
+    if WebhookSubscription.remove(db, subscription_id):
+        return jsonify({'removed': subscription_id})
+    return jsonify({'error': 'Webhook not found'}), 404
+
+@app.route('/api/webhooks/<int:subscription_id>/toggle', methods=['POST'])
+@login_required
+def api_toggle_webhook(subscription_id):
+    """API endpoint to pause or resume a webhook subscription"""
+    if not WebhookSubscription.toggle_active(db, subscription_id):
+        return jsonify({'error': 'Webhook not found'}), 404
+    return jsonify({'id': subscription_id, 'active': bool(WebhookSubscription.get(db, subscription_id)['active'])})
+
+@app.route('/api/webhooks/<int:subscription_id>/dead_letters')
+@login_required
+def api_webhook_dead_letters(subscription_id):
+    """Deliveries to a webhook that ran out of attempts, newest first"""
+    if WebhookSubscription.get(db, subscription_id) is None:
+        return jsonify({'error': 'Webhook not found'}), 404
+    limit = max(1, min(request.args.get('limit', 100, type=int), 500))
+    rows = AlertOutbox.dead_letters(db, webhook_channel_name(subscription_id), limit)
+    return jsonify([dict(row) for row in rows])
+
+@app.route('/api/webhooks/<int:subscription_id>/retry', methods=['POST'])
+@login_required
+def api_retry_webhook(subscription_id):
+    """Queue a webhook's dead letters again; they go out with the next push"""
+    if WebhookSubscription.get(db, subscription_id) is None:
+        return jsonify({'error': 'Webhook not found'}), 404
+    incidents = AlertOutbox.retry_failed(db, webhook_channel_name(subscription_id))
+    return jsonify({'success': True, 'incidents': len(incidents)})
+
 @app.route('/api/scrape_logs')
 @login_required
 def api_scrape_logs():
-    """API endpoint for scraping logs"""
-    # Return logs in reverse order (newest first)
-    logs_list = list(scrape_logs)
-    logs_list.reverse()
-    return jsonify(logs_list)
+    """API endpoint for scrape events, newest first (filters: level, cycle_id, stage, since; page with before)"""
+    since = request.args.get('since', type=float)
+    before = request.args.get('before', type=float)
+    limit = max(1, min(request.args.get('limit', 100, type=int), 500))
+    
+    filters = {name: request.args.get(name) for name in ('level', 'cycle_id', 'stage')}
+    # Debug events only show when asked for, and are skipped before the limit so pages stay full
+    exclude_level = None if filters['level'] else 'debug'
+    if not any(filters.values()) and since is None and before is None and limit <= event_log.capacity:
+        # Live view straight from the ring buffer
+        events = event_log.recent(limit, exclude_level)
+    else:
+        events = event_log.query(since=since, before=before, limit=limit, exclude_level=exclude_level, **filters)
+    
+    response = jsonify([event_to_dict(event) for event in events])
+    if len(events) == limit:
+        response.headers['X-Next-Before'] = repr(events[-1].ts)
+    return response
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus metrics for scrape stages, counters and alert delivery; admins or the METRICS_TOKEN bearer"""
+    token = Config.METRICS_TOKEN
+    scraper_allowed = token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if not (scraper_allowed or current_user.is_authenticated):
+        return login_manager.unauthorized()
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
 
 @app.route('/health')
 def health():
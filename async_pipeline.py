@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import StageTimer, SCRAPE_CYCLE_SECONDS, NEW_INCIDENTS
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+class PipelineResult:
+    """Outcome of one pipelined cycle"""
+
+    def __init__(self):
+        self.new_incidents = []
+        self.batches_sent = []
+        # Seconds from cycle start until each incident's alert was handed to SMTP
+        self.alert_latencies = []
+
+    @property
+    def alerts_sent(self):
+        return bool(self.batches_sent) and all(self.batches_sent)
+
+
+class AsyncPipeline:
+    """Fetch -> parse -> save -> alert as asyncio stages joined by bounded queues
+
+    Blocking work runs on executors: SQLite on a single thread, fetches, parsing
+    and SMTP sends on a small pool. Incidents are saved as soon as they are
+    parsed and the first alert goes out while the rest of the page (and any
+    other sources) are still being fetched and parsed; later incidents collect
+    into the next batch while a send is in flight. With a coalescer, batches are
+    offered to it instead, so they share the sequential cycle's digest window,
+    hourly budget and retries.
+    """
+
+    def __init__(self, scraper, email_service, queue_size=64, batch_size=25, linger=0.05, send_workers=1,
+                 coalescer=None):
+        self.scraper = scraper
+        self.email_service = email_service
+        self.coalescer = coalescer
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        # How long a free send slot waits for more saved incidents before sending
+        self.linger = linger
+        self.send_workers = send_workers
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pipeline-db')
+        self._io_executor = ThreadPoolExecutor(max_workers=4 + send_workers, thread_name_prefix='pipeline-io')
+
+    def run(self, deadline=None, urls=None):
+        """Run one cycle to completion from synchronous code"""
+        return asyncio.run(self.run_cycle(deadline, urls))
+
+    async def run_cycle(self, deadline=None, urls=None):
+        urls = urls or [self.scraper.page_url]
+        loop = asyncio.get_running_loop()
+        pages = asyncio.Queue(maxsize=len(urls))
+        parsed = asyncio.Queue(maxsize=self.queue_size)
+        saved = asyncio.Queue(maxsize=self.queue_size)
+        result = PipelineResult()
+
+        self.scraper.timer = StageTimer()
+        started = time.monotonic()
+        with SCRAPE_CYCLE_SECONDS.time():
+            try:
+                await asyncio.gather(
+                    self._fetch(loop, urls, pages, deadline),
+                    self._parse(loop, pages, parsed, deadline),
+                    self._save(loop, parsed, saved),
+                    self._alert(loop, saved, deadline, started, result),
+                )
+            finally:
+                self.scraper.timer.observe()
+
+        NEW_INCIDENTS.inc(len(result.new_incidents))
+        return result
+
+    async def _next_batch(self, queue, linger):
+        """Wait for one item, then take whatever arrives within linger; returns (batch, finished)"""
+        item = await queue.get()
+        if item is _DONE:
+            return [], True
+
+        batch = [item]
+        until = time.monotonic() + linger
+        while len(batch) < self.batch_size:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = until - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _fetch(self, loop, urls, pages, deadline):
+        async def fetch_one(url):
+            try:
+                content = await loop.run_in_executor(self._io_executor, self.scraper.fetch_page, url, deadline)
+            except Exception as e:
+                logger.error(f"Error fetching {url}: {e}")
+                return
+            if content is not None:
+                await pages.put(content)
+
+        try:
+            await asyncio.gather(*(fetch_one(url) for url in urls))
+        finally:
+            await pages.put(_DONE)
+
+    async def _parse(self, loop, pages, parsed, deadline):
+        # With a parse pool, pages from several sources parse side by side in worker processes
+        slots = asyncio.Semaphore(max(1, self.scraper.parse_workers))
+        tasks = []
+        try:
+            while True:
+                content = await pages.get()
+                if content is _DONE:
+                    break
+                stop_at = time.monotonic() + deadline.budget('parse') if deadline else None
+                await slots.acquire()
+                tasks.append(asyncio.ensure_future(self._parse_in_executor(loop, content, stop_at, parsed, slots)))
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            await parsed.put(_DONE)
+
+    async def _parse_in_executor(self, loop, content, stop_at, parsed, slots):
+        try:
+            await loop.run_in_executor(self._io_executor, self._parse_page, loop, content, stop_at, parsed)
+        finally:
+            slots.release()
+
+    def _parse_page(self, loop, content, stop_at, parsed):
+        """Runs on a worker thread; blocking on the bounded queue gives backpressure"""
+        try:
+            with self.scraper.timer.stage('parse'):
+                for incident in self.scraper.iter_incidents(content, stop_at):
+                    asyncio.run_coroutine_threadsafe(parsed.put(incident), loop).result()
+        except Exception as e:
+            logger.error(f"Error parsing page: {e}")
+
+    async def _save(self, loop, parsed, saved):
+        seen_hashes = set()
+        try:
+            finished = False
+            while not finished:
+                batch, finished = await self._next_batch(parsed, 0)
+                with self.scraper.timer.stage('dedup'):
+                    unique = [incident for incident in batch if incident.incident_hash not in seen_hashes]
+                    seen_hashes.update(incident.incident_hash for incident in unique)
+                if unique:
+                    for item in await loop.run_in_executor(self._db_executor, self._save_batch, unique):
+                        await saved.put(item)
+        finally:
+            await saved.put(_DONE)
+
+    def _save_batch(self, batch):
+        with self.scraper.timer.stage('save'):
+            return self.scraper.save_new_incidents(batch)
+
+    async def _alert(self, loop, saved, deadline, started, result):
+        """Send whatever has accumulated each time a send slot frees up"""
+        # Every batch mails each matching subscriber, so batches grow while sends are in flight
+        pending = []
+        ready = asyncio.Event()
+        finished = False
+
+        async def collect():
+            nonlocal finished
+            while True:
+                item = await saved.get()
+                if item is _DONE:
+                    break
+                pending.append(item)
+                ready.set()
+            finished = True
+            ready.set()
+
+        collector = asyncio.ensure_future(collect())
+        slots = asyncio.Semaphore(self.send_workers)
+        sends = []
+        while True:
+            await ready.wait()
+            await slots.acquire()
+            if not finished:
+                await asyncio.sleep(self.linger)
+            batch = pending[:]
+            del pending[:]
+            if not finished:
+                ready.clear()
+            if not batch:
+                slots.release()
+                if finished:
+                    break
+                continue
+            result.new_incidents.extend(batch)
+            sends.append(asyncio.ensure_future(self._send(loop, batch, deadline, started, result, slots)))
+
+        await collector
+        if sends:
+            await asyncio.gather(*sends)
+
+    async def _send(self, loop, batch, deadline, started, result, slots):
+        send = self.coalescer.offer if self.coalescer is not None else self.email_service.send_alert
+        try:
+            success = await loop.run_in_executor(self._io_executor, send, batch, deadline)
+        except Exception as e:
+            logger.error(f"Error sending alert batch: {e}")
+            success = False
+        finally:
+            slots.release()
+
+        if success is None:
+            # Buffered for a later digest
+            return
+        result.batches_sent.append(success)
+        if success:
+            result.alert_latencies.extend([time.monotonic() - started] * len(batch))
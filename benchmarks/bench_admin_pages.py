@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Subscriber admin page latency as the list grows
+
+Renders /subscribers through the Flask test client for growing subscriber
+lists, next to what rendering every row (the old get_all page) costs, and a
+filtered second page.
+
+    python benchmarks/bench_admin_pages.py [--sizes 1000,10000,100000] [--repeat N]
+"""
+
+import sys
+import os
+import argparse
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+
+def timed(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    Config.DATABASE_PATH = os.path.join(tmp.name, 'bench.db')
+    import app as web
+    from flask import render_template
+    from models import Subscriber
+    web.scheduler.pause()
+
+    client = web.app.test_client()
+    client.post('/login', data={'username': Config.DEFAULT_ADMIN_USERNAME, 'password': Config.DEFAULT_ADMIN_PASSWORD})
+
+    def render_everything():
+        with web.app.test_request_context('/subscribers'):
+            render_template('subscribers.html', subscribers=Subscriber.get_all(web.db), counts=Subscriber.counts(web.db))
+
+    print(f"{'subscribers':>12} {'all rows ms':>12} {'page ms':>9} {'filtered p2 ms':>15}")
+    added = 0
+    for size in [int(size) for size in args.sizes.split(',')]:
+        Subscriber.add_many(web.db, [(n, f"driver{n:07d}@fleet.example.com", n % 3 != 0) for n in range(added, size)])
+        added = size
+        everything = timed(args.repeat, render_everything)
+        page = timed(args.repeat, lambda: client.get('/subscribers'))
+        filtered = timed(args.repeat, lambda: client.get('/subscribers?q=driver00&status=inactive'
+                                                         '&after=driver0000099@fleet.example.com'))
+        print(f"{size:>12} {everything:>12.1f} {page:>9.1f} {filtered:>15.1f}")
+
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
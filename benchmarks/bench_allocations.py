@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Per-cycle memory allocations of the scrape path, measured with tracemalloc
+
+Parses each page of the replay fixture corpus (plus a 10x synthetic page)
+the way run_scrape_cycle does, after one untimed warm-up pass, and reports
+the peak traced memory, the blocks still allocated by the cycle's output
+and the bytes per Incident. The top allocation sites by file show where the
+remaining churn comes from.
+
+    python benchmarks/bench_allocations.py [--top N]
+"""
+
+import sys
+import os
+import argparse
+import gc
+import logging
+import tempfile
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import PageGenerator, list_fixtures
+from models import Database
+from scraper import TranStarScraper
+
+
+def snapshot_stats(snapshot, key_type='filename'):
+    return snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)]).statistics(key_type)
+
+
+def measure(scraper, page):
+    """Return (peak bytes, retained blocks, retained bytes, incidents, top sites) for one parse"""
+    gc.collect()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    incidents = scraper.remove_duplicate_incidents(scraper.parse_html(page))
+    peak = tracemalloc.get_traced_memory()[1]
+    # The parse tree is cyclic; only what the incidents keep alive should remain
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    retained = [stat for stat in after.compare_to(before, 'filename') if stat.size_diff > 0]
+    blocks = sum(stat.count_diff for stat in retained)
+    size = sum(stat.size_diff for stat in retained)
+    return peak, blocks, size, incidents, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top', type=int, default=5, help='allocation sites to list for the largest page')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    pages = [(os.path.basename(path), open(path, 'rb').read()) for path in list_fixtures()]
+    pages.append(('synthetic 10x', PageGenerator(seed=10, rows_per_table=120).page()))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scraper = TranStarScraper(db=Database(os.path.join(tmp, 'bench.db')), parse_workers=0)
+        for _, page in pages:
+            scraper.parse_html(page)
+
+        print(f"{'page':>28} {'incidents':>9} {'peak KiB':>9} {'kept blocks':>12} {'kept KiB':>9} {'B/incident':>11}")
+        for name, page in pages:
+            peak, blocks, size, incidents, retained = measure(scraper, page)
+            per_incident = size / len(incidents) if incidents else 0
+            print(f"{name:>28} {len(incidents):>9} {peak / 1024:>9.0f} {blocks:>12} {size / 1024:>9.1f} "
+                  f"{per_incident:>11.0f}")
+
+    print(f"\nTop retained allocation sites ({pages[-1][0]}):")
+    for stat in retained[:args.top]:
+        frame = stat.traceback[0]
+        print(f"  {os.path.basename(frame.filename):>24}  {stat.count_diff:>7} blocks  {stat.size_diff / 1024:>8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Heatmap and hotspot latency: incremental counts vs. aggregating incident history
+
+Fills a temporary database with synthetic incidents (see bench_search.py),
+then times a corridor x weekday x hour GROUP BY over the incidents table
+against IncidentHeatmap.heatmap/top_hotspots, plus the one-off rebuild.
+
+    python benchmarks/bench_analytics.py [--rows N] [--repeat N]
+"""
+
+import sys
+import os
+import argparse
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import IncidentHeatmap
+from bench_search import fill
+from models import Database
+
+GROUP_BY_SQL = '''
+    SELECT corridor, CAST(strftime('%w', incident_ts, 'unixepoch', 'localtime') AS INTEGER) AS weekday,
+           CAST(strftime('%H', incident_ts, 'unixepoch', 'localtime') AS INTEGER) AS hour, count(*)
+    FROM incidents
+    WHERE corridor = ?
+    GROUP BY 1, 2, 3
+'''
+
+
+def timed(repeat, fn, *args):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=9)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'analytics.db'))
+        fill(db, args.rows)
+        heatmap = IncidentHeatmap(db)
+
+        start = time.perf_counter()
+        counted = heatmap.rebuild()
+        print(f"🗺️  rebuild over {counted} incidents: {time.perf_counter() - start:.2f}s\n")
+
+        conn = db.get_connection()
+        results = [
+            ('GROUP BY one corridor', timed(args.repeat, lambda: conn.execute(GROUP_BY_SQL, ('IH-45',)).fetchall())),
+            ('heatmap one corridor', timed(args.repeat, heatmap.heatmap, 'IH-45')),
+            ('heatmap all corridors', timed(args.repeat, heatmap.heatmap)),
+            ('top 10 hotspots', timed(args.repeat, heatmap.top_hotspots, 10)),
+        ]
+        conn.close()
+        for label, ms in results:
+            print(f"{label:>24} {ms:>9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+New-incident-to-email latency: sequential cycle vs the asyncio pipeline
+
+Both modes scrape churned synthetic pages from a local ReplayServer and mail
+a local SMTP sink with a per-message delay. Sync mode scrapes the whole
+page, then sends every alert; async mode (async_pipeline.AsyncPipeline)
+sends batches while the rest of the page is still being parsed and saved.
+For each new incident the latency is the time from cycle start until its
+alert was accepted by the sink.
+
+    python benchmarks/bench_async_pipeline.py [--cycles N] [--rows N] [--smtp-delay S] [--server-delay S]
+"""
+
+import sys
+import os
+import argparse
+import logging
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_pipeline import AsyncPipeline
+from config import Config
+from coordinator import Deadline
+from email_service import EmailService
+from fixtures import PageGenerator, ReplayServer
+from models import Database, Subscriber
+from scraper import TranStarScraper
+from smtp_sink import SMTPSink
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_sync(scraper, email_service):
+    """One sequential cycle; every incident waits for the full scrape and the whole send"""
+    start = time.monotonic()
+    deadline = Deadline(Config.CYCLE_DEADLINE)
+    new_incidents = scraper.run_scrape_cycle(deadline)
+    if new_incidents and email_service.send_alert(new_incidents, deadline):
+        return [time.monotonic() - start] * len(new_incidents)
+    return []
+
+
+def run_async(pipeline):
+    """One pipelined cycle; latencies are measured per alert batch"""
+    return pipeline.run(Deadline(Config.CYCLE_DEADLINE)).alert_latencies
+
+
+def run_mode(mode, args):
+    generator = PageGenerator(seed=17, rows_per_table=args.rows, relevant_ratio=0.6, churn=args.churn)
+    with tempfile.TemporaryDirectory() as tmp, ReplayServer([generator.page()], delay=args.server_delay) as server, \
+            SMTPSink(delay=args.smtp_delay) as sink:
+        db = Database(os.path.join(tmp, f'{mode}.db'))
+        for n in range(args.subscribers):
+            Subscriber.add(db, f"driver{n}@example.com")
+
+        scraper = TranStarScraper(db=db, base_url=server.base_url)
+        email_service = EmailService(db=db)
+        email_service.smtp_server, email_service.smtp_port = sink.host, sink.port
+        email_service.use_tls = False
+        email_service.username = email_service.password = email_service.from_email = 'bench@example.com'
+        pipeline = AsyncPipeline(scraper, email_service, batch_size=args.batch_size, linger=args.linger)
+
+        latencies, firsts = [], []
+        for _ in range(args.cycles):
+            cycle = run_async(pipeline) if mode == 'async' else run_sync(scraper, email_service)
+            latencies.extend(cycle)
+            if cycle:
+                firsts.append(min(cycle))
+            generator.advance()
+            server.pages = [generator.page()]
+
+        return latencies, firsts, len(sink.messages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cycles', type=int, default=5)
+    parser.add_argument('--rows', type=int, default=60, help='rows per table on the synthetic page')
+    parser.add_argument('--churn', type=float, default=0.3)
+    parser.add_argument('--subscribers', type=int, default=20)
+    parser.add_argument('--smtp-delay', type=float, default=0.05, help='seconds per message at the sink')
+    parser.add_argument('--server-delay', type=float, default=0.2, help='seconds before the page is served')
+    parser.add_argument('--batch-size', type=int, default=25)
+    parser.add_argument('--linger', type=float, default=0.05)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    # Measure latency, not the hourly limit
+    Config.MAX_ALERTS_PER_HOUR = 10 ** 9
+
+    print(f"📬 {args.cycles} cycles, {args.rows * len(PageGenerator.LAYOUTS)} rows/page, "
+          f"SMTP delay {args.smtp_delay * 1000:.0f} ms, server delay {args.server_delay * 1000:.0f} ms\n")
+    print(f"{'mode':>6} {'alerts':>7} {'emails':>7} {'first ms':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for mode in ('sync', 'async'):
+        latencies, firsts, emails = run_mode(mode, args)
+        if not latencies:
+            print(f"{mode:>6} no alerts sent")
+            continue
+        print(f"{mode:>6} {len(latencies):>7} {emails:>7} {percentile(firsts, 50) * 1000:>9.0f} "
+              f"{percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 99) * 1000:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+High-severity alert latency while the mail sender is busy with bulk digests
+
+Drives EmailService.send_alert the way the cycle coordinator does: one
+cycle at a time, in arrival order. Cycles arrive every --gap seconds, each
+with a new incident; most are low-severity (a bulk lane digest) and every
+--urgent-every'th is severity 5, all sent to a local SMTP sink with a
+per-message relay delay. Times how long after arriving each severity-5
+alert's send_alert returns when every call waits for its bulk digests
+(the old deliver) against returning once the priority lane has sent, and
+how long until every digest has gone out either way.
+
+    python benchmarks/bench_delivery_lanes.py [--cycles N] [--urgent-every N] [--smtp-delay S]
+"""
+
+import sys
+import os
+import argparse
+import logging
+import queue
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from delivery import PRIORITY, BULK, DeliveryLane
+from email_service import EmailService
+from models import Database, Incident, Subscriber, SubscriptionRule
+from smtp_sink import SMTPSink
+
+
+def make_service(tmp, sink, args):
+    """A fresh database of subscribers and an EmailService pointed at the sink"""
+    db = Database(os.path.join(tmp, 'bench.db'))
+    conn = db.get_connection()
+    conn.execute('DELETE FROM subscribers')
+    conn.execute('DELETE FROM subscription_rules')
+    conn.commit()
+    conn.close()
+    for n in range(args.recipients):
+        Subscriber.add(db, f"driver{n}@example.com")
+        SubscriptionRule.add(db, f"driver{n}@example.com")
+    SubscriptionRule.bump_version(db)
+
+    email_service = EmailService(db=db)
+    email_service.smtp_server, email_service.smtp_port = sink.host, sink.port
+    email_service.use_tls = False
+    email_service.username = email_service.password = email_service.from_email = 'bench@example.com'
+    email_service.lanes = {PRIORITY: DeliveryLane(PRIORITY, email_service, args.priority_workers),
+                           BULK: DeliveryLane(BULK, email_service, args.bulk_workers)}
+    return db, email_service
+
+
+def save(db, location, severity):
+    incident = Incident(location, "Heavy truck accident blocking lanes", "3:16 PM", severity)
+    return [(incident, incident.save(db))]
+
+
+def run(sink, args, wait_for_bulk):
+    """Send each cycle's alert as it arrives; return the severity-5 latencies and the drain time"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db, email_service = make_service(tmp, sink, args)
+        arrivals = queue.Queue()
+
+        def arrive():
+            # Cycles arrive on their own schedule, whether or not earlier alerts have gone out
+            for n in range(args.cycles):
+                time.sleep(args.gap)
+                urgent = n % args.urgent_every == args.urgent_every - 1
+                arrivals.put((time.perf_counter(), urgent, save(db, f"IH-10 EB @ Exit {n}", 5 if urgent else 1)))
+            arrivals.put(None)
+
+        start = time.perf_counter()
+        producer = threading.Thread(target=arrive)
+        producer.start()
+        urgent = []
+        for arrived, is_urgent, incidents in iter(arrivals.get, None):
+            assert email_service.send_alert(incidents, rate_limit=False)
+            if wait_for_bulk:
+                email_service.drain()
+            if is_urgent:
+                urgent.append(time.perf_counter() - arrived)
+        email_service.drain()
+        drained = time.perf_counter() - start
+        producer.join()
+    return sorted(urgent), drained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cycles', type=int, default=40)
+    parser.add_argument('--urgent-every', type=int, default=5, help='every Nth cycle brings a severity-5 incident')
+    parser.add_argument('--gap', type=float, default=0.15, help='seconds between cycles')
+    parser.add_argument('--recipients', type=int, default=5)
+    parser.add_argument('--smtp-delay', type=float, default=0.05, help='relay time per message')
+    parser.add_argument('--bulk-workers', type=int, default=1)
+    parser.add_argument('--priority-workers', type=int, default=2)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with SMTPSink(delay=args.smtp_delay) as sink:
+        print(f"📨 {args.cycles} cycles every {args.gap * 1000:.0f} ms, one in {args.urgent_every} severity 5, "
+              f"{args.smtp_delay * 1000:.0f} ms relay delay")
+        print(f"{'send_alert':>18} {'urgent p50 ms':>14} {'urgent max ms':>14} {'bulk drained ms':>16}")
+        for name, wait_for_bulk in (('waits for bulk', True), ('priority only', False)):
+            latencies, drained = run(sink, args, wait_for_bulk)
+            p50 = latencies[len(latencies) // 2] * 1000
+            print(f"{name:>18} {p50:>14.1f} {latencies[-1] * 1000:>14.1f} {drained * 1000:>16.1f}")
+        print(f"📬 Sink accepted {len(sink.messages)} messages")
+
+
+if __name__ == "__main__":
+    main()
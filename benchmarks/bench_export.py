@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Peak memory of incident exports: streamed chunks vs. a materialized result set
+
+Fills a temporary database with a year of synthetic incidents (see
+bench_search.py) and exports a day, a month and the whole year as CSV and
+NDJSON. Peak Python allocations (tracemalloc) are reported for the streaming
+generators and for fetching every row and building the file in memory first.
+
+    python benchmarks/bench_export.py [--rows N]
+"""
+
+import sys
+import os
+import argparse
+import csv
+import io
+import tempfile
+import time
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_search import fill, END_TS, YEAR
+from export import EXPORT_COLUMNS, export_record, export_stream
+from models import Database, Incident
+
+RANGES = [('day', 86400), ('month', 30 * 86400), ('year', YEAR)]
+
+
+def materialized_csv(db, start, end):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in Incident.get_in_range(db, start, end):
+        writer.writerow(export_record(row))
+    return output.getvalue()
+
+
+def streamed(db, fmt, start, end):
+    size = 0
+    for text in export_stream(fmt, Incident.iter_range(db, start, end)):
+        size += len(text)
+    return size
+
+
+def measure(fn, *args):
+    # Timed separately: tracing every allocation slows the export several times over
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'export.db'))
+        fill(db, args.rows)
+
+        print(f"{'range':>6} {'mode':>18} {'peak KiB':>10} {'seconds':>8}")
+        for label, span in RANGES:
+            start, end = END_TS - span, END_TS
+            for mode, fn, fn_args in (
+                ('materialized csv', materialized_csv, (db, start, end)),
+                ('streamed csv', streamed, (db, 'csv', start, end)),
+                ('streamed ndjson', streamed, (db, 'ndjson', start, end)),
+            ):
+                peak, elapsed = measure(fn, *fn_args)
+                print(f"{label:>6} {mode:>18} {peak / 1024:>10.0f} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark geofenced subscriber matching
+
+Builds 10k subscribers with overlapping corridor, radius and polygon areas
+around Houston and compares per-incident matching through the grid index
+against a brute-force scan of every area.
+"""
+
+import sys
+import os
+import random
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geofence import Area, GeofenceIndex
+from geocode import CORRIDOR_CENTROIDS
+
+# Rough Houston metro bounding box
+LAT_RANGE = (29.50, 30.10)
+LON_RANGE = (-95.80, -95.00)
+
+
+def random_point(rng):
+    return rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)
+
+
+def build_areas(subscriber_count, rng):
+    """Each subscriber gets one to three overlapping areas"""
+    corridors = list(CORRIDOR_CENTROIDS)
+    areas = []
+    for n in range(subscriber_count):
+        email = f"driver{n}@example.com"
+        for _ in range(rng.randint(1, 3)):
+            kind = rng.random()
+            if kind < 0.3:
+                areas.append(Area(email, 'corridor', rng.choice(corridors), None, None, None, None))
+            elif kind < 0.8:
+                lat, lon = random_point(rng)
+                areas.append(Area(email, 'radius', None, lat, lon, rng.uniform(2, 25), None))
+            else:
+                lat, lon = random_point(rng)
+                size = rng.uniform(0.02, 0.15)
+                polygon = [(lat, lon), (lat + size, lon), (lat + size, lon + size), (lat, lon + size)]
+                areas.append(Area(email, 'polygon', None, None, None, None, polygon))
+    return areas
+
+
+def brute_force_match(index, areas, lat, lon, corridor):
+    """Reference matcher that tests every area"""
+    matched = set()
+    for area in areas:
+        if area.area_type == 'corridor':
+            if area.corridor == corridor:
+                matched.add(area.email)
+        elif index._contains(area, lat, lon):
+            matched.add(area.email)
+    return matched
+
+
+def main():
+    rng = random.Random(42)
+    subscriber_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    incident_count = 500
+
+    areas = build_areas(subscriber_count, rng)
+
+    start = time.perf_counter()
+    index = GeofenceIndex(areas)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    corridors = list(CORRIDOR_CENTROIDS)
+    incidents = [(*random_point(rng), rng.choice(corridors)) for _ in range(incident_count)]
+
+    start = time.perf_counter()
+    indexed = [index.match(lat, lon, corridor) for lat, lon, corridor in incidents]
+    indexed_us = (time.perf_counter() - start) / incident_count * 1e6
+
+    start = time.perf_counter()
+    brute = [brute_force_match(index, areas, lat, lon, corridor) for lat, lon, corridor in incidents]
+    brute_us = (time.perf_counter() - start) / incident_count * 1e6
+
+    assert indexed == brute, "Grid index and brute force disagree"
+
+    avg_recipients = sum(len(m) for m in indexed) / incident_count
+    print(f"🗺️  {subscriber_count} subscribers, {len(areas)} areas, {incident_count} incidents")
+    print(f"Index build:          {build_ms:.1f} ms")
+    print(f"Grid index match:     {indexed_us:.1f} µs/incident")
+    print(f"Brute force match:    {brute_us:.1f} µs/incident")
+    print(f"Speedup:              {brute_us / indexed_us:.1f}x")
+    print(f"Avg matched per inc.: {avg_recipients:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Dashboard latency during a heavy scrape cycle, with and without the parse pool
+
+Replays a synthetic page at 100x today's volume and keeps a scrape thread
+parsing it in the same process as the Flask app, the way the scheduler does
+inside a gunicorn worker. Meanwhile the main thread requests /dashboard as a
+logged-in admin and records each response time. Runs once idle, once with
+parse+classify on the scrape thread and once offloaded to a
+ProcessPoolExecutor (Config.PARSE_WORKERS).
+
+    python benchmarks/bench_parse_pool.py [--workers N] [--multiplier N] [--seconds S]
+"""
+
+import sys
+import os
+import argparse
+import logging
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from fixtures import PageGenerator, ReplayServer
+from scraper import TranStarScraper
+
+# Rows per table at 1x, as in stress_pipeline.py
+BASE_ROWS_PER_TABLE = 12
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(client, seconds, scraper=None):
+    """Request /dashboard for the given time while scraper (if any) scrapes in a loop"""
+    stop = threading.Event()
+    cycles = []
+
+    def scrape_loop():
+        while not stop.is_set():
+            start = time.perf_counter()
+            scraper.scrape_incidents()
+            cycles.append(time.perf_counter() - start)
+
+    worker = threading.Thread(target=scrape_loop, daemon=True) if scraper else None
+    if worker:
+        worker.start()
+
+    latencies = []
+    until = time.perf_counter() + seconds
+    while time.perf_counter() < until:
+        start = time.perf_counter()
+        assert client.get('/dashboard').status_code == 200
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.01)
+
+    stop.set()
+    if worker:
+        worker.join()
+    return latencies, cycles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--multiplier', type=int, default=100)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    args = parser.parse_args()
+
+    # Set on the root logger rather than disabled, so the parse workers inherit it
+    logging.getLogger().setLevel(logging.WARNING)
+    tmp = tempfile.TemporaryDirectory()
+    Config.DATABASE_PATH = os.path.join(tmp.name, 'bench.db')
+    import app as web
+    web.scheduler.pause()
+
+    client = web.app.test_client()
+    client.post('/login', data={'username': Config.DEFAULT_ADMIN_USERNAME,
+                                'password': Config.DEFAULT_ADMIN_PASSWORD})
+
+    page = PageGenerator(seed=1, rows_per_table=BASE_ROWS_PER_TABLE * args.multiplier).page()
+    with ReplayServer([page]) as server:
+        in_process = TranStarScraper(db=web.db, base_url=server.base_url, parse_workers=0)
+        pooled = TranStarScraper(db=web.db, base_url=server.base_url, parse_workers=args.workers)
+        # Start the worker processes before timing anything
+        pooled.scrape_incidents()
+
+        rows = BASE_ROWS_PER_TABLE * args.multiplier * len(PageGenerator.LAYOUTS)
+        print(f"🖥️  /dashboard latency, {args.seconds:.0f}s per run, {rows}-row page, {args.workers} parse workers\n")
+        print(f"{'run':>12} {'requests':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'cycle ms':>9}")
+        for label, scraper in (('idle', None), ('in-process', in_process), ('pool', pooled)):
+            latencies, cycles = measure(client, args.seconds, scraper)
+            cycle = f"{percentile(cycles, 50) * 1000:>9.0f}" if cycles else f"{'-':>9}"
+            print(f"{label:>12} {len(latencies):>9} {percentile(latencies, 50) * 1000:>8.1f} "
+                  f"{percentile(latencies, 99) * 1000:>8.1f} {max(latencies) * 1000:>8.1f} {cycle}")
+
+        pooled.shutdown_parse_pool()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+End-to-end scrape cycle benchmark against the replayed fixture corpus
+
+Runs TranStarScraper.run_scrape_cycle against a local ReplayServer and a
+temporary database, marking new incidents as sent after each cycle the way
+the scheduler does, after one untimed warm-up pass over the corpus. Reports rows/sec and p50/p99 cycle time and compares
+them against benchmarks/baseline.json.
+
+    python benchmarks/bench_scrape_cycle.py [cycles]
+    python benchmarks/bench_scrape_cycle.py [cycles] --update-baseline
+
+Exits non-zero when p50 or p99 is more than TOLERANCE slower than the baseline.
+"""
+
+import sys
+import os
+import json
+import logging
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import ReplayServer, list_fixtures
+from metrics import ROWS_SEEN
+from models import Database, SentAlert
+from scraper import TranStarScraper
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+BENCHMARK_NAME = 'scrape_cycle'
+
+# Allowed slowdown before the run counts as a regression
+TOLERANCE = 1.5
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(cycles):
+    """Run the cycles and return (p50_ms, p99_ms, rows_per_sec)"""
+    with ReplayServer(list_fixtures()) as server, tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'))
+        scraper = TranStarScraper(db=db, base_url=server.base_url)
+
+        # Warm the parse/geocode caches and the sent-alert state with one pass over the corpus
+        for _ in range(len(server.pages)):
+            for _, incident_id in scraper.run_scrape_cycle():
+                SentAlert.mark_sent(db, incident_id)
+
+        durations = []
+        rows_before = ROWS_SEEN.value()
+        for _ in range(cycles):
+            start = time.perf_counter()
+            new_incidents = scraper.run_scrape_cycle()
+            durations.append(time.perf_counter() - start)
+            for _, incident_id in new_incidents:
+                SentAlert.mark_sent(db, incident_id)
+        rows = ROWS_SEEN.value() - rows_before
+
+    return (percentile(durations, 50) * 1000, percentile(durations, 99) * 1000, rows / sum(durations))
+
+
+def load_baseline():
+    try:
+        with open(BASELINE_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    cycles = int(args[0]) if args else 100
+
+    # Per-row INFO logging would dominate the measurement
+    logging.disable(logging.INFO)
+    p50_ms, p99_ms, rows_per_sec = run(cycles)
+
+    print(f"🔁 {cycles} cycles over {len(list_fixtures())} fixtures")
+    print(f"Rows/sec:             {rows_per_sec:.0f}")
+    print(f"Cycle p50:            {p50_ms:.1f} ms")
+    print(f"Cycle p99:            {p99_ms:.1f} ms")
+
+    baselines = load_baseline()
+    if '--update-baseline' in sys.argv:
+        baselines[BENCHMARK_NAME] = {'p50_ms': round(p50_ms, 2), 'p99_ms': round(p99_ms, 2),
+                                     'rows_per_sec': round(rows_per_sec)}
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2)
+            f.write('\n')
+        print(f"📌 Baseline updated in {BASELINE_PATH}")
+        return 0
+
+    baseline = baselines.get(BENCHMARK_NAME)
+    if not baseline:
+        print("No baseline stored; run with --update-baseline to create one")
+        return 0
+
+    measured = {'p50_ms': p50_ms, 'p99_ms': p99_ms}
+    regressions = [name for name, value in measured.items() if value > baseline[name] * TOLERANCE]
+    for name in regressions:
+        print(f"❌ {name} regressed: {measured[name]:.1f} ms vs baseline {baseline[name]:.1f} ms")
+    if not regressions:
+        print(f"✅ Within {TOLERANCE:.2f}x of baseline (p50 {baseline['p50_ms']:.1f} ms, p99 {baseline['p99_ms']:.1f} ms)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
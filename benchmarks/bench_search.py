@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Incident search latency over a large synthetic history
+
+Fills a temporary database with synthetic incidents (a year of TranStar-style
+locations and descriptions, indexed through the incidents_fts triggers) and
+times Incident.search for selective and broad text queries, filtered and
+unfiltered, and a second keyset page.
+
+    python benchmarks/bench_search.py [--rows N] [--repeat N]
+"""
+
+import sys
+import os
+import argparse
+import csv
+import random
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classification import CATEGORIES
+from fixtures import DIRECTIONS, FREEWAY_DESCRIPTIONS, STALL_DESCRIPTIONS, STREET_DESCRIPTIONS, CLOSURE_DESCRIPTIONS
+from geocode import INTERCHANGES_PATH
+from models import Database, Incident
+
+DESCRIPTIONS = [text for text, _ in FREEWAY_DESCRIPTIONS + STALL_DESCRIPTIONS + STREET_DESCRIPTIONS
+                + CLOSURE_DESCRIPTIONS]
+YEAR = 365 * 86400
+END_TS = 1790000000
+QUERIES = [
+    ('selective text', dict(query='tidwell')),
+    ('text + corridor', dict(query='hazmat spill', corridor='IH-45')),
+    ('text + severity + week', dict(query='lost load', min_severity=3, since=END_TS - 7 * 86400)),
+    ('broad text', dict(query='accident')),
+    ('corridor + month', dict(corridor='IH-610', since=END_TS - 30 * 86400)),
+    ('newest', dict()),
+]
+
+
+def fill(db, rows, seed=0):
+    rng = random.Random(seed)
+    with open(INTERCHANGES_PATH, newline='', encoding='utf-8') as f:
+        interchanges = [(row['corridor'], row['cross_street']) for row in csv.DictReader(f)]
+
+    conn = db.get_connection()
+    batch = []
+    for n in range(rows):
+        corridor, cross_street = rng.choice(interchanges)
+        batch.append((f"{n:032x}", f"{corridor} {rng.choice(DIRECTIONS)} @ {cross_street}", rng.choice(DESCRIPTIONS),
+                      END_TS - YEAR + YEAR * n // rows - rng.randrange(3600), rng.randint(1, 5), corridor,
+                      cross_street, rng.choice(CATEGORIES)))
+        if len(batch) == 50000 or n == rows - 1:
+            conn.executemany('''
+                INSERT INTO incidents (incident_hash, location, description, incident_ts, severity, corridor,
+                                       cross_street, category)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', batch)
+            conn.commit()
+            batch = []
+    conn.execute('ANALYZE')
+    conn.commit()
+    conn.close()
+
+
+def timed(db, repeat, **kwargs):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = Incident.search(db, **kwargs)
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2], rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=9)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'search.db'))
+        start = time.perf_counter()
+        fill(db, args.rows)
+        print(f"🗃️  {args.rows} incidents indexed in {time.perf_counter() - start:.1f}s\n")
+
+        print(f"{'query':>24} {'rows':>5} {'p50 ms':>8} {'page 2 ms':>10}")
+        for label, kwargs in QUERIES:
+            first_ms, rows = timed(db, args.repeat, **kwargs)
+            page_ms = '-'
+            if len(rows) == 50:
+                key = 'score' if kwargs.get('query') else 'incident_ts'
+                page_ms = f"{timed(db, args.repeat, after=(rows[-1][key], rows[-1]['id']), **kwargs)[0] * 1000:.2f}"
+            print(f"{label:>24} {len(rows):>5} {first_ms * 1000:>8.2f} {page_ms:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Onboarding a fleet: one Subscriber.add per driver vs. a single bulk import
+
+Times N individual adds (a connection and commit each, as /add_subscriber
+does per POST) against Subscriber.add_many parsing the same drivers from a CSV
+stream, plus a bulk deactivate of all of them.
+
+    python benchmarks/bench_subscriber_import.py [--drivers N]
+"""
+
+import sys
+import os
+import argparse
+import io
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Database, Subscriber
+from subscriber_io import iter_import_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--drivers', type=int, default=2000)
+    args = parser.parse_args()
+    emails = [f"driver{n}@fleet.example.com" for n in range(args.drivers)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'one.db'))
+        start = time.perf_counter()
+        for email in emails:
+            Subscriber.add(db, email)
+        one_by_one = time.perf_counter() - start
+
+        db = Database(os.path.join(tmp, 'bulk.db'))
+        body = io.StringIO('email\n' + ''.join(f"{email}\n" for email in emails))
+        start = time.perf_counter()
+        results = Subscriber.add_many(db, iter_import_rows(body, 'csv'))
+        bulk = time.perf_counter() - start
+
+        start = time.perf_counter()
+        Subscriber.update_many(db, 'deactivate', emails)
+        bulk_update = time.perf_counter() - start
+
+    print(f"👥 {args.drivers} drivers")
+    print(f"{'one add per driver':>22} {one_by_one * 1000:>9.1f} ms")
+    print(f"{'bulk import':>22} {bulk * 1000:>9.1f} ms ({len(results)} rows reported)")
+    print(f"{'bulk deactivate':>22} {bulk_update * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
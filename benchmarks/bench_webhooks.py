@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Webhook fan-out throughput to many subscribed endpoints
+
+Starts one local HTTP receiver per endpoint (with a per-request delay
+standing in for network and receiver time), subscribes each through
+WebhookSubscription, then pushes a cycle's worth of incidents. Compares
+one incident per POST against batched POSTs, and the dispatcher's worker
+pool sizes, reporting POSTs, incidents delivered per second and the wall
+time of the push.
+
+    python benchmarks/bench_webhooks.py [--endpoints N] [--incidents N] [--delay S]
+"""
+
+import sys
+import os
+import argparse
+import logging
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from channels import ChannelDispatcher
+from config import Config
+from http_sink import HTTPSink
+from models import Database, Incident, WebhookSubscription
+
+
+def run(sinks, args, batch_size, workers):
+    """Subscribe every sink in a fresh database, push once; return (seconds, POSTs, incidents delivered)"""
+    Config.WEBHOOK_BATCH_SIZE = batch_size
+    for sink in sinks:
+        sink.requests.clear()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'))
+        for n, sink in enumerate(sinks):
+            WebhookSubscription.add(db, f"endpoint-{n}", sink.url, f"secret-{n}")
+        incidents = []
+        for n in range(args.incidents):
+            incident = Incident(f"IH-10 EB @ Exit {n}", "Heavy truck accident blocking lanes", "3:16 PM", 3)
+            incidents.append((incident, incident.save(db)))
+
+        dispatcher = ChannelDispatcher(db, [], workers=workers)
+        dispatcher.refresh()
+        start = time.perf_counter()
+        results = dispatcher.push(incidents)
+        elapsed = time.perf_counter() - start
+        assert all(results.values()) and len(results) == len(sinks)
+
+    posts = sum(len(sink.requests) for sink in sinks)
+    delivered = sum(len(payload['incidents']) for sink in sinks for payload in sink.payloads())
+    return elapsed, posts, delivered
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoints', type=int, default=100)
+    parser.add_argument('--incidents', type=int, default=20, help='new incidents in the pushed cycle')
+    parser.add_argument('--delay', type=float, default=0.02, help='receiver time per POST')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8, 32])
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    sinks = [HTTPSink(delay=args.delay).start() for _ in range(args.endpoints)]
+    try:
+        print(f"🔌 {args.endpoints} endpoints, {args.incidents} incidents per push, "
+              f"{args.delay * 1000:.0f} ms per POST")
+        print(f"{'batch':>6} {'workers':>8} {'POSTs':>7} {'push ms':>9} {'incidents/s':>12}")
+        for batch_size in (1, args.incidents):
+            for workers in args.workers:
+                elapsed, posts, delivered = run(sinks, args, batch_size, workers)
+                print(f"{batch_size:>6} {workers:>8} {posts:>7} {elapsed * 1000:>9.0f} {delivered / elapsed:>12.0f}")
+    finally:
+        for sink in sinks:
+            sink.stop()
+
+
+if __name__ == "__main__":
+    main()
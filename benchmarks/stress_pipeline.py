@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Stress the scrape -> save -> render -> send pipeline at increasing volume
+
+Synthetic TranStar pages from fixtures.PageGenerator are replayed on
+localhost at 1x to 100x today's ~50 rows, with a churn fraction of rows
+replaced every cycle. New incidents are matched against synthetic
+subscribers and sent to a local SMTP sink. Each level reports per-stage
+time and flags where the pipeline stops fitting in the scrape interval or
+trips the hourly alert limit.
+
+    python benchmarks/stress_pipeline.py [--cycles N] [--subscribers N] [--churn F] [--smtp-delay S]
+"""
+
+import sys
+import os
+import argparse
+import logging
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from email_service import EmailService
+from fixtures import PageGenerator, ReplayServer
+from metrics import SCRAPE_STAGE_SECONDS
+from models import Database, Subscriber
+from scraper import TranStarScraper
+from smtp_sink import SMTPSink
+
+# Rows per table at 1x; four tables make roughly today's 50-row page
+BASE_ROWS_PER_TABLE = 12
+LEVELS = (1, 10, 25, 50, 100)
+STAGES = ('fetch', 'parse', 'classify', 'dedup', 'save', 'render', 'send')
+
+
+def stage_sums():
+    return {stage: SCRAPE_STAGE_SECONDS.sum(stage=stage) for stage in STAGES}
+
+
+def run_level(multiplier, args):
+    """Run the cycles for one volume level and return its report row"""
+    generator = PageGenerator(seed=multiplier, rows_per_table=BASE_ROWS_PER_TABLE * multiplier, churn=args.churn)
+
+    with tempfile.TemporaryDirectory() as tmp, ReplayServer([generator.page()]) as server, \
+            SMTPSink(delay=args.smtp_delay) as sink:
+        db = Database(os.path.join(tmp, 'stress.db'))
+        for n in range(args.subscribers):
+            Subscriber.add(db, f"driver{n}@example.com")
+
+        scraper = TranStarScraper(db=db, base_url=server.base_url)
+        email_service = EmailService(db=db)
+        email_service.smtp_server, email_service.smtp_port = sink.host, sink.port
+        email_service.use_tls = False
+        email_service.username = email_service.password = email_service.from_email = 'stress@example.com'
+
+        before = stage_sums()
+        cycle_times, new_counts, failed_sends = [], [], 0
+        for _ in range(args.cycles):
+            start = time.perf_counter()
+            new_incidents = scraper.run_scrape_cycle()
+            if new_incidents and not email_service.send_alert(new_incidents):
+                failed_sends += 1
+            cycle_times.append(time.perf_counter() - start)
+            new_counts.append(len(new_incidents))
+
+            generator.advance()
+            server.pages = [generator.page()]
+        after = stage_sums()
+
+        return {
+            'multiplier': multiplier,
+            'rows': BASE_ROWS_PER_TABLE * multiplier * len(PageGenerator.LAYOUTS),
+            'cycle_ms': max(cycle_times) * 1000,
+            'new_per_cycle': sum(new_counts[1:]) / max(len(new_counts) - 1, 1),
+            'first_cycle_new': new_counts[0],
+            'stages_ms': {stage: (after[stage] - before[stage]) / args.cycles * 1000 for stage in STAGES},
+            'emails': len(sink.messages),
+            'recipients': sink.recipient_count,
+            'failed_sends': failed_sends,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cycles', type=int, default=5)
+    parser.add_argument('--subscribers', type=int, default=200)
+    parser.add_argument('--churn', type=float, default=0.2)
+    parser.add_argument('--smtp-delay', type=float, default=0.0, help='seconds per message at the sink')
+    parser.add_argument('--levels', default=','.join(str(level) for level in LEVELS))
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    # Measure throughput; the configured hourly limit is checked against the results instead
+    hourly_limit, Config.MAX_ALERTS_PER_HOUR = Config.MAX_ALERTS_PER_HOUR, 10 ** 9
+
+    print(f"🚛 {args.cycles} cycles per level, {args.subscribers} subscribers, churn {args.churn:.0%}\n")
+    print(f"{'level':>6} {'rows':>6} {'new/cyc':>8} {'worst ms':>9}  " + ' '.join(f"{s:>8}" for s in STAGES)
+          + f" {'emails':>7}")
+
+    for multiplier in (int(level) for level in args.levels.split(',')):
+        row = run_level(multiplier, args)
+        stages = row['stages_ms']
+        print(f"{str(multiplier) + 'x':>6} {row['rows']:>6} {row['new_per_cycle']:>8.0f} {row['cycle_ms']:>9.0f}  "
+              + ' '.join(f"{stages[stage]:>8.1f}" for stage in STAGES) + f" {row['emails']:>7}")
+
+        problems = []
+        if row['cycle_ms'] / 1000 > Config.SCRAPE_INTERVAL:
+            problems.append(f"worst cycle exceeds the {Config.SCRAPE_INTERVAL}s scrape interval")
+        alerts_per_hour = row['new_per_cycle'] * 3600 / Config.SCRAPE_INTERVAL + row['first_cycle_new']
+        if alerts_per_hour > hourly_limit:
+            problems.append(f"~{alerts_per_hour:.0f} alerts/hour would trip MAX_ALERTS_PER_HOUR={hourly_limit}")
+        if row['failed_sends']:
+            problems.append(f"{row['failed_sends']} alert sends failed")
+        slowest = max(stages, key=stages.get)
+        for problem in problems:
+            print(f"       ⚠️  {problem}")
+        if problems or multiplier == LEVELS[-1]:
+            print(f"       slowest stage: {slowest} ({stages[slowest]:.0f} ms/cycle)")
+
+
+if __name__ == "__main__":
+    main()
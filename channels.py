@@ -0,0 +1,306 @@
+import abc
+import hashlib
+import hmac
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from classification import incident_categories
+from config import Config
+from metrics import CHANNEL_SEND_SECONDS
+from models import AlertOutbox, Incident, WebhookSubscription, webhook_channel_name
+from subscriber_io import chunked
+from transport import CircuitBreaker, Transport
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_HEADERS = {
+    'User-Agent': 'HoustonTrafficMonitor/1.0',
+    'Content-Type': 'application/json',
+}
+SIGNATURE_HEADER = 'X-Signature-256'
+TIMESTAMP_HEADER = 'X-Signature-Timestamp'
+# Same value on every retry of a POST, so receivers can drop repeats
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+# Gateways bill longer texts as several segments
+SMS_MAX_LENGTH = 320
+
+
+def sign_payload(secret, timestamp, body):
+    """HMAC-SHA256 over '<timestamp>.<body>', as sent in X-Signature-256"""
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def verify_signature(secret, timestamp, body, signature, tolerance=300, now=None):
+    """Receiver-side check of a signed POST: constant-time compare, stale timestamps rejected"""
+    now = time.time() if now is None else now
+    try:
+        if abs(now - int(timestamp)) > tolerance:
+            return False
+    except (TypeError, ValueError):
+        return False
+    return hmac.compare_digest(sign_payload(secret, timestamp, body), signature or '')
+
+
+def idempotency_key(keys):
+    """One stable key for a POST from the outbox keys it delivers"""
+    return hashlib.sha256('\n'.join(sorted(keys)).encode()).hexdigest()[:32]
+
+
+def incident_payload(incident, incident_id):
+    """JSON-ready incident for webhook bodies"""
+    return {
+        'id': incident_id,
+        'location': incident.location,
+        'description': incident.description,
+        'incident_time': incident.incident_time,
+        'incident_ts': incident.incident_ts,
+        'severity': incident.severity,
+        'category': incident.category,
+        'is_hazmat': bool(incident.is_hazmat),
+        'corridor': incident.corridor,
+        'direction': incident.direction,
+        'cross_street': incident.cross_street,
+        'maps_link': incident.maps_link,
+    }
+
+
+def incident_line(incident):
+    """One-line summary used by the chat and SMS channels"""
+    marker = '🔴' if incident.severity >= 4 else '🟡' if incident.severity >= 3 else '🟢'
+    return f"{marker} {incident.category.upper()} {incident.location}: {incident.description} ({incident.incident_time})"
+
+
+class Channel(abc.ABC):
+    """A push destination for new incidents: one JSON POST per recipient per batch"""
+
+    kind = 'channel'
+
+    def __init__(self, name, url, recipients=('default',), min_severity=1, categories=None, corridors=None,
+                 batch_size=50, retries=None, backoff=0.5, timeout=None):
+        self.name = name
+        self.url = url
+        self.recipients = list(recipients)
+        self.min_severity = min_severity
+        self.categories = set(categories) if categories else None
+        self.corridors = set(corridors) if corridors else None
+        self.batch_size = batch_size
+        timeout = Config.CHANNEL_TIMEOUT if timeout is None else timeout
+        # Own pool, retries and breaker per channel, so one dead endpoint cannot stall the others
+        self.transport = Transport(connect_timeout=timeout, read_timeout=timeout,
+                                   retries=Config.CHANNEL_RETRIES if retries is None else retries,
+                                   backoff=backoff, pool_maxsize=Config.CHANNEL_WORKERS,
+                                   breaker=CircuitBreaker(name=name), headers=CHANNEL_HEADERS)
+
+    def accepts(self, incident):
+        """Severity, category and corridor filter (no categories or corridors matches any)"""
+        return (incident.severity >= self.min_severity
+                and (self.categories is None or not self.categories.isdisjoint(incident_categories(incident)))
+                and (self.corridors is None or incident.corridor in self.corridors))
+
+    @abc.abstractmethod
+    def body(self, recipient, incidents):
+        """JSON-serializable payload carrying (incident, incident_id) pairs to one recipient"""
+
+    def headers(self, body, key):
+        return {IDEMPOTENCY_HEADER: key}
+
+    def send(self, recipient, incidents, key, budget=None):
+        """POST one batch of (incident, incident_id) pairs; raises if the endpoint never accepts it"""
+        body = json.dumps(self.body(recipient, incidents)).encode()
+        response = self.transport.post(self.url, budget, data=body, headers=self.headers(body, key))
+        response.raise_for_status()
+
+
+class WebhookChannel(Channel):
+    """Signed JSON POST of the full incident records"""
+
+    kind = 'webhook'
+
+    def __init__(self, name, url, secret=None, **kwargs):
+        super().__init__(name, url, **kwargs)
+        self.secret = secret
+
+    def body(self, recipient, incidents):
+        return {'event': 'incidents.new', 'channel': self.name,
+                'incidents': [incident_payload(incident, incident_id) for incident, incident_id in incidents]}
+
+    def headers(self, body, key):
+        headers = super().headers(body, key)
+        if self.secret:
+            timestamp = str(int(time.time()))
+            headers[TIMESTAMP_HEADER] = timestamp
+            headers[SIGNATURE_HEADER] = sign_payload(self.secret, timestamp, body)
+        return headers
+
+
+class ChatChannel(Channel):
+    """Slack-compatible incoming webhook: a single text message"""
+
+    kind = 'chat'
+
+    def body(self, recipient, incidents):
+        lines = [f"🚛 *{len(incidents)} new truck incident{'s' if len(incidents) != 1 else ''}*"]
+        lines.extend(f"• {incident_line(incident)} <{incident.maps_link}|map>" for incident, _ in incidents)
+        return {'text': '\n'.join(lines)}
+
+
+class SmsChannel(Channel):
+    """SMS gateway HTTP API: one short text per phone number, high severity only by default"""
+
+    kind = 'sms'
+
+    def __init__(self, name, url, numbers, token=None, **kwargs):
+        kwargs.setdefault('min_severity', Config.PRIORITY_SEVERITY)
+        super().__init__(name, url, recipients=numbers, **kwargs)
+        self.token = token
+
+    def body(self, recipient, incidents):
+        text = '\n'.join(incident_line(incident) for incident, _ in incidents)
+        if len(text) > SMS_MAX_LENGTH:
+            text = text[:SMS_MAX_LENGTH - 1] + '…'
+        return {'to': recipient, 'message': text}
+
+    def headers(self, body, key):
+        headers = super().headers(body, key)
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        return headers
+
+
+def build_channels():
+    """Channels configured through the environment"""
+    channels = []
+    if Config.WEBHOOK_URL:
+        channels.append(WebhookChannel('webhook', Config.WEBHOOK_URL, secret=Config.WEBHOOK_SECRET))
+    if Config.CHAT_WEBHOOK_URL:
+        channels.append(ChatChannel('chat', Config.CHAT_WEBHOOK_URL))
+    if Config.SMS_GATEWAY_URL and Config.SMS_RECIPIENTS:
+        channels.append(SmsChannel('sms', Config.SMS_GATEWAY_URL, Config.SMS_RECIPIENTS,
+                                   token=Config.SMS_GATEWAY_TOKEN, min_severity=Config.SMS_MIN_SEVERITY))
+    return channels
+
+
+def _split(value):
+    """Comma separated filter column as a list (None for empty)"""
+    return [item for item in (value or '').split(',') if item] or None
+
+
+def subscription_channel(row):
+    """Signed webhook channel for a webhook_subscriptions row"""
+    return WebhookChannel(webhook_channel_name(row['id']), row['url'], secret=row['secret'],
+                          min_severity=row['min_severity'] or 1, categories=_split(row['categories']),
+                          corridors=_split(row['corridors']), batch_size=Config.WEBHOOK_BATCH_SIZE)
+
+
+class ChannelDispatcher:
+    """Fans new incidents out to every channel through a bounded worker pool, exactly once via the outbox
+
+    Besides the channels it is given, it pushes to every active webhook
+    subscription, reloading them whenever the admin UI or API changes one.
+    """
+
+    def __init__(self, db, channels, workers=None, backoff=None, max_backoff=None, max_attempts=None):
+        self.db = db
+        self.static_channels = list(channels)
+        self.channels = list(channels)
+        self.backoff = Config.CHANNEL_RETRY_BACKOFF if backoff is None else backoff
+        self.max_backoff = Config.CHANNEL_RETRY_MAX_BACKOFF if max_backoff is None else max_backoff
+        self.max_attempts = Config.CHANNEL_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self._subscriptions = {}
+        self._subscriptions_version = None
+        self._executor = ThreadPoolExecutor(max_workers=workers or Config.CHANNEL_WORKERS,
+                                            thread_name_prefix='channel')
+
+    def refresh(self):
+        """Rebuild webhook subscription channels if they changed; unchanged ones keep their warm pools"""
+        version = WebhookSubscription.get_version(self.db)
+        if version == self._subscriptions_version:
+            return self.channels
+
+        subscriptions = {}
+        for row in WebhookSubscription.get_all(self.db, active_only=True):
+            spec = (row['url'], row['secret'], row['min_severity'], row['categories'], row['corridors'])
+            known = self._subscriptions.get(row['id'])
+            subscriptions[row['id']] = known if known and known[0] == spec else (spec, subscription_channel(row))
+        for subscription_id in self._subscriptions.keys() - subscriptions.keys():
+            self._subscriptions[subscription_id][1].transport.session.close()
+
+        self._subscriptions = subscriptions
+        self._subscriptions_version = version
+        self.channels = self.static_channels + [channel for _, channel in subscriptions.values()]
+        return self.channels
+
+    def push(self, incidents, deadline=None):
+        """Queue incidents for every channel, then send all that is due; returns {channel: all sent}"""
+        channels = self.refresh()
+        if not channels:
+            return {}
+        known = {incident_id: (incident, incident_id) for incident, incident_id in incidents}
+        budget = deadline.budget('send') if deadline else None
+
+        # One transaction and one query for all channels, however many webhooks are subscribed
+        plans = {}
+        for channel in channels:
+            matching = [pair for pair in incidents if channel.accepts(pair[0])]
+            if matching:
+                plans[channel.name] = {(recipient, channel.kind): matching for recipient in channel.recipients}
+        AlertOutbox.enqueue_channels(self.db, plans)
+
+        # Earlier failures whose backoff is over are still pending and go out with this push
+        rows = AlertOutbox.pending_for_channels(self.db, [channel.name for channel in channels])
+        missing = {row['incident_id'] for row in rows} - known.keys()
+        for row in Incident.get_many(self.db, missing):
+            known[row['id']] = (Incident.from_row(row), row['id'])
+
+        by_channel = {}
+        for row in rows:
+            if row['incident_id'] in known:
+                by_recipient = by_channel.setdefault(row['channel'], {})
+                by_recipient.setdefault(row['email'], []).append((known[row['incident_id']], row['idempotency_key']))
+
+        # Claim and settle in bulk: per-POST write transactions serialize on the SQLite lock
+        claimed = AlertOutbox.claim(self.db, [row['idempotency_key'] for row in rows if row['incident_id'] in known])
+        futures = {}
+        for channel in channels:
+            for recipient, items in by_channel.get(channel.name, {}).items():
+                items = [(pair, key) for pair, key in items if key in claimed]
+                for batch in chunked(items, channel.batch_size):
+                    future = self._executor.submit(self._send, channel, recipient, batch, budget)
+                    futures[future] = channel.name
+
+        done, late = wait(futures, timeout=budget)
+        self._settle([future.result() for future in done])
+        for future in late:
+            # Still sending when the cycle moves on; settle each on its own when it finishes
+            future.add_done_callback(lambda future: self._settle([future.result()]))
+
+        results = {}
+        for future, name in futures.items():
+            results[name] = results.get(name, True) and future in done and future.result()[2] is None
+        return results
+
+    def _send(self, channel, recipient, items, budget):
+        """POST one claimed batch; returns (channel, keys, error or None)"""
+        keys = [key for _, key in items]
+        start = time.perf_counter()
+        try:
+            channel.send(recipient, [pair for pair, _ in items], idempotency_key(keys), budget)
+        except Exception as e:
+            CHANNEL_SEND_SECONDS.observe(time.perf_counter() - start, channel=channel.name, outcome='error')
+            logger.warning(f"📡 {channel.name} push to {recipient} failed: {e}")
+            return channel, keys, str(e)
+        CHANNEL_SEND_SECONDS.observe(time.perf_counter() - start, channel=channel.name, outcome='ok')
+        return channel, keys, None
+
+    def _settle(self, outcomes):
+        """Mark sent batches sent; failed ones back off before a later push, then dead-letter"""
+        AlertOutbox.complete(self.db, [key for _, keys, error in outcomes if error is None for key in keys])
+        for channel, keys, error in outcomes:
+            if error is None:
+                continue
+            dead = AlertOutbox.release(self.db, keys, error, self.max_attempts, self.backoff, self.max_backoff)
+            if dead:
+                logger.error(f"🪦 {channel.name}: {dead} deliveries dead-lettered after {self.max_attempts} attempts")
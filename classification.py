@@ -0,0 +1,115 @@
+import re
+from collections import namedtuple
+from corridors import parse_location
+
+# Incident categories, in priority order (first match wins for the primary category)
+CATEGORIES = ('hazmat', 'spill', 'wreck', 'stall', 'other')
+
+Classification = namedtuple('Classification', [
+    'category', 'is_wreck', 'is_stall', 'is_spill', 'is_hazmat',
+    'involves_truck', 'corridor', 'direction', 'cross_street', 'table_type', 'severity'
+])
+
+# Heavy truck keywords and patterns
+TRUCK_KEYWORDS = (
+    'heavy truck', 'semi', 'semi-truck', 'semi truck',
+    '18-wheeler', '18 wheeler', 'eighteen wheeler',
+    'tractor-trailer', 'tractor trailer', 'big rig',
+    'commercial vehicle', 'freight truck', 'cargo truck',
+    'delivery truck', 'box truck', 'flatbed truck',
+    'lost load', 'lost cargo'
+)
+
+TRUCK_PATTERN = re.compile('|'.join([
+    r'\b(?:18|eighteen)[\s-]*wheel\w*\b',
+    r'\btruck\s+(?:accident|crash|stall|breakdown|rollover)\b',
+    r'\b(?:accident|crash)\s+.*\btruck\b',
+    r'\bcommercial\s+vehicle\s+(?:accident|crash|stall)\b',
+    r'\bheavy\s+truck\b',
+    r'\blost\s+load\b',
+]))
+
+# Spill keywords (any vehicle type)
+SPILL_KEYWORDS = (
+    'hazmat', 'hazardous material', 'chemical spill',
+    'fuel spill', 'oil spill', 'cargo spill',
+    'debris spill', 'spill', 'leak', 'leaking'
+)
+
+HAZMAT_KEYWORDS = ('hazmat', 'hazardous material', 'chemical')
+WRECK_KEYWORDS = ('accident', 'crash', 'collision', 'wreck', 'rollover', 'jackknife')
+STALL_KEYWORDS = ('stall', 'breakdown')
+
+def score_severity(text_lower):
+    """Calculate incident severity (1-5, higher = more urgent)"""
+    severity = 1
+
+    # Spill incidents are highest priority
+    if any(keyword in text_lower for keyword in ('hazmat', 'chemical', 'spill')):
+        severity += 3
+
+    # Accident severity
+    if any(keyword in text_lower for keyword in ('accident', 'crash', 'collision')):
+        severity += 2
+    elif any(keyword in text_lower for keyword in ('rollover', 'jackknife')):
+        severity += 3
+
+    # Heavy truck incidents get higher priority
+    if 'heavy truck' in text_lower:
+        severity += 1
+
+    # Multiple vehicles
+    if any(keyword in text_lower for keyword in ('multiple', 'multi-vehicle', 'pile-up')):
+        severity += 1
+
+    # Lane blockages
+    if any(keyword in text_lower for keyword in ('blocked', 'blocking', 'closed')):
+        severity += 1
+
+    return min(severity, 5)  # Cap at 5
+
+
+def incident_categories(incident):
+    """Every category an incident's flags put it in, primary first (a wreck can also be a spill)"""
+    flags = (('hazmat', incident.is_hazmat), ('spill', incident.is_spill),
+             ('wreck', incident.is_wreck), ('stall', incident.is_stall))
+    return tuple(category for category, flag in flags if flag) or (incident.category,)
+
+
+def classify_incident(location, description='', table_type='unknown'):
+    """Classify an incident once so the result can be stored with it"""
+    location = location or ''
+    location_info = parse_location(location)
+    text_lower = f"{location} {description or ''}".lower()
+
+    is_hazmat = any(keyword in text_lower for keyword in HAZMAT_KEYWORDS)
+    is_spill = 'spill' in text_lower or 'leak' in text_lower
+    is_wreck = any(keyword in text_lower for keyword in WRECK_KEYWORDS)
+    is_stall = any(keyword in text_lower for keyword in STALL_KEYWORDS)
+    involves_truck = (any(keyword in text_lower for keyword in TRUCK_KEYWORDS)
+                      or TRUCK_PATTERN.search(text_lower) is not None)
+
+    if is_hazmat:
+        category = 'hazmat'
+    elif is_spill:
+        category = 'spill'
+    elif is_wreck:
+        category = 'wreck'
+    elif is_stall:
+        category = 'stall'
+    else:
+        category = 'other'
+
+    return Classification(
+        category=category,
+        is_wreck=is_wreck,
+        is_stall=is_stall,
+        is_spill=is_spill,
+        is_hazmat=is_hazmat,
+        involves_truck=involves_truck,
+        corridor=location_info.corridor,
+        direction=location_info.direction,
+        cross_street=location_info.cross_street,
+        table_type=table_type or 'unknown',
+        severity=score_severity(text_lower),
+    )
@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from config import Config
+from delivery import ALERT_SENT, ALERT_RETRY
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# The hourly send budget is a sliding window of this many seconds
+BUDGET_PERIOD = 3600
+
+DIGESTS_HELD = REGISTRY.counter('alert_digests_held_total', 'Digest flushes held back by the hourly budget')
+
+
+class AlertCoalescer:
+    """Buffers new incidents into one digest per window, queueing past the hourly budget instead of dropping"""
+
+    def __init__(self, email_service, window=None, flush_severity=None, max_per_hour=None, max_attempts=None,
+                 clock=time.monotonic):
+        self.email_service = email_service
+        self.window = Config.ALERT_COALESCE_WINDOW if window is None else window
+        self.flush_severity = Config.ALERT_FLUSH_SEVERITY if flush_severity is None else flush_severity
+        self.max_per_hour = Config.MAX_ALERTS_PER_HOUR if max_per_hour is None else max_per_hour
+        # Failed flushes in a row before the buffer is handed back to the outbox
+        self.max_attempts = Config.OUTBOX_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.clock = clock
+        # (incident, incident_id) pairs waiting for the next digest, in arrival order
+        self._pending = []
+        self._pending_ids = set()
+        # Clock time the current window opened, and whether it holds a high-severity incident
+        self._opened = None
+        self._urgent = False
+        # Clock times of digests sent within the budget period
+        self._sent = deque()
+        self._failures = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, incidents):
+        """Buffer new incidents; the first one opens a window and high severity makes it due now"""
+        with self._lock:
+            for incident, incident_id in incidents:
+                if incident_id in self._pending_ids:
+                    continue
+                self._pending.append((incident, incident_id))
+                self._pending_ids.add(incident_id)
+                if self._opened is None:
+                    self._opened = self.clock()
+                if incident.severity >= self.flush_severity:
+                    self._urgent = True
+
+    def budget_left(self):
+        """Digests that may still go out in the current budget period"""
+        cutoff = self.clock() - BUDGET_PERIOD
+        while self._sent and self._sent[0] <= cutoff:
+            self._sent.popleft()
+        return self.max_per_hour - len(self._sent)
+
+    def due(self):
+        """Whether the buffer should be sent: window elapsed or urgent, and budget to spend"""
+        if not self._pending:
+            return False
+        if not self._urgent and self.clock() - self._opened < self.window:
+            return False
+        return self.budget_left() > 0
+
+    def flush(self, deadline=None):
+        """Send the buffer as one digest if due; None when nothing went out, else whether it sent"""
+        with self._lock:
+            if not self.due():
+                if self._pending and self.budget_left() <= 0:
+                    DIGESTS_HELD.inc()
+                    logger.warning(f"⏳ Hourly alert budget spent; {len(self._pending)} incidents queued for the next window")
+                return None
+            batch, self._pending, self._pending_ids = self._pending, [], set()
+            self._opened, self._urgent = None, False
+
+        # Bulk deliveries finish after this returns; any they leave undelivered come back through add
+        outcome = self.email_service.deliver_alert(batch, deadline, rate_limit=False, requeue=self.add)
+        with self._lock:
+            if outcome == ALERT_SENT:
+                self._sent.append(self.clock())
+                self._failures = 0
+                return True
+            
+            self._failures += 1
+            if outcome == ALERT_RETRY and self._failures < self.max_attempts:
+                # Put the batch back in front of anything that arrived meanwhile and retry next window
+                ids = {incident_id for _, incident_id in batch}
+                self._pending = batch + [item for item in self._pending if item[1] not in ids]
+                self._pending_ids |= ids
+                self._opened = self.clock()
+            else:
+                # Their deliveries stay pending in the outbox for startup recovery or an admin retry
+                logger.error(f"📭 Gave up on a digest of {len(batch)} incidents after {self._failures} "
+                             f"failed attempt(s); left in the outbox")
+                self._failures = 0
+        return False
+
+    def offer(self, incidents, deadline=None):
+        """Buffer new incidents and send the digest if that makes it due"""
+        self.add(incidents)
+        return self.flush(deadline)
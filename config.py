@@ -5,6 +5,8 @@ load_dotenv()
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
+    # Bearer token a Prometheus scraper sends for /metrics (otherwise it needs an admin login)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
     
     # Use /tmp directory for database in production (Render)
     if os.environ.get('RENDER'):
@@ -14,18 +16,66 @@ class Config:
         DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database.db')
     
     # Email configuration
-    EMAIL_HOST = 'smtp.gmail.com'
-    EMAIL_PORT = 587
+    EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
+    EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
+    # Disable STARTTLS only for local relays such as smtp_sink.py
+    EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'true').lower() == 'true'
     EMAIL_USERNAME = os.environ.get('EMAIL_USERNAME')
     EMAIL_PASSWORD = os.environ.get('EMAIL_PASSWORD')
     EMAIL_FROM = os.environ.get('EMAIL_FROM') or os.environ.get('EMAIL_USERNAME')
     
     # Scraping configuration
     SCRAPE_INTERVAL = int(os.environ.get('SCRAPE_INTERVAL', 60))  # seconds
+    CYCLE_DEADLINE = int(os.environ.get('CYCLE_DEADLINE', 45))  # seconds per scrape + alert cycle
     TRANSTAR_URL = 'https://traffic.houstontranstar.org/roadclosures/#all'
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 5))  # seconds
+    HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 15))  # seconds
+    HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', 2))
+    # 'sync' scrapes then alerts; 'async' streams incidents from parse to SMTP (async_pipeline.py)
+    PIPELINE_MODE = os.environ.get('PIPELINE_MODE', 'sync').lower()
+    # Worker processes for HTML parse+classify; 0 keeps it on the scrape thread
+    PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', 0))
+    
+    # Admin listings show this many subscribers per page
+    SUBSCRIBER_PAGE_SIZE = int(os.environ.get('SUBSCRIBER_PAGE_SIZE', 50))
     
     # Alert configuration
     MAX_ALERTS_PER_HOUR = int(os.environ.get('MAX_ALERTS_PER_HOUR', 20))
+    # New incidents are held this many seconds and sent as one digest (coalescer.py); 0 sends every cycle
+    ALERT_COALESCE_WINDOW = int(os.environ.get('ALERT_COALESCE_WINDOW', 300))
+    # Hazmat and incidents at or above this severity go through the priority delivery lane
+    PRIORITY_SEVERITY = int(os.environ.get('PRIORITY_SEVERITY', 4))
+    # An incident at or above this severity sends the pending digest straight away
+    ALERT_FLUSH_SEVERITY = int(os.environ.get('ALERT_FLUSH_SEVERITY', PRIORITY_SEVERITY))
+    # SMTP connections and messages per minute (0 = unlimited) for each delivery lane (delivery.py)
+    PRIORITY_LANE_WORKERS = int(os.environ.get('PRIORITY_LANE_WORKERS', 2))
+    PRIORITY_LANE_PER_MINUTE = int(os.environ.get('PRIORITY_LANE_PER_MINUTE', 0))
+    BULK_LANE_WORKERS = int(os.environ.get('BULK_LANE_WORKERS', 1))
+    BULK_LANE_PER_MINUTE = int(os.environ.get('BULK_LANE_PER_MINUTE', 0))
+    # A delivery the relay keeps rejecting is marked failed after this many attempts
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 5))
+    # At startup, incidents saved this recently without a completed alert are sent again from the outbox
+    OUTBOX_RECOVERY_HOURS = int(os.environ.get('OUTBOX_RECOVERY_HOURS', 2))
+    
+    # Push channels beside email (channels.py); each is enabled by setting its URL
+    WEBHOOK_URL = os.environ.get('WEBHOOK_URL')
+    WEBHOOK_SECRET = os.environ.get('WEBHOOK_SECRET')
+    CHAT_WEBHOOK_URL = os.environ.get('CHAT_WEBHOOK_URL')
+    SMS_GATEWAY_URL = os.environ.get('SMS_GATEWAY_URL')
+    SMS_GATEWAY_TOKEN = os.environ.get('SMS_GATEWAY_TOKEN')
+    SMS_RECIPIENTS = [number.strip() for number in os.environ.get('SMS_RECIPIENTS', '').split(',') if number.strip()]
+    SMS_MIN_SEVERITY = int(os.environ.get('SMS_MIN_SEVERITY', PRIORITY_SEVERITY))
+    # Concurrent channel POSTs, retries per POST and per-attempt timeout in seconds
+    CHANNEL_WORKERS = int(os.environ.get('CHANNEL_WORKERS', 8))
+    CHANNEL_RETRIES = int(os.environ.get('CHANNEL_RETRIES', 2))
+    CHANNEL_TIMEOUT = float(os.environ.get('CHANNEL_TIMEOUT', 5))
+    # A channel POST that still fails is retried on later pushes after 30 s, 60 s, 120 s... (capped),
+    # then dead-lettered as failed after this many attempts
+    CHANNEL_RETRY_BACKOFF = float(os.environ.get('CHANNEL_RETRY_BACKOFF', 30))
+    CHANNEL_RETRY_MAX_BACKOFF = float(os.environ.get('CHANNEL_RETRY_MAX_BACKOFF', 1800))
+    CHANNEL_MAX_ATTEMPTS = int(os.environ.get('CHANNEL_MAX_ATTEMPTS', 8))
+    # Incidents per POST to webhook subscriptions managed in the admin UI
+    WEBHOOK_BATCH_SIZE = int(os.environ.get('WEBHOOK_BATCH_SIZE', 50))
     
     # Admin configuration
     DEFAULT_ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME', 'admin')
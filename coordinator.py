@@ -0,0 +1,124 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# Longest share of the cycle deadline each stage may use (caps, so they need not sum to 1)
+STAGE_BUDGETS = {
+    'fetch': 0.5,
+    'parse': 0.25,
+    'send': 0.5,
+}
+
+
+class Deadline:
+    """Total time budget for one cycle, handed out to stages as they start"""
+
+    def __init__(self, total, shares=STAGE_BUDGETS):
+        self.total = total
+        self.shares = shares
+        self.started = time.monotonic()
+
+    def remaining(self):
+        return max(0.0, self.total - (time.monotonic() - self.started))
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def budget(self, stage):
+        """Seconds the stage may use: its share of the total, bounded by what is left"""
+        return min(self.remaining(), self.total * self.shares.get(stage, 1.0))
+
+
+class CycleJob:
+    """One scrape cycle run through the coordinator"""
+
+    def __init__(self, source):
+        self.id = uuid.uuid4().hex[:12]
+        self.source = source
+        self.status = 'running'
+        self.started_at = time.time()
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        # Triggers that arrived while this cycle was in flight
+        self.joined = []
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'source': self.source,
+            'status': self.status,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'result': self.result,
+            'error': self.error,
+            'joined': list(self.joined),
+        }
+
+
+class CycleCoordinator:
+    """Single-flight cycle runner: a trigger during a running cycle joins it instead of starting another"""
+
+    def __init__(self, run_cycle, deadline_seconds, history=50):
+        self.run_cycle = run_cycle
+        self.deadline_seconds = deadline_seconds
+        self.history = history
+        self._lock = threading.Lock()
+        self._current = None
+        self._jobs = OrderedDict()
+
+    def _claim(self, source):
+        """Return (job, owner); owner is False when joining the in-flight cycle"""
+        with self._lock:
+            if self._current is not None:
+                self._current.joined.append(source)
+                return self._current, False
+
+            job = CycleJob(source)
+            self._current = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.history:
+                self._jobs.popitem(last=False)
+            return job, True
+
+    def _execute(self, job):
+        try:
+            job.result = self.run_cycle(job, Deadline(self.deadline_seconds))
+            job.status = 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if self._current is job:
+                    self._current = None
+            job._done.set()
+
+    def run(self, source):
+        """Run a cycle in the calling thread, or wait for the one already running"""
+        job, owner = self._claim(source)
+        if owner:
+            self._execute(job)
+        else:
+            job.wait()
+        return job
+
+    def submit(self, source):
+        """Start a cycle in the background (or join the running one) and return its job immediately"""
+        job, owner = self._claim(source)
+        if owner:
+            threading.Thread(target=self._execute, args=(job,), name=f'cycle-{job.id}', daemon=True).start()
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    @property
+    def current(self):
+        return self._current
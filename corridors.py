@@ -0,0 +1,137 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Houston freeway, toll road and loop gazetteer: canonical name -> (kind, aliases)
+CORRIDORS = {
+    'IH-10': ('freeway', ['IH-10', 'I-10', 'Interstate 10', 'Katy Freeway', 'Katy Fwy',
+                          'East Freeway', 'East Fwy', 'Baytown East Fwy']),
+    'IH-45': ('freeway', ['IH-45', 'I-45', 'Interstate 45', 'North Freeway', 'North Fwy',
+                          'Gulf Freeway', 'Gulf Fwy']),
+    'IH-69': ('freeway', ['IH-69', 'I-69', 'Interstate 69', 'US-59', 'Eastex Freeway', 'Eastex Fwy',
+                          'Eastex', 'Southwest Freeway', 'Southwest Fwy']),
+    'IH-610': ('loop', ['IH-610', 'I-610', 'Loop 610', '610 Loop', 'North Loop', 'South Loop',
+                        'East Loop', 'West Loop']),
+    'Beltway 8': ('beltway', ['Beltway 8', 'BW-8', 'Sam Houston Tollway', 'Sam Houston Toll',
+                              'Sam Houston Parkway', 'Sam Houston Pkwy']),
+    'US-290': ('freeway', ['US-290', 'Hwy 290', 'Highway 290', 'Northwest Freeway', 'Northwest Fwy']),
+    'US-90': ('freeway', ['US-90', 'Crosby Freeway', 'Crosby Fwy']),
+    'US-90A': ('freeway', ['US-90A', 'Alt-90', 'Alternate 90']),
+    'SH-288': ('freeway', ['SH-288', 'Hwy 288', 'Highway 288', 'South Freeway', 'South Fwy']),
+    'SH-225': ('freeway', ['SH-225', 'Hwy 225', 'Highway 225', 'Pasadena Freeway', 'Pasadena Fwy',
+                           'La Porte Freeway', 'La Porte Fwy']),
+    'SH-249': ('freeway', ['SH-249', 'Hwy 249', 'Highway 249', 'Tomball Parkway', 'Tomball Pkwy',
+                           'Tomball Tollway']),
+    'SH-146': ('freeway', ['SH-146', 'Hwy 146', 'Highway 146']),
+    'SH-6': ('freeway', ['SH-6', 'Hwy 6', 'Highway 6']),
+    'SH-99': ('toll', ['SH-99', 'Grand Parkway', 'Grand Pkwy']),
+    'Hardy Toll Road': ('toll', ['Hardy Toll Road', 'Hardy Tollway', 'Hardy Toll']),
+    'Westpark Tollway': ('toll', ['Westpark Tollway', 'Westpark Toll']),
+    'Fort Bend Tollway': ('toll', ['Fort Bend Tollway', 'Fort Bend Toll', 'Fort Bend Parkway']),
+    'Spur 527': ('freeway', ['Spur 527']),
+}
+
+LocationInfo = namedtuple('LocationInfo', ['clean', 'corridor', 'direction', 'cross_street'])
+
+
+def alias_key(text):
+    """Normalize an alias or matched text to a lookup key"""
+    return re.sub(r'[^a-z0-9]', '', text.lower())
+
+
+def _alias_pattern(alias):
+    """Turn an alias into a regex tolerant of spacing and hyphen variants"""
+    parts = re.split(r'[\s-]+', alias)
+    return r'[\s-]*'.join(re.escape(part) for part in parts)
+
+
+# Alias key -> canonical corridor
+ALIAS_INDEX = {}
+for _canonical, (_kind, _aliases) in CORRIDORS.items():
+    for _alias in _aliases:
+        ALIAS_INDEX[alias_key(_alias)] = _canonical
+
+# Longest aliases first so "Sam Houston Tollway" wins over "Sam Houston Toll"
+_ALIASES = sorted({alias for _, aliases in CORRIDORS.values() for alias in aliases}, key=len, reverse=True)
+
+_CORRIDOR_ALTERNATION = '|'.join(_alias_pattern(alias) for alias in _ALIASES)
+
+# One tokenizer for corridor names, directions and connector words
+LOCATION_TOKENIZER = re.compile(
+    r'\b(?:'
+    r'(?P<corridor>(?i:' + _CORRIDOR_ALTERNATION + r'))'
+    r'|(?P<bound>North|South|East|West)bound'
+    r'|(?P<abbrev>(?i:[NSEW]B))'
+    r'|(?P<connector>(?i:after|before|at|near))'
+    r'|I-(?P<interstate>\d+)'
+    r')\b'
+)
+
+CORRIDOR_PATTERN = re.compile(r'\b(?:' + _CORRIDOR_ALTERNATION + r')\b', re.IGNORECASE)
+
+INTERSTATE_PREFIX = re.compile(r'^I-(\d+)')
+
+# Numbered routes not in the gazetteer (FM roads, other state highways)
+ROUTE_FALLBACK = re.compile(r'\b(IH|US|SH|FM)[\s-]?(\d+[A-Z]?)\b', re.IGNORECASE)
+
+# Generic major road forms used to tell freeway incidents from street incidents
+MAJOR_ROAD_PATTERN = re.compile(
+    r'\bih?-\d+\b|\binterstate\s+\d+\b|\bus-?\d+\b|\bus\s+highway\s+\d+\b'
+    r'|\bhighway\s+\d+\b|\bhwy\s+\d+\b|\bstate\s+highway\s+\d+\b'
+    r'|\bloop\s+\d+\b|\btoll\s+road\b|\btollway\b|\b\w+\s+(?:freeway|fwy)\b',
+    re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=4096)
+def parse_location(raw):
+    """Map a raw TranStar location to clean text, corridor, direction and cross street"""
+    if not raw:
+        return LocationInfo(None, None, None, None)
+
+    raw = raw.strip()
+    corridors = []
+    direction = None
+
+    def replace(match):
+        nonlocal direction
+        if match.group('corridor'):
+            corridors.append(ALIAS_INDEX.get(alias_key(match.group('corridor'))))
+            return INTERSTATE_PREFIX.sub(r'IH-\1', match.group(0))
+        if match.group('bound'):
+            direction = direction or match.group('bound')[0] + 'B'
+            return match.group('bound')[0] + 'B'
+        if match.group('abbrev'):
+            direction = direction or match.group('abbrev').upper()
+            return match.group(0)
+        if match.group('connector'):
+            return '@'
+        return f"IH-{match.group('interstate')}"
+
+    clean = LOCATION_TOKENIZER.sub(replace, raw)
+
+    # Routes outside the gazetteer fall back to their numbered name
+    corridor = corridors[0] if corridors else None
+    route_match = CORRIDOR_PATTERN.search(clean) or ROUTE_FALLBACK.search(clean)
+    if corridor is None and route_match and route_match.re is ROUTE_FALLBACK:
+        corridor = f"{route_match.group(1).upper()}-{route_match.group(2)}"
+
+    # Cross street is the side of the "@" that does not hold the corridor
+    cross_street = None
+    at_index = clean.find('@')
+    if at_index >= 0:
+        if route_match and route_match.start() > at_index:
+            cross_street = clean[:at_index]
+        else:
+            cross_street = clean[at_index + 1:]
+        cross_street = cross_street.strip(' ,-') or None
+
+    return LocationInfo(clean, corridor, direction, cross_street)
+
+
+@lru_cache(maxsize=4096)
+def is_major_road(text):
+    """Check whether text names a freeway, toll road, loop or highway"""
+    if not text:
+        return False
+    return CORRIDOR_PATTERN.search(text) is not None or MAJOR_ROAD_PATTERN.search(text) is not None
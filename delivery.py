@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+from metrics import REGISTRY
+
+# Hazmat and high-severity alerts never queue behind the bulk lane's digests
+PRIORITY = 'priority'
+BULK = 'bulk'
+LANES = (PRIORITY, BULK)
+
+# Outcomes of sending an alert: delivered (or nothing owed), worth retrying as is, or not
+ALERT_SENT = 'sent'
+ALERT_RETRY = 'retry'
+ALERT_FAILED = 'failed'
+
+# keys maps each recipient to the outbox idempotency keys the message delivers to them
+AlertMessage = namedtuple('AlertMessage', ['subject', 'html', 'text', 'recipients', 'keys'])
+
+DELIVERY_SECONDS = REGISTRY.histogram(
+    'alert_delivery_seconds', 'Time from queueing an alert email to the relay accepting it', ['lane'])
+
+
+def lane_for(template, incidents):
+    """Lane for one rendered message: hazmat or any high-severity incident goes priority"""
+    if template == 'hazmat' or any(incident.severity >= Config.PRIORITY_SEVERITY for incident, _ in incidents):
+        return PRIORITY
+    return BULK
+
+
+class RateLimiter:
+    """Spaces sends evenly so a lane stays within its messages-per-minute limit (0 means unlimited)"""
+
+    def __init__(self, per_minute, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self.clock = clock
+        self.sleep = sleep
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until this caller's send slot comes round"""
+        if not self.interval:
+            return
+        with self._lock:
+            now = self.clock()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            self.sleep(slot - now)
+
+
+class DeliveryLane:
+    """Worker pool with its own SMTP connections and send rate for one class of alert email"""
+
+    def __init__(self, name, email_service, workers=1, per_minute=0):
+        self.name = name
+        self.email_service = email_service
+        self.workers = workers
+        self.limiter = RateLimiter(per_minute)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"mail-{name}")
+
+    def submit(self, messages, timeout):
+        """Spread AlertMessages over the lane's connections; returns futures"""
+        queued = time.perf_counter()
+        chunks = [messages[worker::self.workers] for worker in range(self.workers)]
+        return [self._executor.submit(self._send, chunk, timeout, queued) for chunk in chunks if chunk]
+
+    def _send(self, messages, timeout, queued):
+        with self.email_service.connect(timeout) as server:
+            for message in messages:
+                self.limiter.wait()
+                self.email_service.send_message(server, message)
+                DELIVERY_SECONDS.observe(time.perf_counter() - queued, lane=self.name)
+
+
+def build_lanes(email_service):
+    """Priority and bulk lanes sized from Config"""
+    return {
+        PRIORITY: DeliveryLane(PRIORITY, email_service, Config.PRIORITY_LANE_WORKERS, Config.PRIORITY_LANE_PER_MINUTE),
+        BULK: DeliveryLane(BULK, email_service, Config.BULK_LANE_WORKERS, Config.BULK_LANE_PER_MINUTE),
+    }
+
+
+def deliver(lanes, messages, timeout):
+    """Send (lane, message) pairs and wait for the priority lane only; re-raises its first failure
+    
+    Returns the bulk lane's futures: digests settle through the outbox without holding up the caller.
+    """
+    futures = {}
+    for name in LANES:
+        batch = [message for lane, message in messages if lane == name]
+        futures[name] = lanes[name].submit(batch, timeout) if batch else []
+    for future in futures[PRIORITY]:
+        future.result()
+    return futures[BULK]
@@ -7,21 +7,32 @@ from email import encoders
 from datetime import datetime, timedelta
 import pytz
 import logging
-import urllib.parse
 import csv
 import io
 import base64
 import os
-from models import Database, Subscriber, HazmatSubscriber, SentAlert, Incident
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from models import Database, SentAlert, Incident, SubscriberArea, SubscriptionRule, AlertOutbox, outbox_key
 from config import Config
+from geocode import maps_link as build_maps_link
+from geofence import GeofenceIndex, area_from_row
+from rules import RuleMatcher, group_plan
+from metrics import StageTimer, EMAILS_SENT, SMTP_ERRORS
+from delivery import AlertMessage, BULK, build_lanes, deliver, lane_for, ALERT_SENT, ALERT_RETRY, ALERT_FAILED
 
 logger = logging.getLogger(__name__)
 
+# SMTP socket timeouts in seconds (the floor applies when a cycle deadline is nearly spent)
+SMTP_TIMEOUT = 60
+MIN_SMTP_TIMEOUT = 10
+
 class EmailService:
-    def __init__(self):
-        self.db = Database()
+    def __init__(self, db=None):
+        self.db = db or Database()
         self.smtp_server = Config.EMAIL_HOST
         self.smtp_port = Config.EMAIL_PORT
+        self.use_tls = Config.EMAIL_USE_TLS
         self.username = Config.EMAIL_USERNAME
         self.password = Config.EMAIL_PASSWORD
         self.from_email = Config.EMAIL_FROM
@@ -29,6 +40,20 @@ class EmailService:
         self.central_tz = pytz.timezone('America/Chicago')
         # Load and encode logo image
         self.logo_base64 = self._load_logo()
+        # Subscriber areas of interest, rebuilt when they change
+        self._geofence = None
+        self._geofence_version = None
+        # Compiled subscription rules, rebuilt when rules or subscribers change
+        self._matcher = None
+        self._matcher_version = None
+        # Stage timings for the most recent alert
+        self.timer = StageTimer()
+        # Priority and bulk delivery lanes, each with its own SMTP connections and send rate
+        self.lanes = build_lanes(self)
+        # Waits out each alert's bulk lane messages and settles them, in the order they were queued
+        self._settler = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mail-settle")
+        self._settling = set()
+        self._settling_lock = threading.Lock()
     
     def _load_logo(self):
         """Load and encode the logo image as base64"""
@@ -55,12 +80,88 @@ class EmailService:
             dt = self.get_central_time()
         return dt.strftime('%Y-%m-%d %I:%M:%S %p CST')
     
+    def get_geofence(self):
+        """Get the subscriber area index, rebuilding it when areas have changed"""
+        version = SubscriberArea.get_version(self.db)
+        if self._geofence is None or version != self._geofence_version:
+            areas = [area_from_row(row) for row in SubscriberArea.get_all(self.db)]
+            self._geofence = GeofenceIndex(areas)
+            self._geofence_version = version
+        return self._geofence
+    
+    def get_matcher(self):
+        """Get the compiled subscription rules, rebuilding them when they have changed"""
+        version = SubscriptionRule.get_version(self.db)
+        if self._matcher is None or version != self._matcher_version:
+            self._matcher = RuleMatcher(SubscriptionRule.get_active_rules(self.db))
+            self._matcher_version = version
+        return self._matcher
+    
+    def connect(self, timeout=SMTP_TIMEOUT):
+        """Open an authenticated SMTP connection; use it as a context manager"""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=timeout)
+        try:
+            if self.use_tls:
+                server.starttls(context=ssl.create_default_context())
+            server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+    
+    def send_message(self, server, message):
+        """Send one AlertMessage, claiming its outbox rows first and marking them sent once the relay accepts"""
+        keys = message.keys
+        claimed = AlertOutbox.claim(self.db, [key for email in message.recipients for key in keys.get(email, ())])
+        # A recipient only gets the message if every delivery in it was still pending and is now ours
+        recipients = [email for email in message.recipients if all(key in claimed for key in keys.get(email, ()))]
+        owned = {key for email in recipients for key in keys.get(email, ())}
+        AlertOutbox.release(self.db, claimed - owned, 'claimed by another sender')
+        if not recipients:
+            return
+        
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = message.subject
+        msg["From"] = self.from_email
+        msg["To"] = ", ".join(recipients)
+        
+        # Attach both text and HTML versions
+        msg.attach(MIMEText(message.text, "plain"))
+        msg.attach(MIMEText(message.html, "html"))
+        
+        try:
+            refused = server.send_message(msg) or {}
+        except Exception as e:
+            # Not accepted: back to pending for the next attempt
+            AlertOutbox.release(self.db, owned, str(e))
+            raise
+        
+        AlertOutbox.complete(self.db, [key for email in recipients if email not in refused
+                                       for key in keys.get(email, ())])
+        if refused:
+            logger.warning(f"⚠️ Relay refused {len(refused)} recipients; they stay queued")
+            AlertOutbox.release(self.db, [key for email in refused for key in keys.get(email, ())],
+                                'recipient refused')
+    
+    def recover_outbox(self):
+        """Startup sweep: fail sends a crash interrupted, and return recent incidents still owed alerts"""
+        interrupted = AlertOutbox.recover(self.db)
+        if interrupted:
+            logger.warning(f"⚠️ {interrupted} alert deliveries were interrupted mid-send; marked failed for review")
+        rows = AlertOutbox.unsettled_incidents(self.db, Config.OUTBOX_RECOVERY_HOURS)
+        return [(Incident.from_row(row), row['id']) for row in rows]
+    
+    def retry_failed(self):
+        """Queue failed deliveries again and return their incidents for the next send"""
+        incident_ids = AlertOutbox.retry_failed(self.db)
+        return [(Incident.from_row(row), row['id']) for row in Incident.get_many(self.db, incident_ids)]
+    
     def create_html_email(self, incidents):
         """Create HTML email content for incidents"""
         
         # Determine email subject based on incident types
-        has_spill = any('spill' in inc[0].description.lower() or 'hazmat' in inc[0].description.lower() for inc in incidents)
-        has_accident = any('accident' in inc[0].description.lower() or 'crash' in inc[0].description.lower() for inc in incidents)
+        has_spill = any(inc[0].is_spill or inc[0].is_hazmat for inc in incidents)
+        has_accident = any(inc[0].is_wreck for inc in incidents)
         
         if has_spill and has_accident:
             subject = "🚨 CRITICAL ALERT: Spill & Accident in Houston!"
@@ -82,10 +183,8 @@ class EmailService:
             else:
                 bg_color = "#ffffff"  # White for low severity
             
-            # Create Google Maps link - replace "at" and "@" with "and" for better intersection recognition
-            location_formatted = incident.location.replace(' @ ', ' and ').replace('@', ' and ').replace(' at ', ' and ').replace(' AT ', ' and ')
-            location_query = urllib.parse.quote(f"{location_formatted} Houston TX")
-            maps_link = f"https://www.google.com/maps/search/?api=1&query={location_query}"
+            # Google Maps link from stored coordinates (text search fallback)
+            maps_link = incident.maps_link
             
             table_rows += f"""
             <tr style="background-color: {bg_color};">
@@ -273,15 +372,13 @@ HOUSTON TRAFFIC ALERT - {self.format_central_time()}
         
         for i, (incident, incident_id) in enumerate(incidents, 1):
             priority = "HIGH" if incident.severity >= 4 else "MEDIUM" if incident.severity >= 3 else "LOW"
-            # Replace "at" and "@" with "and" for better intersection recognition
-            location_formatted = incident.location.replace(' @ ', ' and ').replace('@', ' and ').replace(' at ', ' and ').replace(' AT ', ' and ')
             text_content += f"""
 Incident #{i}:
 Location: {incident.location}
 Description: {incident.description}
 Time: {incident.incident_time}
 Priority: {priority}
-Google Maps: https://www.google.com/maps/search/?api=1&query={urllib.parse.quote(f"{location_formatted} Houston TX")}
+Google Maps: {incident.maps_link}
 
 {'-' * 60}
 """
@@ -295,327 +392,345 @@ Generated: {self.format_central_time()}
         
         return text_content
     
-    def send_alert(self, incidents):
-        """Send email alert for new incidents"""
+    def send_alert(self, incidents, deadline=None, rate_limit=True):
+        """Send email alerts for new incidents to every subscription rule they match"""
+        return self.deliver_alert(incidents, deadline, rate_limit) == ALERT_SENT
+    
+    def deliver_alert(self, incidents, deadline=None, rate_limit=True, requeue=None):
+        """send_alert, returning ALERT_SENT, ALERT_RETRY (transient, try again later) or ALERT_FAILED
+        
+        Returns once the priority lane has sent; bulk lane messages settle in the background, and
+        requeue(incidents) is called with any they left undelivered. Failed deliveries stay in the
+        outbox either way, for startup recovery or an admin retry.
+        """
         if not incidents:
             logger.info("No incidents to send alerts for")
-            return False
+            return ALERT_FAILED
         
-        # Check rate limiting
-        recent_alerts = SentAlert.get_recent_count(self.db, hours=1)
+        # Check rate limiting (the alert coalescer keeps its own digest budget and passes rate_limit=False)
+        recent_alerts = SentAlert.get_recent_count(self.db, hours=1) if rate_limit else 0
         if recent_alerts >= Config.MAX_ALERTS_PER_HOUR:
             logger.warning(f"Rate limit exceeded: {recent_alerts} alerts sent in last hour")
-            return False
+            return ALERT_RETRY
         
-        # Get active subscribers
-        subscribers = Subscriber.get_all_active(self.db)
-        if not subscribers:
-            logger.warning("No active subscribers to send alerts to")
-            return False
+        # Match every incident against the subscription rules in one pass
+        now = self.get_central_time()
+        plan = self.get_matcher().build_plan(incidents, now.hour * 60 + now.minute, self.get_geofence())
+        if not plan:
+            # Nothing is owed to anyone, so there is nothing to retry
+            logger.info("No subscription rules matched the new incidents")
+            return ALERT_SENT
+        
+        # Record every recipient x incident before anything goes out, so a crash can neither lose nor repeat it
+        AlertOutbox.enqueue(self.db, plan)
         
-        # Validate email configuration
+        # Validate email configuration; retrying will not help until it is fixed
         if not all([self.username, self.password, self.from_email]):
             logger.error("Email configuration incomplete")
-            return False
+            return ALERT_FAILED
         
+        incident_ids = [incident_id for incident, incident_id in incidents]
         try:
-            # Create email content
-            subject, html_content = self.create_html_email(incidents)
-            text_content = self.create_text_email(incidents)
-            
-            # Create email message
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = self.from_email
-            msg["To"] = ", ".join(subscribers)
+            timer = self.timer = StageTimer()
+            # Only deliveries still pending are sent, so repeating a call for the same incidents is harmless
+            known = {incident_id: (incident, incident_id) for incident, incident_id in incidents}
+            pending = {}
+            for row in AlertOutbox.pending(self.db, incident_ids):
+                pending.setdefault((row['email'], row['template']), []).append(known[row['incident_id']])
             
-            # Attach both text and HTML versions
-            text_part = MIMEText(text_content, "plain")
-            html_part = MIMEText(html_content, "html")
+            # Render each distinct (template, incident set) once for all of its recipients
+            groups = group_plan(pending)
+            messages = []
+            bulk = {}
+            with timer.stage('render'):
+                for template, group_incidents, recipients in groups:
+                    if template == 'hazmat':
+                        subject, html_content, text_content = self.create_hazmat_email(group_incidents)
+                    else:
+                        subject, html_content = self.create_html_email(group_incidents)
+                        text_content = self.create_text_email(group_incidents)
+                    keys = {email: [outbox_key(incident_id, email, template=template)
+                                    for _, incident_id in group_incidents]
+                            for email in recipients}
+                    lane = lane_for(template, group_incidents)
+                    if lane == BULK:
+                        bulk.update((incident_id, known[incident_id]) for _, incident_id in group_incidents)
+                    messages.append((lane, AlertMessage(subject, html_content, text_content, recipients, keys)))
             
-            msg.attach(text_part)
-            msg.attach(html_part)
+            try:
+                # Never shrink the SMTP timeout below the floor: saved incidents must still go out
+                timeout = max(deadline.budget('send'), MIN_SMTP_TIMEOUT) if deadline else SMTP_TIMEOUT
+                with timer.stage('send'):
+                    bulk_futures = deliver(self.lanes, messages, timeout)
+            finally:
+                timer.observe()
             
-            # Send email
-            context = ssl.create_default_context()
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls(context=context)
-                server.login(self.username, self.password)
-                server.send_message(msg)
+            for template, group_incidents, _ in groups:
+                if lane_for(template, group_incidents) != BULK:
+                    EMAILS_SENT.inc(template=template)
+            if bulk_futures:
+                self._settle_later(bulk_futures, list(bulk.values()), groups, requeue)
             
-            # Mark incidents as sent
-            for incident, incident_id in incidents:
-                SentAlert.mark_sent(self.db, incident_id)
+            # Incidents with nothing left pending count as sent; refused recipients keep theirs queued
+            outstanding = AlertOutbox.settle(self.db, [incident_id for incident_id in incident_ids
+                                                       if incident_id not in bulk])
+            if outstanding:
+                logger.warning(f"⚠️ {outstanding} incidents still have alert deliveries queued")
+                return ALERT_RETRY
             
-            logger.info(f"✅ Alert sent successfully to {len(subscribers)} subscribers for {len(incidents)} incidents")
-            return True
+            logger.info(f"✅ Alert sent successfully to {len(plan)} subscriptions for {len(incidents)} incidents")
+            return ALERT_SENT
             
         except smtplib.SMTPAuthenticationError:
+            SMTP_ERRORS.inc()
             logger.error("❌ Email authentication failed - check username/password")
-            return False
-        except smtplib.SMTPException as e:
+            return ALERT_FAILED
+        except (smtplib.SMTPException, OSError) as e:
+            # Relay errors, refused connections and timeouts
+            SMTP_ERRORS.inc()
             logger.error(f"❌ SMTP error: {e}")
-            return False
+            return ALERT_RETRY
         except Exception as e:
             logger.error(f"❌ Unexpected error sending email: {e}")
-            return False
+            return ALERT_FAILED
     
-    def send_hazmat_alert(self, incidents):
-        """Send email alert for hazmat/spill incidents only to hazmat subscribers"""
-        if not incidents:
-            logger.info("No hazmat incidents to send alerts for")
-            return False
-        
-        # Filter for only hazmat/spill incidents
-        hazmat_incidents = []
-        for incident, incident_id in incidents:
-            desc_lower = incident.description.lower()
-            if 'hazmat' in desc_lower or 'spill' in desc_lower:
-                hazmat_incidents.append((incident, incident_id))
-        
-        if not hazmat_incidents:
-            logger.info("No hazmat/spill incidents found")
-            return False
-        
-        # Get active hazmat subscribers
-        hazmat_subscribers = HazmatSubscriber.get_all_active(self.db)
-        if not hazmat_subscribers:
-            logger.info("No active hazmat subscribers to send alerts to")
-            return False
-        
-        # Validate email configuration
-        if not all([self.username, self.password, self.from_email]):
-            logger.error("Email configuration incomplete")
-            return False
+    def _settle_later(self, futures, incidents, groups, requeue):
+        """Settle a call's bulk lane incidents in the background once its messages are done"""
+        future = self._settler.submit(self._settle_bulk, futures, incidents, groups, requeue)
+        with self._settling_lock:
+            self._settling.add(future)
+        future.add_done_callback(self._settled)
+    
+    def _settled(self, future):
+        with self._settling_lock:
+            self._settling.discard(future)
+    
+    def _settle_bulk(self, futures, incidents, groups, requeue):
+        """Wait for bulk lane messages, record what went out and hand back what did not"""
+        failed = False
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                # send_message already put the deliveries back to pending
+                failed = True
+                SMTP_ERRORS.inc()
+                logger.error(f"❌ Bulk lane SMTP error: {e}")
+        if not failed:
+            for template, group_incidents, _ in groups:
+                if lane_for(template, group_incidents) == BULK:
+                    EMAILS_SENT.inc(template=template)
         
         try:
-            # Create email content with hazmat-specific branding
-            subject = f"☣️ HAZMAT ALERT: {len(hazmat_incidents)} Spill/Hazmat Incident{'s' if len(hazmat_incidents) != 1 else ''} in Houston!"
-            
-            # Create incident table HTML
-            table_rows = ""
-            for incident, incident_id in hazmat_incidents:
-                bg_color = "#ffcccc"  # Red for hazmat incidents
-                location_formatted = incident.location.replace(' @ ', ' and ').replace('@', ' and ').replace(' at ', ' and ').replace(' AT ', ' and ')
-                location_query = urllib.parse.quote(f"{location_formatted} Houston TX")
-                maps_link = f"https://www.google.com/maps/search/?api=1&query={location_query}"
-                
-                table_rows += f"""
-                <tr style="background-color: {bg_color};">
-                    <td style="padding: 12px; border: 1px solid #ddd;">
-                        <a href="{maps_link}" target="_blank" style="color: #007bff; text-decoration: none;">
-                            {incident.location}
-                        </a>
-                    </td>
-                    <td style="padding: 12px; border: 1px solid #ddd;">{incident.description}</td>
-                    <td style="padding: 12px; border: 1px solid #ddd;">{incident.incident_time}</td>
-                </tr>
-                """
+            outstanding = AlertOutbox.settle(self.db, [incident_id for _, incident_id in incidents])
+        except Exception as e:
+            logger.error(f"❌ Could not settle bulk lane alerts: {e}")
+            return
+        if outstanding:
+            logger.warning(f"⚠️ {outstanding} incidents still have bulk alert deliveries queued")
+            if requeue:
+                requeue(incidents)
+    
+    def drain(self, timeout=None):
+        """Wait until every bulk lane message queued so far has been sent and settled"""
+        with self._settling_lock:
+            settling = list(self._settling)
+        wait(settling, timeout)
+    
+    def create_hazmat_email(self, hazmat_incidents):
+        """Create subject, HTML and text content for a hazmat alert"""
+        subject = f"☣️ HAZMAT ALERT: {len(hazmat_incidents)} Spill/Hazmat Incident{'s' if len(hazmat_incidents) != 1 else ''} in Houston!"
+        
+        # Create incident table HTML
+        table_rows = ""
+        for incident, incident_id in hazmat_incidents:
+            bg_color = "#ffcccc"  # Red for hazmat incidents
+            maps_link = incident.maps_link
             
-            html_content = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>Houston Hazmat Alert</title>
-                <style>
-                    body {{
-                        font-family: "Inter", Arial, sans-serif;
-                        margin: 0;
-                        padding: 24px;
-                        background-color: #fff5f5;
-                        color: #1f2937;
-                    }}
-                    .container {{
-                        max-width: 720px;
-                        margin: 0 auto;
-                        background-color: #ffffff;
-                        border-radius: 18px;
-                        box-shadow: 0 18px 40px rgba(220, 38, 38, 0.15);
-                        overflow: hidden;
-                        border: 1px solid #fee2e2;
-                    }}
-                    .header {{
-                        padding: 28px 32px;
-                        text-align: center;
-                        background: linear-gradient(135deg, #dc2626, #f97316);
-                        color: #ffffff;
-                    }}
-                    .header-title {{
-                        font-size: 22px;
-                        font-weight: 700;
-                        margin: 12px 0 4px;
-                    }}
-                    .header-subtitle {{
-                        font-size: 14px;
-                        opacity: 0.9;
-                    }}
-                    .content {{
-                        padding: 28px 32px 8px;
-                    }}
-                    .alert-card {{
-                        background: #fff7ed;
-                        border-radius: 14px;
-                        padding: 16px 18px;
-                        border: 1px solid #fed7aa;
-                        margin-bottom: 20px;
-                    }}
-                    .alert-title {{
-                        font-weight: 700;
-                        color: #b91c1c;
-                        margin-bottom: 6px;
-                    }}
-                    .alert-meta {{
-                        font-size: 14px;
-                        color: #7c2d12;
-                        line-height: 1.5;
-                    }}
-                    table {{
-                        width: 100%;
-                        border-collapse: collapse;
-                        font-size: 14px;
-                    }}
-                    th {{
-                        text-align: left;
-                        padding: 12px 14px;
-                        background-color: #fee2e2;
-                        color: #b91c1c;
-                        font-size: 12px;
-                        letter-spacing: 0.08em;
-                        text-transform: uppercase;
-                    }}
-                    td {{
-                        padding: 12px 14px;
-                        border-top: 1px solid #e5e7eb;
-                    }}
-                    .table-card {{
-                        border: 1px solid #fecaca;
-                        border-radius: 14px;
-                        overflow: hidden;
-                        margin-bottom: 16px;
-                    }}
-                    .footer {{
-                        text-align: center;
-                        font-size: 12px;
-                        color: #7f1d1d;
-                        padding: 18px 24px 26px;
-                        border-top: 1px solid #fee2e2;
-                        background: #fff1f2;
-                    }}
-                    a {{
-                        color: #dc2626;
-                        text-decoration: none;
-                    }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <img src="{self.logo_base64}" alt="Houston Traffic Monitor Logo" style="max-width: 180px; height: auto; margin-bottom: 6px;"><br>
-                        <div class="header-title">☣️ Hazmat Alert System</div>
-                        <div class="header-subtitle">Hazardous Material & Spill Monitoring</div>
-                    </div>
-
-                    <div class="content">
-                        <div class="alert-card">
-                            <div class="alert-title">⚠️ Critical Hazmat Alert</div>
-                            <div class="alert-meta">
-                                {len(hazmat_incidents)} hazmat/spill incident(s) detected at {self.format_central_time()}<br>
-                                Immediate attention required<br>
-                                Source: Houston TranStar Traffic Management
-                            </div>
-                        </div>
+            table_rows += f"""
+            <tr style="background-color: {bg_color};">
+                <td style="padding: 12px; border: 1px solid #ddd;">
+                    <a href="{maps_link}" target="_blank" style="color: #007bff; text-decoration: none;">
+                        {incident.location}
+                    </a>
+                </td>
+                <td style="padding: 12px; border: 1px solid #ddd;">{incident.description}</td>
+                <td style="padding: 12px; border: 1px solid #ddd;">{incident.incident_time}</td>
+            </tr>
+            """
+        
+        html_content = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            <title>Houston Hazmat Alert</title>
+            <style>
+                body {{
+                    font-family: "Inter", Arial, sans-serif;
+                    margin: 0;
+                    padding: 24px;
+                    background-color: #fff5f5;
+                    color: #1f2937;
+                }}
+                .container {{
+                    max-width: 720px;
+                    margin: 0 auto;
+                    background-color: #ffffff;
+                    border-radius: 18px;
+                    box-shadow: 0 18px 40px rgba(220, 38, 38, 0.15);
+                    overflow: hidden;
+                    border: 1px solid #fee2e2;
+                }}
+                .header {{
+                    padding: 28px 32px;
+                    text-align: center;
+                    background: linear-gradient(135deg, #dc2626, #f97316);
+                    color: #ffffff;
+                }}
+                .header-title {{
+                    font-size: 22px;
+                    font-weight: 700;
+                    margin: 12px 0 4px;
+                }}
+                .header-subtitle {{
+                    font-size: 14px;
+                    opacity: 0.9;
+                }}
+                .content {{
+                    padding: 28px 32px 8px;
+                }}
+                .alert-card {{
+                    background: #fff7ed;
+                    border-radius: 14px;
+                    padding: 16px 18px;
+                    border: 1px solid #fed7aa;
+                    margin-bottom: 20px;
+                }}
+                .alert-title {{
+                    font-weight: 700;
+                    color: #b91c1c;
+                    margin-bottom: 6px;
+                }}
+                .alert-meta {{
+                    font-size: 14px;
+                    color: #7c2d12;
+                    line-height: 1.5;
+                }}
+                table {{
+                    width: 100%;
+                    border-collapse: collapse;
+                    font-size: 14px;
+                }}
+                th {{
+                    text-align: left;
+                    padding: 12px 14px;
+                    background-color: #fee2e2;
+                    color: #b91c1c;
+                    font-size: 12px;
+                    letter-spacing: 0.08em;
+                    text-transform: uppercase;
+                }}
+                td {{
+                    padding: 12px 14px;
+                    border-top: 1px solid #e5e7eb;
+                }}
+                .table-card {{
+                    border: 1px solid #fecaca;
+                    border-radius: 14px;
+                    overflow: hidden;
+                    margin-bottom: 16px;
+                }}
+                .footer {{
+                    text-align: center;
+                    font-size: 12px;
+                    color: #7f1d1d;
+                    padding: 18px 24px 26px;
+                    border-top: 1px solid #fee2e2;
+                    background: #fff1f2;
+                }}
+                a {{
+                    color: #dc2626;
+                    text-decoration: none;
+                }}
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <img src="{self.logo_base64}" alt="Houston Traffic Monitor Logo" style="max-width: 180px; height: auto; margin-bottom: 6px;"><br>
+                    <div class="header-title">☣️ Hazmat Alert System</div>
+                    <div class="header-subtitle">Hazardous Material & Spill Monitoring</div>
+                </div>
 
-                        <div class="table-card">
-                            <table>
-                                <thead>
-                                    <tr>
-                                        <th>📍 Location</th>
-                                        <th>📝 Description</th>
-                                        <th>🕐 Time</th>
-                                    </tr>
-                                </thead>
-                                <tbody>
-                                    {table_rows}
-                                </tbody>
-                            </table>
+                <div class="content">
+                    <div class="alert-card">
+                        <div class="alert-title">⚠️ Critical Hazmat Alert</div>
+                        <div class="alert-meta">
+                            {len(hazmat_incidents)} hazmat/spill incident(s) detected at {self.format_central_time()}<br>
+                            Immediate attention required<br>
+                            Source: Houston TranStar Traffic Management
                         </div>
                     </div>
 
-                    <div class="footer">
-                        <strong>Houston Traffic Monitor - Hazmat Alert System</strong><br>
-                        Specialized monitoring for hazardous material spills and incidents<br>
-                        Data source: Houston TranStar | Generated: {self.format_central_time()}<br>
-                        <br>
-                        <em>You are receiving this because you subscribed to hazmat-only alerts.</em>
+                    <div class="table-card">
+                        <table>
+                            <thead>
+                                <tr>
+                                    <th>📍 Location</th>
+                                    <th>📝 Description</th>
+                                    <th>🕐 Time</th>
+                                </tr>
+                            </thead>
+                            <tbody>
+                                {table_rows}
+                            </tbody>
+                        </table>
                     </div>
                 </div>
-            </body>
-            </html>
-            """
-            
-            # Create text version
-            text_content = f"""
+
+                <div class="footer">
+                    <strong>Houston Traffic Monitor - Hazmat Alert System</strong><br>
+                    Specialized monitoring for hazardous material spills and incidents<br>
+                    Data source: Houston TranStar | Generated: {self.format_central_time()}<br>
+                    <br>
+                    <em>You are receiving this because you subscribed to hazmat-only alerts.</em>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+        
+        # Create text version
+        text_content = f"""
 HOUSTON HAZMAT ALERT - {self.format_central_time()}
 
 ⚠️ CRITICAL: {len(hazmat_incidents)} hazmat/spill incident(s) detected:
 
 """
-            
-            for i, (incident, incident_id) in enumerate(hazmat_incidents, 1):
-                location_formatted = incident.location.replace(' @ ', ' and ').replace('@', ' and ').replace(' at ', ' and ').replace(' AT ', ' and ')
-                text_content += f"""
+        
+        for i, (incident, incident_id) in enumerate(hazmat_incidents, 1):
+            text_content += f"""
 Hazmat Incident #{i}:
 Location: {incident.location}
 Description: {incident.description}
 Time: {incident.incident_time}
-Google Maps: https://www.google.com/maps/search/?api=1&query={urllib.parse.quote(f"{location_formatted} Houston TX")}
+Google Maps: {incident.maps_link}
 
 {'-' * 60}
 """
-            
-            text_content += f"""
+        
+        text_content += f"""
 
 Data Source: Houston TranStar Traffic Management
 System: Houston Traffic Monitor - Hazmat Alert System
 Generated: {self.format_central_time()}
 
 You are receiving this because you subscribed to hazmat-only alerts.
-            """
-            
-            # Create email message
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = self.from_email
-            msg["To"] = ", ".join(hazmat_subscribers)
-            
-            # Attach both text and HTML versions
-            text_part = MIMEText(text_content, "plain")
-            html_part = MIMEText(html_content, "html")
-            
-            msg.attach(text_part)
-            msg.attach(html_part)
-            
-            # Send email
-            context = ssl.create_default_context()
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls(context=context)
-                server.login(self.username, self.password)
-                server.send_message(msg)
-            
-            logger.info(f"Hazmat alert sent successfully to {len(hazmat_subscribers)} hazmat subscribers for {len(hazmat_incidents)} incidents")
-            return True
-            
-        except smtplib.SMTPAuthenticationError:
-            logger.error("Email authentication failed - check username/password")
-            return False
-        except smtplib.SMTPException as e:
-            logger.error(f"SMTP error: {e}")
-            return False
-        except Exception as e:
-            logger.error(f"Unexpected error sending hazmat email: {e}")
-            return False
+        """
+        
+        return subject, html_content, text_content
     
     def send_test_email(self, test_email):
         """Send a test email to verify configuration"""
@@ -701,9 +816,9 @@ You will receive alerts when heavy truck incidents or hazmat spills are detected
             msg.attach(MIMEText(text_content, "plain"))
             msg.attach(MIMEText(html_content, "html"))
             
-            context = ssl.create_default_context()
             with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls(context=context)
+                if self.use_tls:
+                    server.starttls(context=ssl.create_default_context())
                 server.login(self.username, self.password)
                 server.send_message(msg)
             
@@ -738,16 +853,18 @@ You will receive alerts when heavy truck incidents or hazmat spills are detected
         
         return output.getvalue()
     
-    def create_daily_summary_html(self, incidents_data, date_str):
+    def create_daily_summary_html(self, incidents_data, date_str, category_groups=None):
         """Create HTML email content for daily summary"""
         
         total_incidents = len(incidents_data)
         
-        # Categorize incidents
-        wrecks = [i for i in incidents_data if 'accident' in i['description'].lower() or 'crash' in i['description'].lower() or 'wreck' in i['description'].lower()]
-        stalls = [i for i in incidents_data if 'stall' in i['description'].lower()]
-        spills = [i for i in incidents_data if 'spill' in i['description'].lower() or 'hazmat' in i['description'].lower()]
-        other = [i for i in incidents_data if i not in wrecks and i not in stalls and i not in spills]
+        # Categories come from the stored classification columns
+        if category_groups is None:
+            category_groups = Incident.get_recent_by_category(self.db, hours=24)
+        wrecks = category_groups['wrecks']
+        stalls = category_groups['stalls']
+        spills = category_groups['spills']
+        other = category_groups['other']
         
         # Create incident table HTML
         table_rows = ""
@@ -760,17 +877,16 @@ You will receive alerts when heavy truck incidents or hazmat spills are detected
             else:
                 bg_color = "#ffffff"  # White for low severity
             
-            # Create Google Maps link - replace "at" with "and" for better intersection recognition
-            location_formatted = incident['location'].replace(' at ', ' and ').replace(' AT ', ' and ')
-            location_query = urllib.parse.quote(f"{location_formatted} Houston TX")
-            maps_link = f"https://www.google.com/maps/search/?api=1&query={location_query}"
+            # Google Maps link from stored coordinates (text search fallback)
+            maps_link = build_maps_link(incident['location'], incident['lat'], incident['lon'],
+                                        incident['geocode_source'])
             
             # Determine incident type icon
-            if 'accident' in incident['description'].lower() or 'crash' in incident['description'].lower() or 'wreck' in incident['description'].lower():
+            if incident['is_wreck']:
                 icon = "🚗💥"
-            elif 'stall' in incident['description'].lower():
+            elif incident['is_stall']:
                 icon = "🚛"
-            elif 'spill' in incident['description'].lower() or 'hazmat' in incident['description'].lower():
+            elif incident['is_spill'] or incident['is_hazmat']:
                 icon = "☣️"
             else:
                 icon = "⚠️"
@@ -1005,7 +1121,15 @@ You will receive alerts when heavy truck incidents or hazmat spills are detected
                     'description': incident['description'],
                     'incident_time': incident['incident_time'],
                     'scraped_at': incident['scraped_at'],
-                    'severity': incident['severity']
+                    'severity': incident['severity'],
+                    'category': incident['category'],
+                    'is_wreck': incident['is_wreck'],
+                    'is_stall': incident['is_stall'],
+                    'is_spill': incident['is_spill'],
+                    'is_hazmat': incident['is_hazmat'],
+                    'lat': incident['lat'],
+                    'lon': incident['lon'],
+                    'geocode_source': incident['geocode_source']
                 })
             
             total_count = len(incidents_data)
@@ -1017,7 +1141,8 @@ You will receive alerts when heavy truck incidents or hazmat spills are detected
                 subject = f"📊 Daily Summary - {date_str} - {total_count} Incident{'s' if total_count != 1 else ''}"
             
             # Create HTML content
-            html_content = self.create_daily_summary_html(incidents_data, date_str)
+            category_groups = Incident.get_recent_by_category(self.db, hours=24)
+            html_content = self.create_daily_summary_html(incidents_data, date_str, category_groups)
             
             # Create text content
             text_content = f"""
@@ -1083,9 +1208,9 @@ This is an automated daily report sent at midnight CST.
                 return False
             
             # Send email
-            context = ssl.create_default_context()
             with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls(context=context)
+                if self.use_tls:
+                    server.starttls(context=ssl.create_default_context())
                 server.login(self.username, self.password)
                 server.send_message(msg)
             
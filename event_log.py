@@ -0,0 +1,172 @@
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+central_tz = pytz.timezone('America/Chicago')
+
+# Events older than this are pruned from the scrape_events table
+RETENTION_DAYS = 14
+PRUNE_INTERVAL = 3600
+
+Event = namedtuple('Event', ['ts', 'level', 'message', 'cycle_id', 'stage', 'duration_ms', 'counts'])
+
+
+def event_to_dict(event):
+    """JSON-ready dict with a Central Time timestamp (CST or CDT as appropriate)"""
+    timestamp = datetime.fromtimestamp(event.ts, central_tz).strftime('%Y-%m-%d %I:%M:%S %p %Z')
+    return {
+        'timestamp': timestamp,
+        'ts': event.ts,
+        'level': event.level,
+        'message': event.message,
+        'cycle_id': event.cycle_id,
+        'stage': event.stage,
+        'duration_ms': event.duration_ms,
+        'counts': event.counts,
+    }
+
+
+def _matches(event, level, cycle_id, stage, since, before, exclude_level=None):
+    return ((level is None or event.level == level)
+            and (exclude_level is None or event.level != exclude_level)
+            and (cycle_id is None or event.cycle_id == cycle_id)
+            and (stage is None or event.stage == stage)
+            and (since is None or event.ts >= since)
+            and (before is None or event.ts < before))
+
+
+class EventLog:
+    """Structured scrape events: a ring buffer for the live view, spilled to SQLite in batches"""
+
+    def __init__(self, db, capacity=1000, batch_size=100, flush_interval=2.0):
+        self.db = db
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # Writers never take a lock: next() on a count and a list slot store are atomic under the GIL
+        self._ring = [None] * capacity
+        self._seq = itertools.count()
+        self._pending = deque()
+        self._inflight = []
+        self._flush_lock = threading.Lock()
+        self._last_prune = 0.0
+
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='event-log-flusher', daemon=True)
+        self._thread.start()
+
+    def record(self, message, level='info', cycle_id=None, stage=None, duration_ms=None, counts=None):
+        """Append an event; persistence happens on the flusher thread"""
+        event = Event(time.time(), level, message, cycle_id, stage, duration_ms, counts)
+        seq = next(self._seq)
+        self._ring[seq % self.capacity] = (seq, event)
+        self._pending.append(event)
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+        return event
+
+    def recent(self, limit=100, exclude_level=None):
+        """Newest events from the ring buffer, skipping exclude_level before the limit applies"""
+        entries = [entry for entry in list(self._ring)
+                   if entry is not None and (exclude_level is None or entry[1].level != exclude_level)]
+        entries.sort(key=lambda entry: entry[0], reverse=True)
+        return [event for _, event in entries[:limit]]
+
+    def flush(self):
+        """Write pending events to SQLite in one transaction"""
+        with self._flush_lock:
+            batch = self._inflight = []
+            while self._pending:
+                batch.append(self._pending.popleft())
+            if not batch:
+                return 0
+
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT INTO scrape_events (ts, level, message, cycle_id, stage, duration_ms, counts)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [(event.ts, event.level, event.message, event.cycle_id, event.stage, event.duration_ms,
+                   json.dumps(event.counts) if event.counts else None) for event in batch])
+
+            if time.time() - self._last_prune > PRUNE_INTERVAL:
+                cursor.execute('DELETE FROM scrape_events WHERE ts < ?', (time.time() - RETENTION_DAYS * 86400,))
+                self._last_prune = time.time()
+
+            conn.commit()
+            conn.close()
+            self._inflight = []
+            return len(batch)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # Keep the events for the next attempt
+                self._pending.extendleft(reversed(self._inflight))
+                self._inflight = []
+                logger.warning(f"📝 Event log flush failed: {e}")
+
+    def close(self):
+        """Final flush at shutdown, so buffered events are not lost with the daemon flusher"""
+        try:
+            self.flush()
+        except Exception as e:
+            logger.warning(f"📝 Event log flush at shutdown failed: {e}")
+
+    def query(self, level=None, cycle_id=None, stage=None, since=None, before=None, limit=50, exclude_level=None):
+        """Newest-first events matching the filters; page with before=<ts of the last event>"""
+        # Events not yet on disk are always newer than the persisted ones
+        unflushed = [event for event in list(self._inflight) + list(self._pending)
+                     if _matches(event, level, cycle_id, stage, since, before, exclude_level)]
+
+        clauses, params = [], []
+        for column, value in (('level', level), ('cycle_id', cycle_id), ('stage', stage)):
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        if exclude_level is not None:
+            clauses.append('level != ?')
+            params.append(exclude_level)
+        if since is not None:
+            clauses.append('ts >= ?')
+            params.append(since)
+        if before is not None:
+            clauses.append('ts < ?')
+            params.append(before)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT ts, level, message, cycle_id, stage, duration_ms, counts FROM scrape_events
+            {where}
+            ORDER BY ts DESC
+            LIMIT ?
+        ''', params + [limit])
+        persisted = [Event(row['ts'], row['level'], row['message'], row['cycle_id'], row['stage'],
+                           row['duration_ms'], json.loads(row['counts']) if row['counts'] else None)
+                     for row in cursor.fetchall()]
+        conn.close()
+
+        # An event can briefly be both in flight and committed
+        seen = set()
+        events = []
+        for event in sorted(unflushed + persisted, key=lambda event: event.ts, reverse=True):
+            key = (event.ts, event.message)
+            if key not in seen:
+                seen.add(key)
+                events.append(event)
+        return events[:limit]
@@ -0,0 +1,50 @@
+import csv
+import json
+from datetime import datetime
+
+from timeparse import central_tz
+
+EXPORT_COLUMNS = ['id', 'incident_ts', 'reported_at', 'location', 'description', 'corridor', 'direction',
+                  'cross_street', 'category', 'severity', 'lat', 'lon', 'scraped_at']
+
+# format -> mimetype
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class _Line:
+    """File-like target that hands back whatever csv.writer writes instead of storing it"""
+
+    def write(self, line):
+        return line
+
+
+def export_record(row):
+    """Values of an incidents row in EXPORT_COLUMNS order, with reported_at in Central Time"""
+    ts = row['incident_ts']
+    reported_at = datetime.fromtimestamp(ts, central_tz).isoformat() if ts is not None else None
+    return [row['id'], ts, reported_at, row['location'], row['description'], row['corridor'], row['direction'],
+            row['cross_street'], row['category'], row['severity'], row['lat'], row['lon'], row['scraped_at']]
+
+
+def iter_csv(chunks, columns=EXPORT_COLUMNS, record=export_record):
+    """CSV text, the header first and then one string per chunk of rows"""
+    writer = csv.writer(_Line())
+    yield writer.writerow(columns)
+    for chunk in chunks:
+        yield ''.join(writer.writerow(record(row)) for row in chunk)
+
+
+def iter_ndjson(chunks, columns=EXPORT_COLUMNS, record=export_record):
+    """Newline-delimited JSON, one string per chunk of rows"""
+    for chunk in chunks:
+        yield ''.join(json.dumps(dict(zip(columns, record(row)))) + '\n' for row in chunk)
+
+
+def export_stream(fmt, chunks, columns=EXPORT_COLUMNS, record=export_record):
+    """Generator of text chunks for an EXPORT_FORMATS format (incident rows unless columns/record say otherwise)"""
+    if fmt == 'ndjson':
+        return iter_ndjson(chunks, columns, record)
+    return iter_csv(chunks, columns, record)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Recorded TranStar /roadclosures/ pages and a local replay server
+
+    python fixtures.py record [label]      Capture the live page into the corpus
+    python fixtures.py synthesize [seed]   Add a generated page to the corpus
+    python fixtures.py serve [port]        Replay the corpus on localhost
+"""
+
+import csv
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from geocode import INTERCHANGES_PATH
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'roadclosures')
+MANIFEST_NAME = 'manifest.json'
+
+# Bumped when the manifest layout changes
+CORPUS_VERSION = 1
+
+LIVE_URL = 'https://traffic.houstontranstar.org/roadclosures/'
+REPLAY_PATH = '/roadclosures/'
+
+DIRECTIONS = ['Northbound', 'Southbound', 'Eastbound', 'Westbound', 'Inbound', 'Outbound']
+
+# (description, relevant to truck alerts)
+FREEWAY_DESCRIPTIONS = [
+    ('Heavy Truck Accident', True), ('Accident, 18-wheeler', True), ('Jack-knifed tractor trailer', True),
+    ('Hazmat spill', True), ('Accident', False), ('Accident, 2 vehicles', False), ('Debris in roadway', False),
+]
+STALL_DESCRIPTIONS = [('Stall, Heavy Truck', True), ('Stalled semi', True), ('Stall', False)]
+STREET_DESCRIPTIONS = [('Accident, box truck', True), ('Accident', False), ('Signal out', False)]
+CLOSURE_DESCRIPTIONS = [('Lost load, flatbed', True), ('Road closure', False), ('Construction', False)]
+
+
+def manifest_path(fixture_dir=FIXTURE_DIR):
+    return os.path.join(fixture_dir, MANIFEST_NAME)
+
+
+def load_manifest(fixture_dir=FIXTURE_DIR):
+    """Load the corpus manifest, or an empty one"""
+    try:
+        with open(manifest_path(fixture_dir), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'version': CORPUS_VERSION, 'fixtures': []}
+
+
+def list_fixtures(fixture_dir=FIXTURE_DIR):
+    """Absolute paths of every fixture in the corpus, oldest first"""
+    return [os.path.join(fixture_dir, entry['file']) for entry in load_manifest(fixture_dir)['fixtures']]
+
+
+def add_fixture(content, source, label=None, fixture_dir=FIXTURE_DIR):
+    """Write a page into the corpus and record it in the manifest"""
+    os.makedirs(fixture_dir, exist_ok=True)
+    manifest = load_manifest(fixture_dir)
+
+    recorded_at = datetime.now().strftime('%Y%m%d-%H%M%S')
+    name = f"{recorded_at}-{label}.html" if label else f"{recorded_at}.html"
+    with open(os.path.join(fixture_dir, name), 'wb') as f:
+        f.write(content)
+
+    manifest['version'] = CORPUS_VERSION
+    manifest['fixtures'].append({
+        'file': name,
+        'source': source,
+        'recorded_at': recorded_at,
+        'bytes': len(content),
+        'sha256': hashlib.sha256(content).hexdigest(),
+    })
+    with open(manifest_path(fixture_dir), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+        f.write('\n')
+    return os.path.join(fixture_dir, name)
+
+
+def record_fixture(label=None, url=LIVE_URL, fixture_dir=FIXTURE_DIR, session=None):
+    """Capture the live road closures page into the corpus"""
+    session = session or requests.Session()
+    response = session.get(url, timeout=30)
+    response.raise_for_status()
+    return add_fixture(response.content, url, label, fixture_dir)
+
+
+class PageGenerator:
+    """Synthesizes TranStar-style pages with a configurable row count and churn between pages"""
+
+    # (heading, header row) per table layout understood by detect_table_type
+    LAYOUTS = {
+        'freeway': ('Freeway Incidents', ['Location', 'Description', 'Vehicles', 'Lanes', 'Status', 'Map']),
+        'stalls': ('Stalled Vehicles', ['Location', 'Description', 'Lanes', 'Status', 'Map']),
+        'street': ('Street Incidents', ['Location', 'Description', 'Time Reported', 'Map']),
+        'closures': ('Lane Closures', ['Location', 'Description', 'Lanes', 'Duration', 'Status', 'Map']),
+    }
+    LANES = ['Left lane', 'Right lane', '2 left lanes', '2 right lanes', 'Center lane', 'All main lanes',
+             'Shoulder', 'HOV lane', 'Exit ramp', 'Entrance ramp', 'Frontage road']
+    STREETS = ['Main St', 'Westheimer Rd', 'Airline Dr', 'Telephone Rd', 'Bellaire Blvd', 'Gessner Rd',
+               'Kirby Dr', 'Tidwell Rd', 'Bellfort Ave', 'Elgin St', 'Shepherd Dr', 'Wayside Dr']
+
+    def __init__(self, seed=0, rows_per_table=25, relevant_ratio=0.4, churn=0.1):
+        self.rng = random.Random(seed)
+        self.rows_per_table = rows_per_table
+        self.relevant_ratio = relevant_ratio
+        self.churn = churn
+        with open(INTERCHANGES_PATH, newline='', encoding='utf-8') as f:
+            self.interchanges = [(row['corridor'], row['cross_street']) for row in csv.DictReader(f)]
+        self.tables = {layout: [self._row(layout) for _ in range(rows_per_table)] for layout in self.LAYOUTS}
+
+    def _pick(self, descriptions):
+        relevant = [text for text, is_relevant in descriptions if is_relevant]
+        other = [text for text, is_relevant in descriptions if not is_relevant]
+        return self.rng.choice(relevant if self.rng.random() < self.relevant_ratio else other)
+
+    def _location(self):
+        corridor, cross_street = self.rng.choice(self.interchanges)
+        return f"{corridor} {self.rng.choice(DIRECTIONS)} At {cross_street}"
+
+    def _status(self):
+        rng = self.rng
+        return f"Verified at {rng.randint(1, 12)}:{rng.randint(0, 59):02d} {rng.choice(['AM', 'PM'])}"
+
+    def _row(self, layout):
+        rng = self.rng
+        if layout == 'freeway':
+            return (self._location(), self._pick(FREEWAY_DESCRIPTIONS), rng.randint(1, 4),
+                    rng.choice(self.LANES), self._status(), 'Map')
+        if layout == 'stalls':
+            return (self._location(), self._pick(STALL_DESCRIPTIONS), rng.choice(self.LANES), self._status(), 'Map')
+        if layout == 'street':
+            return (f"{rng.choice(self.STREETS)} At {rng.choice(self.STREETS)}",
+                    self._pick(STREET_DESCRIPTIONS), self._status(), 'Map')
+        return (self._location(), self._pick(CLOSURE_DESCRIPTIONS), rng.choice(self.LANES),
+                f"{rng.randint(1, 8)} hours", self._status(), 'Map')
+
+    def advance(self):
+        """Replace a churn fraction of every table with new rows (cleared incidents and new ones)"""
+        for layout, rows in self.tables.items():
+            for index in self.rng.sample(range(len(rows)), int(round(len(rows) * self.churn))):
+                rows[index] = self._row(layout)
+
+    def page(self):
+        """Render the current tables as a road closures page"""
+        sections = []
+        for layout, (title, headers) in self.LAYOUTS.items():
+            lines = [f'<h3>{escape(title)}</h3>', '<table>',
+                     '<tr>' + ''.join(f'<th>{escape(h)}</th>' for h in headers) + '</tr>']
+            for cells in self.tables[layout]:
+                lines.append('<tr>' + ''.join(f'<td>{escape(str(c))}</td>' for c in cells) + '</tr>')
+            lines.append('</table>')
+            sections.append('\n'.join(lines))
+        page = ('<!DOCTYPE html>\n<html><head><title>Houston TranStar - Road Closures</title></head>\n<body>\n'
+                + '\n'.join(sections) + '\n</body></html>\n')
+        return page.encode('utf-8')
+
+
+def synthesize_page(seed=0, rows_per_table=25, relevant_ratio=0.4):
+    """Generate a page with the same table layout TranStar uses"""
+    return PageGenerator(seed, rows_per_table, relevant_ratio).page()
+
+
+class ReplayServer:
+    """Serves corpus pages at /roadclosures/ on localhost, cycling through them per request"""
+
+    def __init__(self, pages, host='127.0.0.1', port=0, delay=0.0):
+        self.pages = [self._load(page) for page in pages]
+        self.requests = 0
+        # Seconds to wait before answering, to stand in for a slow upstream
+        self.delay = delay
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != REPLAY_PATH:
+                    self.send_error(404)
+                    return
+                body = server.pages[server.requests % len(server.pages)]
+                server.requests += 1
+                if server.delay:
+                    time.sleep(server.delay)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @staticmethod
+    def _load(page):
+        if isinstance(page, bytes):
+            return page
+        with open(page, 'rb') as f:
+            return f.read()
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'serve'
+    if command == 'record':
+        path = record_fixture(label=sys.argv[2] if len(sys.argv) > 2 else None)
+        print(f"📼 Recorded {path}")
+    elif command == 'synthesize':
+        seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+        path = add_fixture(synthesize_page(seed), f'synthetic:{seed}', f'synthetic-{seed}')
+        print(f"🧪 Generated {path}")
+    elif command == 'serve':
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else 8765
+        server = ReplayServer(list_fixtures(), port=port)
+        print(f"🔁 Replaying {len(server.pages)} fixtures at {server.base_url}{REPLAY_PATH}")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            server.stop()
+    else:
+        print(__doc__)
+
+
+if __name__ == "__main__":
+    main()
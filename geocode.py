@@ -0,0 +1,203 @@
+import csv
+import os
+import re
+import difflib
+import logging
+import urllib.parse
+from collections import namedtuple
+from functools import lru_cache
+
+from corridors import CORRIDOR_PATTERN, ALIAS_INDEX, alias_key
+
+logger = logging.getLogger(__name__)
+
+GeoPoint = namedtuple('GeoPoint', ['lat', 'lon', 'source'])
+
+# Bundled table of approximate Houston interchange coordinates
+INTERCHANGES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'houston_interchanges.csv')
+
+# Approximate corridor midpoints, used when the cross street is unknown
+CORRIDOR_CENTROIDS = {
+    'IH-10': (29.7800, -95.4500),
+    'IH-45': (29.8000, -95.3600),
+    'IH-69': (29.7800, -95.3800),
+    'IH-610': (29.7550, -95.3700),
+    'Beltway 8': (29.7700, -95.3800),
+    'US-290': (29.8600, -95.5400),
+    'US-90': (29.8100, -95.2500),
+    'US-90A': (29.6500, -95.4800),
+    'SH-288': (29.6500, -95.3800),
+    'SH-225': (29.7000, -95.1900),
+    'SH-249': (29.9500, -95.5500),
+    'SH-146': (29.6500, -95.0200),
+    'SH-6': (29.7500, -95.6400),
+    'SH-99': (29.8500, -95.7500),
+    'Hardy Toll Road': (29.9000, -95.3700),
+    'Westpark Tollway': (29.7100, -95.6200),
+    'Fort Bend Tollway': (29.6000, -95.5500),
+    'Spur 527': (29.7400, -95.3900),
+}
+
+# Sources precise enough to link by coordinates instead of a text search
+PRECISE_SOURCES = ('interchange', 'fuzzy')
+
+STREET_SUFFIXES = {'rd', 'road', 'st', 'street', 'blvd', 'dr', 'drive', 'ave', 'avenue', 'ln', 'lane'}
+DIRECTION_TOKENS = {'nb', 'sb', 'eb', 'wb'}
+
+
+def cross_street_key(text):
+    """Normalize a cross street so corridor aliases and suffixes compare equal"""
+    if not text:
+        return ''
+    seen = set()
+
+    def canonical(match):
+        name = ALIAS_INDEX.get(alias_key(match.group(0)), match.group(0))
+        if name in seen:
+            return ' '
+        seen.add(name)
+        return f' {name} '
+
+    text = CORRIDOR_PATTERN.sub(canonical, text)
+    tokens = re.findall(r'[a-z0-9]+', text.lower())
+    return ' '.join(t for t in tokens if t not in STREET_SUFFIXES and t not in DIRECTION_TOKENS)
+
+
+@lru_cache(maxsize=None)
+def load_interchanges(path=INTERCHANGES_PATH):
+    """Load the interchange table as {corridor: {cross_key: (lat, lon)}}"""
+    table = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            point = (float(row['lat']), float(row['lon']))
+            table.setdefault(row['corridor'], {})[cross_street_key(row['cross_street'])] = point
+
+            # Corridor-to-corridor interchanges resolve from either side
+            if row['cross_street'] in CORRIDOR_CENTROIDS:
+                table.setdefault(row['cross_street'], {}).setdefault(cross_street_key(row['corridor']), point)
+    return table
+
+
+class Geocoder:
+    def __init__(self, db, interchanges=None):
+        self.db = db
+        self.interchanges = interchanges if interchanges is not None else load_interchanges()
+        self._cache = {}
+
+    def resolve(self, corridor, cross_street):
+        """Resolve a corridor/cross street pair against the bundled table"""
+        if not corridor:
+            return None
+
+        known = self.interchanges.get(corridor, {})
+        key = cross_street_key(cross_street)
+        if key in known:
+            return GeoPoint(*known[key], 'interchange')
+
+        # "IH-45 North" style cross streets reduce to the crossing corridor
+        crossing = CORRIDOR_PATTERN.search(cross_street or '')
+        if crossing:
+            crossing_key = cross_street_key(crossing.group(0))
+            if crossing_key in known:
+                return GeoPoint(*known[crossing_key], 'interchange')
+
+        if key:
+            close = difflib.get_close_matches(key, known.keys(), n=1, cutoff=0.8)
+            if close:
+                return GeoPoint(*known[close[0]], 'fuzzy')
+
+        if corridor in CORRIDOR_CENTROIDS:
+            return GeoPoint(*CORRIDOR_CENTROIDS[corridor], 'corridor')
+        return None
+
+    def geocode(self, corridor, cross_street):
+        """Geocode a corridor/cross street pair, caching the result in SQLite"""
+        if not corridor:
+            return None
+
+        location_key = f"{corridor}|{cross_street_key(cross_street)}"
+        if location_key in self._cache:
+            return self._cache[location_key]
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT lat, lon, source FROM geocode_cache WHERE location_key = ?', (location_key,))
+        row = cursor.fetchone()
+
+        if row:
+            point = GeoPoint(row['lat'], row['lon'], row['source']) if row['source'] else None
+        else:
+            point = self.resolve(corridor, cross_street)
+            cursor.execute('''
+                INSERT OR REPLACE INTO geocode_cache (location_key, lat, lon, source)
+                VALUES (?, ?, ?, ?)
+            ''', (location_key,
+                  point.lat if point else None,
+                  point.lon if point else None,
+                  point.source if point else None))
+            conn.commit()
+
+        conn.close()
+        self._cache[location_key] = point
+        return point
+
+    def locate(self, incident):
+        """Store coordinates for an incident from its corridor and cross street"""
+        point = self.geocode(incident.corridor, incident.cross_street)
+        if point:
+            incident.lat, incident.lon, incident.geocode_source = point
+        else:
+            incident.lat, incident.lon, incident.geocode_source = None, None, 'none'
+        return point
+
+    def backfill_incidents(self, batch_size=500):
+        """Geocode stored incidents that have no coordinates yet"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        total = 0
+
+        while True:
+            cursor.execute('''
+                SELECT id, corridor, cross_street FROM incidents
+                WHERE geocode_source IS NULL
+                LIMIT ?
+            ''', (batch_size,))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            updates = []
+            for row in rows:
+                point = self.geocode(row['corridor'], row['cross_street'])
+                if point:
+                    updates.append((point.lat, point.lon, point.source, row['id']))
+                else:
+                    updates.append((None, None, 'none', row['id']))
+
+            cursor.executemany('''
+                UPDATE incidents SET lat = ?, lon = ?, geocode_source = ?
+                WHERE id = ?
+            ''', updates)
+            conn.commit()
+            total += len(updates)
+
+        conn.close()
+        if total:
+            logger.info(f"Geocoded {total} stored incidents")
+        return total
+
+
+@lru_cache(maxsize=4096)
+def _search_link(location):
+    """Build a Google Maps text search link for a location"""
+    # Replace "at" and "@" with "and" for better intersection recognition
+    location_formatted = location.replace(' @ ', ' and ').replace('@', ' and ').replace(' at ', ' and ').replace(' AT ', ' and ')
+    location_query = urllib.parse.quote(f"{location_formatted} Houston TX")
+    return f"https://www.google.com/maps/search/?api=1&query={location_query}"
+
+
+def maps_link(location, lat=None, lon=None, source=None):
+    """Google Maps link for an incident, by coordinates when they are precise"""
+    if lat is not None and lon is not None and source in PRECISE_SOURCES:
+        return f"https://www.google.com/maps/search/?api=1&query={lat:.5f},{lon:.5f}"
+    return _search_link(location or '')
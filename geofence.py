@@ -0,0 +1,109 @@
+import json
+import math
+from collections import namedtuple, defaultdict
+
+from geocode import PRECISE_SOURCES
+
+# Grid cell size in degrees (about 5.5 km north-south around Houston)
+CELL_SIZE = 0.05
+
+EARTH_RADIUS_KM = 6371.0
+
+Area = namedtuple('Area', ['email', 'area_type', 'corridor', 'center_lat', 'center_lon', 'radius_km', 'polygon'])
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometers"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def point_in_polygon(lat, lon, polygon):
+    """Ray casting test for a point inside a [(lat, lon), ...] polygon"""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        lat_i, lon_i = polygon[i]
+        lat_j, lon_j = polygon[j]
+        if (lat_i > lat) != (lat_j > lat):
+            crossing_lon = lon_i + (lat - lat_i) * (lon_j - lon_i) / (lat_j - lat_i)
+            if lon < crossing_lon:
+                inside = not inside
+        j = i
+    return inside
+
+
+def area_from_row(row):
+    """Build an Area from a subscriber_areas row"""
+    polygon = json.loads(row['polygon']) if row['polygon'] else None
+    return Area(row['email'], row['area_type'], row['corridor'], row['center_lat'],
+                row['center_lon'], row['radius_km'], polygon)
+
+
+class GeofenceIndex:
+    """In-memory grid index over subscriber areas of interest"""
+
+    def __init__(self, areas, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.corridors = defaultdict(set)
+        self.grid = defaultdict(list)
+        # Subscribers with at least one area only receive incidents inside their areas
+        self.restricted = set()
+
+        for area in areas:
+            self.restricted.add(area.email)
+            if area.area_type == 'corridor':
+                self.corridors[area.corridor].add(area.email)
+            else:
+                for cell in self._cells_for(area):
+                    self.grid[cell].append(area)
+
+    def _cell(self, lat, lon):
+        return (int(math.floor(lat / self.cell_size)), int(math.floor(lon / self.cell_size)))
+
+    def _bounds(self, area):
+        """Bounding box (min_lat, min_lon, max_lat, max_lon) of a radius or polygon area"""
+        if area.area_type == 'radius':
+            dlat = area.radius_km / 111.0
+            dlon = area.radius_km / (111.0 * max(math.cos(math.radians(area.center_lat)), 0.01))
+            return (area.center_lat - dlat, area.center_lon - dlon,
+                    area.center_lat + dlat, area.center_lon + dlon)
+        lats = [point[0] for point in area.polygon]
+        lons = [point[1] for point in area.polygon]
+        return (min(lats), min(lons), max(lats), max(lons))
+
+    def _cells_for(self, area):
+        min_lat, min_lon, max_lat, max_lon = self._bounds(area)
+        low = self._cell(min_lat, min_lon)
+        high = self._cell(max_lat, max_lon)
+        for x in range(low[0], high[0] + 1):
+            for y in range(low[1], high[1] + 1):
+                yield (x, y)
+
+    def _contains(self, area, lat, lon):
+        if area.area_type == 'radius':
+            return haversine_km(area.center_lat, area.center_lon, lat, lon) <= area.radius_km
+        return point_in_polygon(lat, lon, area.polygon)
+
+    def match(self, lat=None, lon=None, corridor=None):
+        """Emails whose areas of interest contain the incident"""
+        matched = set(self.corridors.get(corridor, ())) if corridor else set()
+        if lat is not None and lon is not None:
+            for area in self.grid.get(self._cell(lat, lon), ()):
+                if area.email not in matched and self._contains(area, lat, lon):
+                    matched.add(area.email)
+        return matched
+
+    def recipients_for(self, incident, emails):
+        """Filter a subscriber list down to those who should receive an incident"""
+        if not self.restricted:
+            return list(emails)
+        # A corridor centroid says nothing about where on a 40 km corridor it happened
+        if incident.geocode_source in PRECISE_SOURCES:
+            matched = self.match(incident.lat, incident.lon, incident.corridor)
+        else:
+            matched = self.match(corridor=incident.corridor)
+        return [email for email in emails if email not in self.restricted or email in matched]
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Local HTTP receiver for channel and webhook tests
+
+Accepts POSTs on any path and keeps them in memory. Queued status codes
+let tests fail the next requests (503s, 500s) before it goes back to 200,
+and an optional delay simulates a slow endpoint.
+
+    python http_sink.py [port]
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SinkRequest = namedtuple('SinkRequest', ['path', 'headers', 'body'])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        sink = self.server.sink
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if sink.delay:
+            time.sleep(sink.delay)
+        status = sink.next_status()
+        if status < 300:
+            sink.record(SinkRequest(self.path, dict(self.headers), body))
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HTTPSink:
+    """Threaded HTTP server on localhost that stores every POST it accepts"""
+
+    def __init__(self, host='127.0.0.1', port=0, delay=0.0, statuses=()):
+        self.delay = delay
+        self.statuses = list(statuses)
+        self.requests = []
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.sink = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/hook"
+
+    def next_status(self):
+        """Status for the next request: queued failures first, then 200"""
+        with self._lock:
+            return self.statuses.pop(0) if self.statuses else 200
+
+    def record(self, request):
+        with self._lock:
+            self.requests.append(request)
+
+    def payloads(self):
+        with self._lock:
+            return [json.loads(request.body) for request in self.requests]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8099
+    sink = HTTPSink(port=port)
+    print(f"📭 HTTP sink listening on {sink.url}")
+    try:
+        sink.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📬 Received {len(sink.requests)} requests")
+        sink.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Histogram buckets in seconds, sized for scrape cycles that normally take well under a second
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels[name] for name in self.labelnames), 0)
+
+    def collect(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0)]
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    """Histogram of observed durations with optional labels"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        series = self._series.get(tuple(labels[name] for name in self.labelnames))
+        return series[2] if series else 0
+
+    def sum(self, **labels):
+        series = self._series.get(tuple(labels[name] for name in self.labelnames))
+        return series[1] if series else 0.0
+
+    def collect(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((key, (list(series[0]), series[1], series[2])) for key, series in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(float(bound))))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together in Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Content type expected by Prometheus for the text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+SCRAPE_STAGE_SECONDS = REGISTRY.histogram(
+    'scrape_stage_seconds', 'Time spent in each stage of a scrape cycle (exclusive of nested stages)', ['stage'])
+SCRAPE_CYCLE_SECONDS = REGISTRY.histogram('scrape_cycle_seconds', 'Total duration of a scrape cycle')
+ROWS_SEEN = REGISTRY.counter('scrape_rows_seen_total', 'Candidate table rows seen on TranStar')
+ROWS_RELEVANT = REGISTRY.counter('scrape_rows_relevant_total', 'Rows that passed the relevance filter')
+NEW_INCIDENTS = REGISTRY.counter('scrape_new_incidents_total', 'New incidents saved for alerting')
+EMAILS_SENT = REGISTRY.counter('alert_emails_sent_total', 'Alert emails sent', ['template'])
+SMTP_ERRORS = REGISTRY.counter('alert_smtp_errors_total', 'SMTP failures while sending alerts')
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_seconds', 'Latency of each outbound HTTP attempt (TranStar or a channel) by outcome',
+    ['target', 'outcome'])
+HTTP_RETRIES = REGISTRY.counter('http_retries_total', 'HTTP attempts retried after a failure', ['target'])
+CIRCUIT_OPENED = REGISTRY.counter('http_circuit_opened_total', 'Times a circuit breaker opened', ['target'])
+CHANNEL_SEND_SECONDS = REGISTRY.histogram(
+    'channel_send_seconds', 'Time to push one batch of incidents to a notification channel, retries included',
+    ['channel', 'outcome'])
+
+
+class StageTimer:
+    """Accumulates per-stage time for one cycle; nested stages are subtracted from their parent"""
+
+    def __init__(self, histogram=SCRAPE_STAGE_SECONDS):
+        self.histogram = histogram
+        self.totals = {}
+        # Nesting is tracked per thread so pipelined stages can share one timer
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        stack = self._local.__dict__.setdefault('stack', [])
+        start = time.perf_counter()
+        stack.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            with self._lock:
+                self.totals[name] = self.totals.get(name, 0.0) + elapsed - nested
+            if stack:
+                stack[-1] += elapsed
+
+    def observe(self):
+        """Record this cycle's stage totals in the histogram"""
+        for name, total in self.totals.items():
+            self.histogram.observe(total, stage=name)
@@ -1,10 +1,16 @@
 import sqlite3
 import hashlib
+import json
 import os
+import time
 from datetime import datetime
-import pytz
 from werkzeug.security import generate_password_hash, check_password_hash
 from config import Config
+from classification import Classification, classify_incident
+from geocode import Geocoder, maps_link
+from rules import Rule, rule_from_row
+from subscriber_io import is_valid_email, chunked
+from timeparse import central_tz, incident_timestamp
 
 class Database:
     def __init__(self, db_path=None):
@@ -43,6 +49,10 @@ class Database:
             )
         ''')
         
+        # Classification columns added after the original schema
+        self._migrate_incident_columns(cursor)
+        self._create_incident_search(cursor)
+        
         # Create subscribers table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS subscribers (
@@ -52,16 +62,99 @@ class Database:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        # Admin listing filtered by status, in email order (the UNIQUE index serves the unfiltered one)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_subscribers_active_email ON subscribers (active, email)')
         
-        # Create hazmat_subscribers table (for hazmat/spill-only alerts)
+        # Create subscription_rules table (hazmat subscribers are 'hazmat' template rules)
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS hazmat_subscribers (
+            CREATE TABLE IF NOT EXISTS subscription_rules (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email TEXT UNIQUE NOT NULL,
+                email TEXT NOT NULL,
+                categories TEXT,
+                min_severity INTEGER DEFAULT 1,
+                corridors TEXT,
+                start_minute INTEGER,
+                end_minute INTEGER,
+                template TEXT DEFAULT 'standard',
                 active BOOLEAN DEFAULT 1,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_subscription_rules_email ON subscription_rules (email)')
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_subscription_rules_hazmat
+            ON subscription_rules (email) WHERE template = 'hazmat'
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_subscription_rules_hazmat_active
+            ON subscription_rules (active, email) WHERE template = 'hazmat'
+        ''')
+        self._migrate_hazmat_subscribers(cursor)
+        
+        # Create geocode_cache table (resolved corridor/cross street coordinates)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS geocode_cache (
+                location_key TEXT PRIMARY KEY,
+                lat REAL,
+                lon REAL,
+                source TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Create subscriber_areas table (per-subscriber areas of interest)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS subscriber_areas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                email TEXT NOT NULL,
+                area_type TEXT NOT NULL,
+                label TEXT,
+                corridor TEXT,
+                center_lat REAL,
+                center_lon REAL,
+                radius_km REAL,
+                polygon TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_subscriber_areas_email ON subscriber_areas (email)')
+        
+        # Create scrape_events table (structured scrape log spilled from the in-memory ring buffer)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scrape_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts REAL NOT NULL,
+                level TEXT NOT NULL,
+                message TEXT NOT NULL,
+                cycle_id TEXT,
+                stage TEXT,
+                duration_ms REAL,
+                counts TEXT
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_scrape_events_ts ON scrape_events (ts)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_scrape_events_cycle ON scrape_events (cycle_id, ts)')
+        
+        # Incident counts by corridor, category and Central Time weekday/hour (kept current by analytics.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS incident_heatmap (
+                corridor TEXT NOT NULL,
+                category TEXT NOT NULL,
+                weekday INTEGER NOT NULL,
+                hour INTEGER NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (corridor, category, weekday, hour)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS incident_hotspots (
+                corridor TEXT NOT NULL,
+                cross_street TEXT NOT NULL,
+                category TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (corridor, cross_street, category)
+            )
+        ''')
         
         # Create sent_alerts table
         cursor.execute('''
@@ -72,8 +165,57 @@ class Database:
                 FOREIGN KEY (incident_id) REFERENCES incidents (id)
             )
         ''')
-
-
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sent_alerts_incident ON sent_alerts (incident_id)')
+        
+        # Transactional outbox: one row per recipient x incident, written before any mail goes out.
+        # Rows for other notification channels (channels.py) keep the channel's recipient in email.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS alert_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT UNIQUE NOT NULL,
+                incident_id INTEGER NOT NULL,
+                channel TEXT NOT NULL DEFAULT 'email',
+                email TEXT NOT NULL,
+                template TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending'
+                    CHECK (state IN ('pending', 'sending', 'sent', 'failed')),
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (incident_id) REFERENCES incidents (id)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_alert_outbox_incident ON alert_outbox (incident_id, state)')
+        cursor.execute('PRAGMA table_info(alert_outbox)')
+        outbox_columns = {row[1] for row in cursor.fetchall()}
+        if 'channel' not in outbox_columns:
+            cursor.execute("ALTER TABLE alert_outbox ADD COLUMN channel TEXT NOT NULL DEFAULT 'email'")
+        if 'next_attempt_at' not in outbox_columns:
+            # Unix time before which a released channel delivery is not retried (exponential backoff)
+            cursor.execute('ALTER TABLE alert_outbox ADD COLUMN next_attempt_at REAL')
+        # Email keys of other templates used to leave the template out, colliding with standard ones
+        cursor.execute('''
+            UPDATE alert_outbox SET idempotency_key = idempotency_key || ':' || template
+            WHERE channel = 'email' AND template != 'standard' AND idempotency_key = incident_id || ':' || email
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_alert_outbox_state ON alert_outbox (state)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_alert_outbox_channel ON alert_outbox (channel, state)')
+        
+        # Webhook endpoints managed from the admin UI/API; each is its own channel ('webhook:<id>')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS webhook_subscriptions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT UNIQUE NOT NULL,
+                url TEXT NOT NULL,
+                secret TEXT NOT NULL,
+                categories TEXT,
+                min_severity INTEGER DEFAULT 1,
+                corridors TEXT,
+                active BOOLEAN DEFAULT 1,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
         
         # Create admin_users table
         cursor.execute('''
@@ -135,16 +277,184 @@ class Database:
         ]
         
         for email in default_hazmat_subscribers:
-            cursor.execute('SELECT COUNT(*) FROM hazmat_subscribers WHERE email = ?', (email,))
+            cursor.execute("SELECT COUNT(*) FROM subscription_rules WHERE email = ? AND template = 'hazmat'", (email,))
             if cursor.fetchone()[0] == 0:
                 cursor.execute(
-                    'INSERT INTO hazmat_subscribers (email, active) VALUES (?, 1)',
-                    (email,)
+                    "INSERT INTO subscription_rules (email, categories, template) VALUES (?, ?, 'hazmat')",
+                    (email, ','.join(HAZMAT_CATEGORIES))
                 )
                 print(f"Added default hazmat subscriber: {email}")
         
         conn.commit()
         conn.close()
+        
+        # Classify and geocode rows stored before those columns existed
+        Incident.backfill_classification(self)
+        Incident.backfill_timestamps(self)
+        Geocoder(self).backfill_incidents()
+    
+    def _migrate_hazmat_subscribers(self, cursor):
+        """Move rows from the old hazmat_subscribers table into subscription rules"""
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'hazmat_subscribers'")
+        if not cursor.fetchone():
+            return
+        
+        cursor.execute('''
+            INSERT OR IGNORE INTO subscription_rules (email, categories, template, active, created_at)
+            SELECT email, ?, 'hazmat', active, created_at FROM hazmat_subscribers
+        ''', (','.join(HAZMAT_CATEGORIES),))
+        migrated = cursor.rowcount
+        cursor.execute('DROP TABLE hazmat_subscribers')
+        print(f"Migrated {migrated} hazmat subscribers to subscription rules")
+    
+    def _migrate_incident_columns(self, cursor):
+        """Add classification and coordinate columns and indexes to the incidents table"""
+        cursor.execute('PRAGMA table_info(incidents)')
+        existing_columns = {row[1] for row in cursor.fetchall()}
+        
+        for column, column_type in INCIDENT_CLASSIFICATION_COLUMNS + INCIDENT_GEOCODE_COLUMNS + INCIDENT_TIME_COLUMNS:
+            if column not in existing_columns:
+                cursor.execute(f'ALTER TABLE incidents ADD COLUMN {column} {column_type}')
+        
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_incidents_scraped_at ON incidents (scraped_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_incidents_category ON incidents (category, scraped_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_incidents_corridor ON incidents (corridor, scraped_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_incidents_table_type ON incidents (table_type)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_incidents_ts ON incidents (incident_ts)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_incidents_corridor_ts ON incidents (corridor, incident_ts)')
+    
+    def _create_incident_search(self, cursor):
+        """FTS5 index over incident location and description, kept in sync by triggers"""
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'incidents_fts'")
+        exists = cursor.fetchone() is not None
+        
+        # External content: the index stores only tokens, the text stays in incidents
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS incidents_fts USING fts5(
+                location, description, content='incidents', content_rowid='id'
+            )
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS incidents_fts_insert AFTER INSERT ON incidents BEGIN
+                INSERT INTO incidents_fts (rowid, location, description)
+                VALUES (new.id, new.location, new.description);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS incidents_fts_delete AFTER DELETE ON incidents BEGIN
+                INSERT INTO incidents_fts (incidents_fts, rowid, location, description)
+                VALUES ('delete', old.id, old.location, old.description);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS incidents_fts_update AFTER UPDATE OF location, description ON incidents BEGIN
+                INSERT INTO incidents_fts (incidents_fts, rowid, location, description)
+                VALUES ('delete', old.id, old.location, old.description);
+                INSERT INTO incidents_fts (rowid, location, description)
+                VALUES (new.id, new.location, new.description);
+            END
+        ''')
+        
+        if not exists:
+            cursor.execute("INSERT INTO incidents_fts (incidents_fts) VALUES ('rebuild')")
+
+# (subscriptions version, counts) per subscriber list, recounted only after a subscription change
+_list_counts = {}
+
+def email_prefix_bounds(prefix):
+    """[low, high) email range for a lowercase prefix, so the email index serves prefix search"""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def email_page(db, table, condition=None, prefix=None, active=None, after=None, limit=50):
+    """Keyset page of (id, email, active, created_at) rows in email order, plus the next page's after"""
+    clauses, params = [condition] if condition else [], []
+    prefix = (prefix or '').strip().lower()
+    if prefix:
+        clauses.append('email >= ? AND email < ?')
+        params.extend(email_prefix_bounds(prefix))
+    if active is not None:
+        clauses.append('active = ?')
+        params.append(int(active))
+    if after:
+        clauses.append('email > ?')
+        params.append(after)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT id, email, active, created_at FROM {table}
+        {where}
+        ORDER BY email
+        LIMIT ?
+    ''', params + [limit + 1])
+    rows = cursor.fetchall()
+    conn.close()
+    
+    # One extra row says whether there is a next page without counting the rest
+    next_after = rows[limit - 1]['email'] if len(rows) > limit else None
+    return rows[:limit], next_after
+
+def cached_list_counts(db, table, condition=None):
+    """{'total', 'active'} for a subscriber list, cached until SubscriptionRule.bump_version"""
+    version = SubscriptionRule.get_version(db)
+    key = (db.db_path, table, condition)
+    cached = _list_counts.get(key)
+    if cached is None or cached[0] != version:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT count(*), coalesce(sum(active), 0) FROM {table}
+            {'WHERE ' + condition if condition else ''}
+        ''')
+        total, active = cursor.fetchone()
+        conn.close()
+        cached = _list_counts[key] = (version, {'total': total, 'active': active})
+    return cached[1]
+
+# Newest text matches ranked by Incident.search; older hits are reachable by narrowing since/until
+SEARCH_CANDIDATES = 2000
+
+def fts_match_expression(query):
+    """FTS5 MATCH expression for free text: every word must match, a trailing * makes it a prefix"""
+    terms = []
+    for term in query.split():
+        prefix = term.endswith('*')
+        term = term.rstrip('*')
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"' + ('*' if prefix else ''))
+    return ' '.join(terms) or None
+
+# Categories delivered to hazmat subscribers
+HAZMAT_CATEGORIES = ['hazmat', 'spill']
+# Matches the partial indexes on subscription_rules, so hazmat listings can use them
+HAZMAT_TEMPLATE_CONDITION = "template = 'hazmat'"
+STANDARD_TEMPLATE_CONDITION = "template = 'standard'"
+
+# Classification columns stored on incidents (name, SQL type)
+INCIDENT_CLASSIFICATION_COLUMNS = [
+    ('category', 'TEXT'),
+    ('is_wreck', 'INTEGER DEFAULT 0'),
+    ('is_stall', 'INTEGER DEFAULT 0'),
+    ('is_spill', 'INTEGER DEFAULT 0'),
+    ('is_hazmat', 'INTEGER DEFAULT 0'),
+    ('corridor', 'TEXT'),
+    ('direction', 'TEXT'),
+    ('cross_street', 'TEXT'),
+    ('table_type', 'TEXT'),
+]
+
+# Incident time as Central Time epoch seconds; incident_time keeps the display string
+INCIDENT_TIME_COLUMNS = [
+    ('incident_ts', 'INTEGER'),
+]
+
+# Coordinate columns stored on incidents (name, SQL type)
+INCIDENT_GEOCODE_COLUMNS = [
+    ('lat', 'REAL'),
+    ('lon', 'REAL'),
+    ('geocode_source', 'TEXT'),
+]
 
 class Settings:
     @staticmethod
@@ -186,14 +496,62 @@ class Settings:
         Settings.set_setting(db, 'include_stalls', value)
 
 class Incident:
-    def __init__(self, location, description, incident_time=None, severity=1):
+    # Slots keep each parsed incident to one small allocation instead of an object plus its __dict__
+    __slots__ = ('location', 'description', 'incident_time', 'incident_ts', 'severity', '_incident_hash',
+                 'category', 'is_wreck', 'is_stall', 'is_spill', 'is_hazmat',
+                 'corridor', 'direction', 'cross_street', 'table_type',
+                 'lat', 'lon', 'geocode_source')
+    
+    def __init__(self, location, description, incident_time=None, severity=1, classification=None, incident_ts=None):
         self.location = location
         self.description = description
         # Use Central Time for incident time
-        central_tz = pytz.timezone('America/Chicago')
         self.incident_time = incident_time or datetime.now(central_tz).strftime('%I:%M %p')
+        self.incident_ts = incident_ts if incident_ts is not None else incident_timestamp(self.incident_time)
         self.severity = severity
-        self.incident_hash = self._generate_hash()
+        self._incident_hash = None
+
+        # Classification is computed once at ingest and stored with the row
+        if classification is None:
+            classification = classify_incident(location, description)
+        self.category = classification.category
+        self.is_wreck = classification.is_wreck
+        self.is_stall = classification.is_stall
+        self.is_spill = classification.is_spill
+        self.is_hazmat = classification.is_hazmat
+        self.corridor = classification.corridor
+        self.direction = classification.direction
+        self.cross_street = classification.cross_street
+        self.table_type = classification.table_type
+        
+        # Coordinates are filled in by the geocoder before saving
+        self.lat = None
+        self.lon = None
+        self.geocode_source = None
+    
+    @staticmethod
+    def from_row(row):
+        """Rebuild a saved incident, with its stored classification and coordinates, from an incidents row"""
+        classification = Classification(row['category'], bool(row['is_wreck']), bool(row['is_stall']),
+                                        bool(row['is_spill']), bool(row['is_hazmat']), True, row['corridor'],
+                                        row['direction'], row['cross_street'], row['table_type'], row['severity'])
+        incident = Incident(row['location'], row['description'], row['incident_time'], row['severity'],
+                            classification, row['incident_ts'])
+        incident._incident_hash = row['incident_hash']
+        incident.lat, incident.lon, incident.geocode_source = row['lat'], row['lon'], row['geocode_source']
+        return incident
+    
+    @property
+    def maps_link(self):
+        """Google Maps link for this incident"""
+        return maps_link(self.location, self.lat, self.lon, self.geocode_source)
+    
+    @property
+    def incident_hash(self):
+        """Deduplication hash, computed on first use"""
+        if self._incident_hash is None:
+            self._incident_hash = self._generate_hash()
+        return self._incident_hash
     
     def _generate_hash(self):
         """Generate unique hash for incident deduplication"""
@@ -217,9 +575,16 @@ class Incident:
         
         try:
             cursor.execute('''
-                INSERT INTO incidents (incident_hash, location, description, incident_time, severity)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (self.incident_hash, self.location, self.description, self.incident_time, self.severity))
+                INSERT INTO incidents (incident_hash, location, description, incident_time, incident_ts, severity,
+                                       category, is_wreck, is_stall, is_spill, is_hazmat,
+                                       corridor, direction, cross_street, table_type,
+                                       lat, lon, geocode_source)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (self.incident_hash, self.location, self.description, self.incident_time, self.incident_ts,
+                  self.severity,
+                  self.category, int(self.is_wreck), int(self.is_stall), int(self.is_spill), int(self.is_hazmat),
+                  self.corridor, self.direction, self.cross_street, self.table_type,
+                  self.lat, self.lon, self.geocode_source))
             
             incident_id = cursor.lastrowid
             conn.commit()
@@ -230,6 +595,19 @@ class Incident:
             conn.close()
             return None
     
+    @staticmethod
+    def get_many(db, incident_ids, chunk_size=500):
+        """Incident rows for a list of ids, in id order"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        rows = []
+        for chunk in chunked(sorted(incident_ids), chunk_size):
+            cursor.execute(f"SELECT * FROM incidents WHERE id IN ({', '.join('?' * len(chunk))}) ORDER BY id", chunk)
+            rows.extend(cursor.fetchall())
+        conn.close()
+        return rows
+    
     @staticmethod
     def get_recent(db, hours=24):
         """Get recent incidents"""
@@ -247,20 +625,254 @@ class Incident:
         return incidents
     
     @staticmethod
-    def is_already_sent(db, incident_hash):
-        """Check if alert was already sent for this incident"""
+    def get_recent_by_category(db, hours=24):
+        """Get recent incidents grouped by stored category flags"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        since = f'-{int(hours)} hours'
+        groups = {}
+        queries = {
+            'wrecks': 'is_wreck = 1',
+            'stalls': 'is_stall = 1',
+            'spills': '(is_spill = 1 OR is_hazmat = 1)',
+            'other': 'is_wreck = 0 AND is_stall = 0 AND is_spill = 0 AND is_hazmat = 0',
+        }
+        for group, condition in queries.items():
+            cursor.execute(f'''
+                SELECT * FROM incidents
+                WHERE scraped_at > datetime('now', ?) AND {condition}
+                ORDER BY scraped_at DESC
+            ''', (since,))
+            groups[group] = cursor.fetchall()
+        
+        conn.close()
+        return groups
+    
+    @staticmethod
+    def filter_hazmat_ids(db, incident_ids):
+        """Return the subset of incident ids classified as hazmat or spill"""
+        if not incident_ids:
+            return set()
+        
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        placeholders = ', '.join('?' for _ in incident_ids)
+        cursor.execute(f'''
+            SELECT id FROM incidents
+            WHERE id IN ({placeholders}) AND (is_hazmat = 1 OR is_spill = 1)
+        ''', list(incident_ids))
+        
+        hazmat_ids = {row[0] for row in cursor.fetchall()}
+        conn.close()
+        return hazmat_ids
+    
+    @staticmethod
+    def backfill_classification(db, batch_size=500):
+        """Classify stored incidents that predate the classification columns"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        total = 0
+        
+        while True:
+            cursor.execute('''
+                SELECT id, location, description FROM incidents
+                WHERE category IS NULL
+                LIMIT ?
+            ''', (batch_size,))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            
+            updates = []
+            for row in rows:
+                c = classify_incident(row['location'], row['description'])
+                updates.append((c.category, int(c.is_wreck), int(c.is_stall), int(c.is_spill),
+                                int(c.is_hazmat), c.corridor, c.direction, c.cross_street, c.table_type, row['id']))
+            
+            cursor.executemany('''
+                UPDATE incidents
+                SET category = ?, is_wreck = ?, is_stall = ?, is_spill = ?, is_hazmat = ?,
+                    corridor = ?, direction = ?, cross_street = ?, table_type = ?
+                WHERE id = ?
+            ''', updates)
+            conn.commit()
+            total += len(updates)
+        
+        conn.close()
+        if total:
+            print(f"Backfilled classification for {total} incidents")
+        return total
+    
+    @staticmethod
+    def backfill_timestamps(db, batch_size=500):
+        """Fill incident_ts for stored incidents from their time string and when they were scraped"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        total = 0
+        
+        while True:
+            cursor.execute('''
+                SELECT id, incident_time, CAST(strftime('%s', scraped_at) AS INTEGER) AS scraped_ts FROM incidents
+                WHERE incident_ts IS NULL
+                LIMIT ?
+            ''', (batch_size,))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            
+            updates = []
+            for row in rows:
+                scraped = datetime.fromtimestamp(row['scraped_ts'] or 0, central_tz)
+                updates.append((incident_timestamp(row['incident_time'], scraped), row['id']))
+            
+            cursor.executemany('UPDATE incidents SET incident_ts = ? WHERE id = ?', updates)
+            conn.commit()
+            total += len(updates)
+        
+        conn.close()
+        if total:
+            print(f"Backfilled timestamps for {total} incidents")
+        return total
+    
+    @staticmethod
+    def get_in_range(db, start_ts, end_ts=None):
+        """Incidents whose incident_ts falls in [start_ts, end_ts), newest first"""
         conn = db.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT sa.id FROM sent_alerts sa
-            JOIN incidents i ON sa.incident_id = i.id
-            WHERE i.incident_hash = ?
-        ''', (incident_hash,))
+            SELECT * FROM incidents
+            WHERE incident_ts >= ? AND incident_ts < ?
+            ORDER BY incident_ts DESC
+        ''', (start_ts, end_ts if end_ts is not None else 2 ** 62))
         
-        result = cursor.fetchone()
+        incidents = cursor.fetchall()
+        conn.close()
+        return incidents
+    
+    @staticmethod
+    def iter_range(db, start_ts=None, end_ts=None, chunk_size=1000):
+        """Incidents whose incident_ts falls in [start_ts, end_ts), oldest first, in lists of chunk_size rows
+        
+        Every chunk is its own keyset query on idx_incidents_ts, so no read lock is
+        held while the caller works through a chunk and a slow consumer never blocks
+        the scraper's writes.
+        """
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        # (incident_ts, id) > (start_ts, -1) is incident_ts >= start_ts for the first chunk
+        position = (start_ts if start_ts is not None else -2 ** 62, -1)
+        end_ts = end_ts if end_ts is not None else 2 ** 62
+        
+        try:
+            while True:
+                cursor.execute('''
+                    SELECT * FROM incidents
+                    WHERE (incident_ts, id) > (?, ?) AND incident_ts < ?
+                    ORDER BY incident_ts, id
+                    LIMIT ?
+                ''', position + (end_ts, chunk_size))
+                chunk = cursor.fetchall()
+                if not chunk:
+                    break
+                yield chunk
+                if len(chunk) < chunk_size:
+                    break
+                position = (chunk[-1]['incident_ts'], chunk[-1]['id'])
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def search(db, query=None, corridor=None, min_severity=None, since=None, until=None, after=None, limit=50):
+        """Filtered incident search, best BM25 match first (newest first without a query)
+        
+        after is the (score, id) or (incident_ts, id) of the previous page's last row.
+        """
+        clauses, params = [], []
+        if corridor:
+            clauses.append('i.corridor = ?')
+            params.append(corridor)
+        if min_severity is not None:
+            clauses.append('i.severity >= ?')
+            params.append(min_severity)
+        if since is not None:
+            clauses.append('i.incident_ts >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('i.incident_ts < ?')
+            params.append(until)
+        
+        match = fts_match_expression(query) if query else None
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        if match:
+            incidents = Incident._search_text(cursor, match, clauses, params, since, until, after, limit)
+        else:
+            if after:
+                clauses.append('(i.incident_ts, i.id) < (?, ?)')
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+            cursor.execute(f'''
+                SELECT i.*, NULL AS score FROM incidents i
+                {where}
+                ORDER BY i.incident_ts DESC, i.id DESC
+                LIMIT ?
+            ''', params + list(after or ()) + [limit])
+            incidents = cursor.fetchall()
         conn.close()
-        return result is not None
+        return incidents
+    
+    @staticmethod
+    def _search_text(cursor, match, clauses, params, since, until, after, limit):
+        """BM25-ranked page from the newest SEARCH_CANDIDATES matches of an FTS5 expression"""
+        clauses = clauses + ['incidents_fts MATCH ?']
+        params = params + [match]
+        
+        # ids grow with scrape time, so a time range also bounds the rowids the index walks
+        # (+id keeps min/max on idx_incidents_ts instead of scanning the table in id order)
+        if since is not None:
+            cursor.execute('SELECT min(+id) FROM incidents WHERE incident_ts >= ?', (since,))
+            clauses.append('incidents_fts.rowid >= ?')
+            params.append(cursor.fetchone()[0])
+        if until is not None:
+            cursor.execute('SELECT max(+id) FROM incidents WHERE incident_ts < ?', (until,))
+            clauses.append('incidents_fts.rowid <= ?')
+            params.append(cursor.fetchone()[0])
+        where = ' AND '.join(clauses)
+        
+        # BM25 scores every hit it is given, so a common word over a long history would rank
+        # hundreds of thousands of rows; rank only the newest candidates instead
+        cursor.execute(f'''
+            SELECT min(id) FROM (
+                SELECT i.id FROM incidents_fts JOIN incidents i ON i.id = incidents_fts.rowid
+                WHERE {where}
+                ORDER BY incidents_fts.rowid DESC
+                LIMIT ?
+            )
+        ''', params + [SEARCH_CANDIDATES])
+        floor = cursor.fetchone()[0]
+        if floor is None:
+            return []
+        
+        cursor.execute(f'''
+            SELECT * FROM (
+                SELECT i.*, bm25(incidents_fts) AS score
+                FROM incidents_fts JOIN incidents i ON i.id = incidents_fts.rowid
+                WHERE {where} AND incidents_fts.rowid >= ?
+            )
+            {'WHERE (score, id) > (?, ?)' if after else ''}
+            ORDER BY score, id
+            LIMIT ?
+        ''', params + [floor] + list(after or ()) + [limit])
+        return cursor.fetchall()
+    
+    @staticmethod
+    def search_cursor(row):
+        """The after value continuing a search past row: (score, id) for text matches, else (incident_ts, id)"""
+        # Keyed on the row, not the query: a query of only '*' or '"' builds no MATCH and pages by time
+        return (row['score'] if row['score'] is not None else row['incident_ts'], row['id'])
+    
 
 class Subscriber:
     @staticmethod
@@ -273,6 +885,7 @@ class Subscriber:
             cursor.execute('INSERT INTO subscribers (email) VALUES (?)', (email,))
             conn.commit()
             conn.close()
+            SubscriptionRule.bump_version(db)
             return True
         except sqlite3.IntegrityError:
             conn.close()
@@ -286,8 +899,13 @@ class Subscriber:
         
         cursor.execute('DELETE FROM subscribers WHERE email = ?', (email,))
         affected = cursor.rowcount
+        # Standard rules belong to the subscriber; hazmat-only rules stand on their own
+        cursor.execute(f"DELETE FROM subscription_rules WHERE email = ? AND {STANDARD_TEMPLATE_CONDITION}", (email,))
         conn.commit()
         conn.close()
+        
+        if affected:
+            SubscriptionRule.bump_version(db)
         return affected > 0
     
     @staticmethod
@@ -322,24 +940,254 @@ class Subscriber:
         affected = cursor.rowcount
         conn.commit()
         conn.close()
+        
+        if affected:
+            SubscriptionRule.bump_version(db)
         return affected > 0
+    
+    @staticmethod
+    def page(db, prefix=None, active=None, after=None, limit=50):
+        """Keyset page of subscribers in email order, and the email to continue after (None on the last page)"""
+        return email_page(db, 'subscribers', None, prefix, active, after, limit)
+    
+    @staticmethod
+    def counts(db):
+        """Total and active subscribers, cached until subscriptions change"""
+        return cached_list_counts(db, 'subscribers')
+    
+    @staticmethod
+    def _existing(cursor, emails):
+        """Which of a chunk of addresses are already subscribers"""
+        if not emails:
+            return set()
+        cursor.execute(f"SELECT email FROM subscribers WHERE email IN ({', '.join('?' * len(emails))})", emails)
+        return {row[0] for row in cursor.fetchall()}
+    
+    @staticmethod
+    def add_many(db, rows, chunk_size=500):
+        """Import (line, email, active) rows in one transaction
+        
+        Returns (line, email, outcome) per row, outcome being 'added', 'exists',
+        'duplicate' (repeated earlier in the import) or 'invalid'. Rows are
+        validated and inserted a chunk at a time, with one executemany per chunk.
+        """
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        results = []
+        seen = set()
+        added = 0
+        
+        try:
+            for chunk in chunked(rows, chunk_size):
+                normalized = [(line, email.strip().lower(), active) for line, email, active in chunk]
+                candidates = [email for _, email, _ in normalized if is_valid_email(email) and email not in seen]
+                existing = Subscriber._existing(cursor, sorted(set(candidates)))
+                
+                inserts = []
+                for line, email, active in normalized:
+                    if not is_valid_email(email):
+                        outcome = 'invalid'
+                    elif email in seen:
+                        outcome = 'duplicate'
+                    elif email in existing:
+                        outcome = 'exists'
+                    else:
+                        outcome = 'added'
+                        inserts.append((email, int(active)))
+                    seen.add(email)
+                    results.append((line, email, outcome))
+                
+                cursor.executemany('INSERT INTO subscribers (email, active) VALUES (?, ?)', inserts)
+                added += len(inserts)
+            conn.commit()
+        finally:
+            conn.close()
+        
+        if added:
+            SubscriptionRule.bump_version(db)
+        return results
+    
+    @staticmethod
+    def update_many(db, action, emails, chunk_size=500):
+        """Apply 'activate', 'deactivate', 'toggle' or 'remove' to many subscribers in one transaction
+        
+        Returns (email, outcome) per address: 'updated', 'removed', 'not_found' or
+        'duplicate' (repeated earlier in the list, so not toggled twice).
+        """
+        statements = {
+            'activate': 'UPDATE subscribers SET active = 1 WHERE email = ?',
+            'deactivate': 'UPDATE subscribers SET active = 0 WHERE email = ?',
+            'toggle': 'UPDATE subscribers SET active = NOT active WHERE email = ?',
+            'remove': 'DELETE FROM subscribers WHERE email = ?',
+        }
+        if action not in statements:
+            raise ValueError(f"Unknown subscriber action: {action}")
+        done = 'removed' if action == 'remove' else 'updated'
+        
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        results = []
+        seen = set()
+        changed = 0
+        
+        try:
+            for chunk in chunked(emails, chunk_size):
+                chunk = [email.strip().lower() for email in chunk]
+                existing = Subscriber._existing(cursor, sorted(set(chunk) - seen))
+                targets = []
+                for email in chunk:
+                    if email in seen:
+                        outcome = 'duplicate'
+                    elif email in existing:
+                        outcome = done
+                        targets.append((email,))
+                    else:
+                        outcome = 'not_found'
+                    seen.add(email)
+                    results.append((email, outcome))
+                cursor.executemany(statements[action], targets)
+                if action == 'remove':
+                    cursor.executemany(f"DELETE FROM subscription_rules WHERE email = ? AND {STANDARD_TEMPLATE_CONDITION}",
+                                       targets)
+                changed += len(targets)
+            conn.commit()
+        finally:
+            conn.close()
+        
+        if changed:
+            SubscriptionRule.bump_version(db)
+        return results
+    
+    @staticmethod
+    def exists(db, email):
+        """Whether an address is a subscriber, active or not"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT 1 FROM subscribers WHERE email = ?', (email,))
+        found = cursor.fetchone() is not None
+        conn.close()
+        return found
+    
+    @staticmethod
+    def iter_all(db, chunk_size=1000):
+        """Every subscriber oldest first, in lists of chunk_size rows (one keyset query per chunk)"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        last_id = 0
+        
+        try:
+            while True:
+                cursor.execute('SELECT * FROM subscribers WHERE id > ? ORDER BY id LIMIT ?', (last_id, chunk_size))
+                chunk = cursor.fetchall()
+                if not chunk:
+                    break
+                yield chunk
+                if len(chunk) < chunk_size:
+                    break
+                last_id = chunk[-1]['id']
+        finally:
+            conn.close()
 
 
-class HazmatSubscriber:
+class SubscriptionRule:
+    """Subscription rules: category, minimum severity, corridors and time-of-day window"""
+    
     @staticmethod
-    def add(db, email):
-        """Add new hazmat subscriber"""
+    def add(db, email, categories=None, min_severity=1, corridors=None, start_minute=None,
+            end_minute=None, template='standard'):
+        """Add a subscription rule; categories and corridors are lists (None matches any)"""
         conn = db.get_connection()
         cursor = conn.cursor()
         
         try:
-            cursor.execute('INSERT INTO hazmat_subscribers (email) VALUES (?)', (email,))
+            cursor.execute('''
+                INSERT INTO subscription_rules (email, categories, min_severity, corridors,
+                                                start_minute, end_minute, template)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (email, ','.join(categories) if categories else None, min_severity,
+                  ','.join(corridors) if corridors else None, start_minute, end_minute, template))
+            rule_id = cursor.lastrowid
             conn.commit()
             conn.close()
-            return True
         except sqlite3.IntegrityError:
             conn.close()
-            return False
+            return None
+        
+        SubscriptionRule.bump_version(db)
+        return rule_id
+    
+    @staticmethod
+    def remove(db, rule_id):
+        """Remove a subscription rule"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('DELETE FROM subscription_rules WHERE id = ?', (rule_id,))
+        affected = cursor.rowcount
+        conn.commit()
+        conn.close()
+        
+        if affected:
+            SubscriptionRule.bump_version(db)
+        return affected > 0
+    
+    @staticmethod
+    def get_all(db):
+        """Get all subscription rules"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT * FROM subscription_rules ORDER BY id')
+        rules = cursor.fetchall()
+        conn.close()
+        return rules
+    
+    @staticmethod
+    def get_active_rules(db):
+        """Get active rules, plus an implicit catch-all rule for each active subscriber
+        
+        Standard rules only count while their subscriber exists and is active;
+        hazmat rules are their own subscription.
+        """
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT r.* FROM subscription_rules r
+            WHERE r.active = 1
+              AND (r.template != 'standard'
+                   OR EXISTS (SELECT 1 FROM subscribers s WHERE s.email = r.email AND s.active = 1))
+        ''')
+        rules = [rule_from_row(row) for row in cursor.fetchall()]
+        
+        # Subscribers with explicit standard rules are limited to those rules
+        explicit = {rule.email for rule in rules if rule.template == 'standard'}
+        cursor.execute('SELECT email FROM subscribers WHERE active = 1')
+        for row in cursor.fetchall():
+            if row['email'] not in explicit:
+                rules.append(Rule(None, row['email'], None, 1, None, None, None, 'standard'))
+        
+        conn.close()
+        return rules
+    
+    @staticmethod
+    def get_version(db):
+        """Version counter used to know when the compiled matcher is stale"""
+        return int(Settings.get_setting(db, 'subscriptions_version', '0'))
+    
+    @staticmethod
+    def bump_version(db):
+        Settings.set_setting(db, 'subscriptions_version', str(SubscriptionRule.get_version(db) + 1))
+
+
+class HazmatSubscriber:
+    """Hazmat/spill-only subscribers, stored as 'hazmat' template subscription rules"""
+    
+    @staticmethod
+    def add(db, email):
+        """Add new hazmat subscriber"""
+        return SubscriptionRule.add(db, email, categories=HAZMAT_CATEGORIES, template='hazmat') is not None
     
     @staticmethod
     def remove(db, email):
@@ -347,10 +1195,13 @@ class HazmatSubscriber:
         conn = db.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('DELETE FROM hazmat_subscribers WHERE email = ?', (email,))
+        cursor.execute("DELETE FROM subscription_rules WHERE email = ? AND template = 'hazmat'", (email,))
         affected = cursor.rowcount
         conn.commit()
         conn.close()
+        
+        if affected:
+            SubscriptionRule.bump_version(db)
         return affected > 0
     
     @staticmethod
@@ -359,18 +1210,32 @@ class HazmatSubscriber:
         conn = db.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT email FROM hazmat_subscribers WHERE active = 1')
+        cursor.execute("SELECT email FROM subscription_rules WHERE template = 'hazmat' AND active = 1")
         subscribers = [row[0] for row in cursor.fetchall()]
         conn.close()
         return subscribers
     
+    @staticmethod
+    def page(db, prefix=None, active=None, after=None, limit=50):
+        """Keyset page of hazmat subscribers in email order, and the email to continue after"""
+        return email_page(db, 'subscription_rules', HAZMAT_TEMPLATE_CONDITION, prefix, active, after, limit)
+    
+    @staticmethod
+    def counts(db):
+        """Total and active hazmat subscribers, cached until subscriptions change"""
+        return cached_list_counts(db, 'subscription_rules', HAZMAT_TEMPLATE_CONDITION)
+    
     @staticmethod
     def get_all(db):
         """Get all hazmat subscribers with details"""
         conn = db.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM hazmat_subscribers ORDER BY created_at DESC')
+        cursor.execute('''
+            SELECT id, email, active, created_at FROM subscription_rules
+            WHERE template = 'hazmat'
+            ORDER BY created_at DESC
+        ''')
         subscribers = cursor.fetchall()
         conn.close()
         return subscribers
@@ -381,11 +1246,98 @@ class HazmatSubscriber:
         conn = db.get_connection()
         cursor = conn.cursor()
 
-        cursor.execute('UPDATE hazmat_subscribers SET active = NOT active WHERE email = ?', (email,))
+        cursor.execute("UPDATE subscription_rules SET active = NOT active WHERE email = ? AND template = 'hazmat'", (email,))
+        affected = cursor.rowcount
+        conn.commit()
+        conn.close()
+        
+        if affected:
+            SubscriptionRule.bump_version(db)
+        return affected > 0
+
+
+class SubscriberArea:
+    """Areas of interest (corridor, radius or polygon) that limit what a subscriber receives"""
+    
+    @staticmethod
+    def _add(db, email, area_type, label=None, corridor=None, center_lat=None, center_lon=None,
+             radius_km=None, polygon=None):
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT INTO subscriber_areas (email, area_type, label, corridor, center_lat, center_lon, radius_km, polygon)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (email, area_type, label, corridor, center_lat, center_lon, radius_km,
+              json.dumps(polygon) if polygon else None))
+        area_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        
+        SubscriberArea.bump_version(db)
+        return area_id
+    
+    @staticmethod
+    def add_corridor(db, email, corridor, label=None):
+        """Limit a subscriber to incidents on a corridor"""
+        return SubscriberArea._add(db, email, 'corridor', label=label, corridor=corridor)
+    
+    @staticmethod
+    def add_radius(db, email, center_lat, center_lon, radius_km, label=None):
+        """Limit a subscriber to incidents within a radius of a point (e.g. a yard)"""
+        return SubscriberArea._add(db, email, 'radius', label=label, center_lat=center_lat,
+                                   center_lon=center_lon, radius_km=radius_km)
+    
+    @staticmethod
+    def add_polygon(db, email, polygon, label=None):
+        """Limit a subscriber to incidents inside a [(lat, lon), ...] polygon"""
+        return SubscriberArea._add(db, email, 'polygon', label=label, polygon=[list(p) for p in polygon])
+    
+    @staticmethod
+    def remove(db, area_id):
+        """Remove an area of interest"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('DELETE FROM subscriber_areas WHERE id = ?', (area_id,))
         affected = cursor.rowcount
         conn.commit()
         conn.close()
+        
+        if affected:
+            SubscriberArea.bump_version(db)
         return affected > 0
+    
+    @staticmethod
+    def get_for_email(db, email):
+        """Get all areas of interest for a subscriber"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT * FROM subscriber_areas WHERE email = ? ORDER BY id', (email,))
+        areas = cursor.fetchall()
+        conn.close()
+        return areas
+    
+    @staticmethod
+    def get_all(db):
+        """Get every area of interest"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT * FROM subscriber_areas')
+        areas = cursor.fetchall()
+        conn.close()
+        return areas
+    
+    @staticmethod
+    def get_version(db):
+        """Version counter used to know when the in-memory index is stale"""
+        return int(Settings.get_setting(db, 'geofence_version', '0'))
+    
+    @staticmethod
+    def bump_version(db):
+        Settings.set_setting(db, 'geofence_version', str(SubscriberArea.get_version(db) + 1))
 
 
 class AdminUser:
@@ -425,6 +1377,17 @@ class SentAlert:
         conn.commit()
         conn.close()
     
+    @staticmethod
+    def mark_sent_many(db, incident_ids):
+        """Mark several incidents as sent in one transaction"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.executemany('INSERT INTO sent_alerts (incident_id) VALUES (?)',
+                           [(incident_id,) for incident_id in incident_ids])
+        conn.commit()
+        conn.close()
+    
     @staticmethod
     def get_recent_count(db, hours=1):
         """Get count of alerts sent in recent hours"""
@@ -439,3 +1402,365 @@ class SentAlert:
         count = cursor.fetchone()[0]
         conn.close()
         return count
+
+
+OUTBOX_STATES = ('pending', 'sending', 'sent', 'failed')
+
+def outbox_key(incident_id, email, channel='email', template='standard'):
+    """Idempotency key for delivering one incident to one recipient of a channel with one template"""
+    if channel == 'email':
+        # A recipient with both a standard and a hazmat rule gets both emails for a spill
+        return f"{incident_id}:{email}" if template == 'standard' else f"{incident_id}:{email}:{template}"
+    return f"{incident_id}:{channel}:{email}"
+
+def _in_list(values):
+    return ', '.join('?' * len(values))
+
+class AlertOutbox:
+    """Alert deliveries per recipient x incident: pending -> sending -> sent, or failed"""
+    
+    @staticmethod
+    def enqueue(db, plan, channel='email'):
+        """Record a pending delivery for each recipient x incident of an (email, template) -> incidents plan
+        
+        Keys already in the outbox are left as they are, so planning the same
+        incidents twice never queues a second delivery.
+        """
+        return AlertOutbox.enqueue_channels(db, {channel: plan})
+    
+    @staticmethod
+    def enqueue_channels(db, plans):
+        """Enqueue a {channel: plan} map in one transaction, as for enqueue"""
+        rows = [(outbox_key(incident_id, email, channel, template), incident_id, channel, email, template)
+                for channel, plan in plans.items()
+                for (email, template), incidents in plan.items() for _, incident_id in incidents]
+        if not rows:
+            return 0
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.executemany('''
+            INSERT OR IGNORE INTO alert_outbox (idempotency_key, incident_id, channel, email, template)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+        added = conn.total_changes
+        conn.close()
+        return added
+    
+    @staticmethod
+    def pending(db, incident_ids, channel='email', chunk_size=500):
+        """Pending deliveries of a channel for the given incidents"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        rows = []
+        for chunk in chunked(incident_ids, chunk_size):
+            cursor.execute(f'''
+                SELECT idempotency_key, incident_id, email, template FROM alert_outbox
+                WHERE state = 'pending' AND channel = ? AND incident_id IN ({_in_list(chunk)})
+                ORDER BY id
+            ''', [channel] + chunk)
+            rows.extend(cursor.fetchall())
+        conn.close()
+        return rows
+    
+    @staticmethod
+    def pending_for_channels(db, channels, limit=1000, now=None, chunk_size=500):
+        """Oldest pending deliveries that are due, up to limit per channel, whichever incidents they are for"""
+        now = time.time() if now is None else now
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        rows = []
+        for chunk in chunked(channels, chunk_size):
+            cursor.execute(f'''
+                SELECT channel, idempotency_key, incident_id, email, template FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY channel ORDER BY id) AS position
+                    FROM alert_outbox
+                    WHERE state = 'pending' AND channel IN ({_in_list(chunk)})
+                      AND (next_attempt_at IS NULL OR next_attempt_at <= ?)
+                )
+                WHERE position <= ?
+                ORDER BY id
+            ''', list(chunk) + [now, limit])
+            rows.extend(cursor.fetchall())
+        conn.close()
+        return rows
+    
+    @staticmethod
+    def claim(db, keys, chunk_size=500):
+        """Move pending deliveries to sending; returns the keys this caller won"""
+        if not keys:
+            return set()
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        claimed = set()
+        for chunk in chunked(list(keys), chunk_size):
+            cursor.execute(f'''
+                UPDATE alert_outbox SET state = 'sending', attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE state = 'pending' AND idempotency_key IN ({_in_list(chunk)})
+                RETURNING idempotency_key
+            ''', chunk)
+            claimed.update(row[0] for row in cursor.fetchall())
+        conn.commit()
+        conn.close()
+        return claimed
+    
+    @staticmethod
+    def complete(db, keys, chunk_size=500):
+        """Mark deliveries the relay accepted as sent"""
+        if not keys:
+            return
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        for chunk in chunked(list(keys), chunk_size):
+            cursor.execute(f'''
+                UPDATE alert_outbox SET state = 'sent', last_error = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE state = 'sending' AND idempotency_key IN ({_in_list(chunk)})
+            ''', chunk)
+        conn.commit()
+        conn.close()
+    
+    @staticmethod
+    def release(db, keys, error, max_attempts=None, backoff=0, max_backoff=None, now=None):
+        """Put deliveries that did not go out back to pending, or fail them once out of attempts
+        
+        With a backoff, the nth failed attempt is not retried for backoff * 2^(n-1)
+        seconds (capped at max_backoff). Returns how many were dead-lettered as failed.
+        """
+        if not keys:
+            return 0
+        max_attempts = Config.OUTBOX_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        max_backoff = backoff if max_backoff is None else max_backoff
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            UPDATE alert_outbox
+            SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                next_attempt_at = ? + MIN(?, ? * (1 << MAX(attempts - 1, 0))),
+                last_error = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE state = 'sending' AND idempotency_key IN ({_in_list(keys)})
+            RETURNING state
+        ''', [max_attempts, time.time() if now is None else now, max_backoff, backoff, error] + list(keys))
+        failed = sum(1 for row in cursor.fetchall() if row[0] == 'failed')
+        conn.commit()
+        conn.close()
+        return failed
+    
+    @staticmethod
+    def recover(db):
+        """Startup sweep: fail deliveries a crash left sending, since they may already have gone out"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            UPDATE alert_outbox
+            SET state = 'failed', last_error = 'interrupted while sending; delivery unknown',
+                updated_at = CURRENT_TIMESTAMP
+            WHERE state = 'sending'
+        ''')
+        interrupted = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return interrupted
+    
+    @staticmethod
+    def settle(db, incident_ids, chunk_size=500):
+        """Record incidents in sent_alerts once none of their email deliveries are left pending or sending
+        
+        Returns how many of the incidents still have deliveries outstanding.
+        """
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        outstanding = 0
+        for chunk in chunked(incident_ids, chunk_size):
+            cursor.execute(f'''
+                INSERT INTO sent_alerts (incident_id)
+                SELECT DISTINCT o.incident_id FROM alert_outbox o
+                WHERE o.incident_id IN ({_in_list(chunk)}) AND o.channel = 'email'
+                  AND NOT EXISTS (SELECT 1 FROM alert_outbox p
+                                  WHERE p.incident_id = o.incident_id AND p.channel = 'email'
+                                    AND p.state IN ('pending', 'sending'))
+                  AND NOT EXISTS (SELECT 1 FROM sent_alerts s WHERE s.incident_id = o.incident_id)
+            ''', chunk)
+            cursor.execute(f'''
+                SELECT COUNT(DISTINCT incident_id) FROM alert_outbox
+                WHERE incident_id IN ({_in_list(chunk)}) AND channel = 'email' AND state IN ('pending', 'sending')
+            ''', chunk)
+            outstanding += cursor.fetchone()[0]
+        conn.commit()
+        conn.close()
+        return outstanding
+    
+    @staticmethod
+    def unsettled_incidents(db, hours):
+        """Recent incidents not yet in sent_alerts: saved before a crash, buffered, or still owed deliveries"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT i.* FROM incidents i
+            WHERE i.scraped_at > datetime('now', ?)
+              AND NOT EXISTS (SELECT 1 FROM sent_alerts s WHERE s.incident_id = i.id)
+            ORDER BY i.id
+        ''', (f'-{hours} hours',))
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+    
+    @staticmethod
+    def counts(db):
+        """Deliveries in each state"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT state, COUNT(*) FROM alert_outbox GROUP BY state')
+        counts = dict.fromkeys(OUTBOX_STATES, 0)
+        counts.update({state: count for state, count in cursor.fetchall()})
+        conn.close()
+        return counts
+    
+    @staticmethod
+    def channel_counts(db):
+        """Deliveries in each state, per channel"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT channel, state, COUNT(*) FROM alert_outbox GROUP BY channel, state')
+        counts = {}
+        for channel, state, count in cursor.fetchall():
+            counts.setdefault(channel, dict.fromkeys(OUTBOX_STATES, 0))[state] = count
+        conn.close()
+        return counts
+    
+    @staticmethod
+    def dead_letters(db, channel, limit=100):
+        """Newest deliveries of a channel that ran out of attempts, with their last error"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT idempotency_key, incident_id, email, attempts, last_error, updated_at FROM alert_outbox
+            WHERE channel = ? AND state = 'failed'
+            ORDER BY id DESC LIMIT ?
+        ''', (channel, limit))
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+    
+    @staticmethod
+    def retry_failed(db, channel=None):
+        """Queue failed deliveries (of one channel, or all) again with a fresh attempt budget"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            UPDATE alert_outbox
+            SET state = 'pending', attempts = 0, next_attempt_at = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE state = 'failed'{' AND channel = ?' if channel else ''}
+            RETURNING incident_id
+        ''', [channel] if channel else [])
+        incident_ids = sorted({row[0] for row in cursor.fetchall()})
+        conn.commit()
+        conn.close()
+        return incident_ids
+
+
+
+def webhook_channel_name(subscription_id):
+    """Outbox channel of a managed webhook subscription"""
+    return f"webhook:{subscription_id}"
+
+class WebhookSubscription:
+    """Webhook endpoints for downstream systems, each with its own category/severity/corridor filter"""
+    
+    @staticmethod
+    def add(db, name, url, secret, categories=None, min_severity=1, corridors=None):
+        """Add a webhook subscription; categories and corridors are lists (None matches any)"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                INSERT INTO webhook_subscriptions (name, url, secret, categories, min_severity, corridors)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (name, url, secret, ','.join(categories) if categories else None, min_severity,
+                  ','.join(corridors) if corridors else None))
+            subscription_id = cursor.lastrowid
+            conn.commit()
+            conn.close()
+        except sqlite3.IntegrityError:
+            conn.close()
+            return None
+        
+        WebhookSubscription.bump_version(db)
+        return subscription_id
+    
+    @staticmethod
+    def remove(db, subscription_id):
+        """Remove a webhook subscription and drop its undelivered outbox rows"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('DELETE FROM webhook_subscriptions WHERE id = ?', (subscription_id,))
+        affected = cursor.rowcount
+        if affected:
+            cursor.execute("DELETE FROM alert_outbox WHERE channel = ? AND state != 'sent'",
+                           (webhook_channel_name(subscription_id),))
+        conn.commit()
+        conn.close()
+        
+        if affected:
+            WebhookSubscription.bump_version(db)
+        return affected > 0
+    
+    @staticmethod
+    def toggle_active(db, subscription_id):
+        """Pause or resume a webhook subscription"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('UPDATE webhook_subscriptions SET active = NOT active WHERE id = ?', (subscription_id,))
+        affected = cursor.rowcount
+        conn.commit()
+        conn.close()
+        
+        if affected:
+            WebhookSubscription.bump_version(db)
+        return affected > 0
+    
+    @staticmethod
+    def get(db, subscription_id):
+        """Get one webhook subscription"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT * FROM webhook_subscriptions WHERE id = ?', (subscription_id,))
+        subscription = cursor.fetchone()
+        conn.close()
+        return subscription
+    
+    @staticmethod
+    def get_all(db, active_only=False):
+        """Get all webhook subscriptions"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f"SELECT * FROM webhook_subscriptions{' WHERE active = 1' if active_only else ''} ORDER BY id")
+        subscriptions = cursor.fetchall()
+        conn.close()
+        return subscriptions
+    
+    @staticmethod
+    def get_version(db):
+        """Version counter used to know when the dispatcher's webhook channels are stale"""
+        return int(Settings.get_setting(db, 'webhooks_version', '0'))
+    
+    @staticmethod
+    def bump_version(db):
+        Settings.set_setting(db, 'webhooks_version', str(WebhookSubscription.get_version(db) + 1))
@@ -0,0 +1,95 @@
+from bisect import bisect_right
+from collections import namedtuple, defaultdict
+
+from classification import incident_categories
+
+# Rule that matches every category
+ANY_CATEGORY = '*'
+
+Rule = namedtuple('Rule', ['id', 'email', 'categories', 'min_severity', 'corridors',
+                           'start_minute', 'end_minute', 'template'])
+
+
+def _split(value):
+    """Split a comma separated column into a frozenset (None for empty)"""
+    if not value:
+        return None
+    items = frozenset(item.strip() for item in value.split(',') if item.strip())
+    return items or None
+
+
+def rule_from_row(row):
+    """Build a Rule from a subscription_rules row"""
+    return Rule(row['id'], row['email'], _split(row['categories']), row['min_severity'] or 1,
+                _split(row['corridors']), row['start_minute'], row['end_minute'],
+                row['template'] or 'standard')
+
+
+def in_time_window(rule, minute_of_day):
+    """Check a minute of the day against a rule's window (windows may wrap midnight)"""
+    if rule.start_minute is None or rule.end_minute is None:
+        return True
+    if rule.start_minute <= rule.end_minute:
+        return rule.start_minute <= minute_of_day < rule.end_minute
+    return minute_of_day >= rule.start_minute or minute_of_day < rule.end_minute
+
+
+class RuleMatcher:
+    """Subscription rules indexed by category, then sorted by minimum severity"""
+
+    def __init__(self, rules):
+        buckets = defaultdict(list)
+        for rule in rules:
+            for category in (rule.categories or (ANY_CATEGORY,)):
+                buckets[category].append(rule)
+
+        self._rules = {}
+        self._severities = {}
+        for category, bucket in buckets.items():
+            bucket.sort(key=lambda rule: rule.min_severity)
+            self._rules[category] = bucket
+            self._severities[category] = [rule.min_severity for rule in bucket]
+
+    def candidates(self, categories, severity):
+        """Rules whose categories and minimum severity admit the incident, each once"""
+        seen = set()
+        for key in tuple(categories) + (ANY_CATEGORY,):
+            bucket = self._rules.get(key)
+            if not bucket:
+                continue
+            for rule in bucket[:bisect_right(self._severities[key], severity)]:
+                if id(rule) not in seen:
+                    seen.add(id(rule))
+                    yield rule
+
+    def match(self, incident, minute_of_day):
+        """Matching (email, template) pairs for one incident"""
+        matched = set()
+        for rule in self.candidates(incident_categories(incident), incident.severity):
+            if rule.corridors and incident.corridor not in rule.corridors:
+                continue
+            if not in_time_window(rule, minute_of_day):
+                continue
+            matched.add((rule.email, rule.template))
+        return matched
+
+    def build_plan(self, incidents, minute_of_day, geofence=None):
+        """Batched {(email, template): [(incident, incident_id), ...]} map for one cycle"""
+        plan = defaultdict(list)
+        for incident, incident_id in incidents:
+            matched = self.match(incident, minute_of_day)
+            if geofence is not None and matched:
+                allowed = set(geofence.recipients_for(incident, {email for email, _ in matched}))
+                matched = {pair for pair in matched if pair[0] in allowed}
+            for pair in matched:
+                plan[pair].append((incident, incident_id))
+        return dict(plan)
+
+
+def group_plan(plan):
+    """Group a delivery plan into [(template, incidents, emails), ...] so shared content is rendered once"""
+    groups = {}
+    for (email, template), incidents in sorted(plan.items()):
+        key = (template, tuple(incident_id for _, incident_id in incidents))
+        groups.setdefault(key, (template, incidents, []))[2].append(email)
+    return list(groups.values())
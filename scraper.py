@@ -1,27 +1,58 @@
-import requests
 from bs4 import BeautifulSoup
-import re
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 import pytz
-from models import Incident, Database
+from models import Incident, Database, Settings
+from classification import classify_incident, TRUCK_KEYWORDS, TRUCK_PATTERN, SPILL_KEYWORDS
+from corridors import parse_location, is_major_road
+from geocode import Geocoder
 from config import Config
+from transport import Transport
+from timeparse import parse_clock, format_clock
+from metrics import StageTimer, SCRAPE_CYCLE_SECONDS, ROWS_SEEN, ROWS_RELEVANT, NEW_INCIDENTS
 import time
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upper bound on the whole TranStar fetch, retries included, when no cycle deadline applies
+FETCH_TIMEOUT = 30
+
+# Words that mark a table row as an incident rather than a header or filler row
+INCIDENT_ROW_KEYWORDS = ('stall', 'accident', 'crash', 'truck', 'heavy', 'verified',
+                         'detected', 'reported', 'active', 'closure')
+
+# Scraper each parse pool worker process parses with, set up once by _init_parse_worker
+_worker_scraper = None
+
+def _init_parse_worker(db, log_level):
+    global _worker_scraper
+    logging.getLogger().setLevel(log_level)
+    _worker_scraper = TranStarScraper(db=db, parse_workers=0)
+
+def parse_document(content, include_stalls, stop_at=None):
+    """Parse pool entry point: compact rows for one page, plus the row counters the worker saw"""
+    seen, relevant = ROWS_SEEN.value(), ROWS_RELEVANT.value()
+    rows = list(_worker_scraper.iter_rows(content, stop_at, include_stalls))
+    return rows, ROWS_SEEN.value() - seen, ROWS_RELEVANT.value() - relevant
+
 class TranStarScraper:
-    def __init__(self):
-        self.base_url = 'https://traffic.houstontranstar.org'
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-        })
-        self.db = Database()
+    def __init__(self, db=None, base_url='https://traffic.houstontranstar.org', parse_workers=None):
+        self.base_url = base_url
+        self.transport = Transport(connect_timeout=Config.HTTP_CONNECT_TIMEOUT, read_timeout=Config.HTTP_READ_TIMEOUT,
+                                   retries=Config.HTTP_RETRIES)
+        self.session = self.transport.session
+        self.db = db or Database()
+        self.geocoder = Geocoder(self.db)
+        # Stage timings for the current cycle
+        self.timer = StageTimer()
+        # Worker processes for parse+classify; 0 parses on the calling thread
+        self.parse_workers = Config.PARSE_WORKERS if parse_workers is None else parse_workers
+        self._parse_pool = None
         # Set up Central Time timezone
         self.central_tz = pytz.timezone('America/Chicago')
     
@@ -29,7 +60,7 @@ class TranStarScraper:
         """Get current time in Central Time"""
         return datetime.now(self.central_tz)
     
-    def is_relevant_incident(self, incident_data):
+    def is_relevant_incident(self, incident_data, include_stalls=None):
         """Check if incident involves heavy trucks, lost loads, or hazmat spills"""
         # Handle both dict and string inputs
         if isinstance(incident_data, dict):
@@ -39,40 +70,14 @@ class TranStarScraper:
 
         text_lower = text.lower()
 
-        # Heavy truck keywords
-        truck_keywords = [
-            'heavy truck', 'semi', 'semi-truck', 'semi truck',
-            '18-wheeler', '18 wheeler', 'eighteen wheeler',
-            'tractor-trailer', 'tractor trailer', 'big rig',
-            'commercial vehicle', 'freight truck', 'cargo truck',
-            'delivery truck', 'box truck', 'flatbed truck',
-            'lost load', 'lost cargo'
-        ]
-
-        # Hazmat and spill keywords
-        spill_keywords = [
-            'hazmat', 'hazardous material', 'chemical spill',
-            'fuel spill', 'oil spill', 'cargo spill',
-            'debris spill', 'spill', 'leak', 'leaking'
-        ]
-
         # Check for truck-related incidents
-        has_truck = any(keyword in text_lower for keyword in truck_keywords)
+        has_truck = any(keyword in text_lower for keyword in TRUCK_KEYWORDS)
 
         # Check for spill incidents (any vehicle type)
-        has_spill = any(keyword in text_lower for keyword in spill_keywords)
+        has_spill = any(keyword in text_lower for keyword in SPILL_KEYWORDS)
 
         # Additional patterns for truck incidents
-        truck_patterns = [
-            r'\b(?:18|eighteen)[\s-]*wheel\w*\b',
-            r'\btruck\s+(?:accident|crash|stall|breakdown|rollover)\b',
-            r'\b(?:accident|crash)\s+.*\btruck\b',
-            r'\bcommercial\s+vehicle\s+(?:accident|crash|stall)\b',
-            r'\bheavy\s+truck\b',
-            r'\blost\s+load\b'
-        ]
-
-        has_pattern = any(re.search(pattern, text_lower) for pattern in truck_patterns)
+        has_pattern = TRUCK_PATTERN.search(text_lower) is not None
 
         result = has_truck or has_spill or has_pattern
 
@@ -86,8 +91,9 @@ class TranStarScraper:
         is_stall = 'stall' in text_lower or 'breakdown' in text_lower
 
         # If stalls are disabled and this is a stall, exclude it
-        from models import Settings
-        if is_stall and not Settings.get_include_stalls(self.db):
+        if include_stalls is None:
+            include_stalls = Settings.get_include_stalls(self.db)
+        if is_stall and not include_stalls:
             logger.info(f"🚫 Excluding stall (stalls disabled): {text[:100]}...")
             return False
 
@@ -96,26 +102,8 @@ class TranStarScraper:
     
     def is_street_incident(self, text):
         """Check if this is a street incident that should be excluded"""
-        text_lower = text.lower()
-        
-        # Check if incident is on a major highway/freeway (INCLUDE these)
-        major_roads = [
-            r'\bi-\d+\b', r'\bih-\d+\b', r'\binterstate\s+\d+\b',
-            r'\bus-?\d+\b', r'\bus\s+highway\s+\d+\b',
-            r'\bhighway\s+\d+\b', r'\bhwy\s+\d+\b', r'\bstate\s+highway\s+\d+\b',
-            r'\bbeltway\s+8\b', r'\bloop\s+610\b', r'\bloop\s+\d+\b',
-            r'\btoll\s+road\b', r'\btollway\b',
-            r'\bhardy\s+toll\b', r'\bwestpark\s+toll\b', r'\bsam\s+houston\s+toll\b',
-            r'\beastex\s+freeway\b', r'\beastex\s+fwy\b', r'\beastex\b',
-            r'\b\w+\s+freeway\b', r'\b\w+\s+fwy\b',
-        ]
-        
-        # If it's on a major road, it's NOT a street incident
-        for pattern in major_roads:
-            if re.search(pattern, text_lower):
-                return False
-        
-        return True
+        # If it's on a major road (freeway, toll road, loop), it's NOT a street incident
+        return not is_major_road(text)
     
     def detect_table_type(self, table):
         """Detect table type from header row or surrounding context"""
@@ -145,57 +133,133 @@ class TranStarScraper:
 
         return 'unknown'
 
-    def scrape_html(self):
+    @property
+    def parse_pool(self):
+        """Process pool for parse+classify, started on first use; None when parsing in-process"""
+        if self.parse_workers and self._parse_pool is None:
+            # spawn, not fork: the app process is already running scheduler and request threads
+            self._parse_pool = ProcessPoolExecutor(self.parse_workers, mp_context=multiprocessing.get_context('spawn'),
+                                                   initializer=_init_parse_worker,
+                                                   initargs=(self.db, logging.getLogger().level))
+        return self._parse_pool
+    
+    def shutdown_parse_pool(self):
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown()
+            self._parse_pool = None
+    
+    @property
+    def page_url(self):
+        return f'{self.base_url}/roadclosures/'
+    
+    def fetch_page(self, url, deadline=None):
+        """Fetch a page within the cycle's fetch budget; None when the budget is already spent"""
+        timeout = min(FETCH_TIMEOUT, deadline.budget('fetch')) if deadline else FETCH_TIMEOUT
+        if timeout <= 0:
+            logger.warning("⏰ Cycle deadline reached before fetch")
+            return None
+
+        with self.timer.stage('fetch'):
+            response = self.transport.get(url, budget=timeout)
+            response.raise_for_status()
+        return response.content
+    
+    def scrape_html(self, deadline=None):
         """Scrape incidents from TranStar HTML page with table-type-aware parsing"""
         try:
-            url = f'{self.base_url}/roadclosures/'
+            url = self.page_url
             logger.info(f"Scraping HTML from {url}")
 
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, 'html.parser')
-            incidents = []
-
-            # Parse tables with type awareness
-            tables = soup.find_all('table')
-            logger.info(f"Found {len(tables)} tables to analyze")
-
-            for table in tables:
-                table_type = self.detect_table_type(table)
-                rows = table.find_all('tr')
-
-                for row in rows:
-                    cells = row.find_all(['td', 'th'])
-                    if len(cells) < 3:
-                        continue
-
-                    cell_texts = [cell.get_text(strip=True) for cell in cells]
-                    full_text = " | ".join(cell_texts)
+            content = self.fetch_page(url, deadline)
+            if content is None:
+                return []
 
-                    # Skip header rows
-                    if cell_texts[0].lower() in ('location', 'roadway', ''):
-                        continue
-
-                    # Check if this looks like an incident row
-                    if any(keyword in full_text.lower() for keyword in
-                           ['stall', 'accident', 'crash', 'truck', 'heavy', 'verified',
-                            'detected', 'reported', 'active', 'closure']):
-
-                        if self.is_relevant_incident(full_text):
-                            incident = self.create_incident_from_html_row(cell_texts, table_type)
-                            if incident:
-                                incidents.append(incident)
-                                logger.info(f"✅ HTML incident found ({table_type}): {incident.location}")
-
-            return incidents
+            with self.timer.stage('parse'):
+                stop_at = time.monotonic() + deadline.budget('parse') if deadline else None
+                return self.parse_html(content, stop_at)
 
         except Exception as e:
             logger.error(f"Error in HTML fallback scraping: {e}")
             return []
     
+    def parse_html(self, content, stop_at=None):
+        """Parse incident rows out of a TranStar road closures page, stopping at a monotonic deadline"""
+        return list(self.iter_incidents(content, stop_at))
+    
+    def iter_incidents(self, content, stop_at=None):
+        """Yield incidents row by row so pipelined callers can start on them before the page is done"""
+        rows = self.parse_offloaded(content, stop_at) if self.parse_pool is not None else None
+        if rows is None:
+            rows = self.iter_rows(content, stop_at)
+
+        for row in rows:
+            incident = self.incident_from_row(row)
+            if incident:
+                yield incident
+    
+    def parse_offloaded(self, content, stop_at=None):
+        """Parse and classify a page in the process pool; rows merge back on the calling thread"""
+        include_stalls = Settings.get_include_stalls(self.db)
+        try:
+            rows, seen, relevant = self.parse_pool.submit(parse_document, content, include_stalls, stop_at).result()
+        except BrokenProcessPool as e:
+            logger.error(f"💥 Parse pool broke ({e}); parsing in-process until it restarts")
+            self._parse_pool = None
+            return None
+
+        ROWS_SEEN.inc(seen)
+        ROWS_RELEVANT.inc(relevant)
+        return rows
+    
+    def iter_rows(self, content, stop_at=None, include_stalls=None):
+        """Yield compact (location, description, incident_time, classification) tuples for relevant rows"""
+        soup = BeautifulSoup(content, 'html.parser')
+        found = 0
+
+        # Parse tables with type awareness
+        tables = soup.find_all('table')
+        logger.info(f"Found {len(tables)} tables to analyze")
+
+        for table in tables:
+            table_type = self.detect_table_type(table)
+            rows = table.find_all('tr')
+
+            for row in rows:
+                if stop_at is not None and time.monotonic() > stop_at:
+                    logger.warning(f"⏰ Parse budget exhausted; skipping the rest of the page after {found} incidents")
+                    return
+
+                cells = row.find_all(['td', 'th'])
+                if len(cells) < 3:
+                    continue
+
+                cell_texts = [cell.get_text(strip=True) for cell in cells]
+                full_text = " | ".join(cell_texts)
+
+                # Skip header rows
+                if cell_texts[0].lower() in ('location', 'roadway', ''):
+                    continue
+
+                # Check if this looks like an incident row; it stays plain strings until it is relevant
+                full_text_lower = full_text.lower()
+                if any(keyword in full_text_lower for keyword in INCIDENT_ROW_KEYWORDS):
+                    ROWS_SEEN.inc()
+
+                    if self.is_relevant_incident(full_text, include_stalls):
+                        ROWS_RELEVANT.inc()
+                        parsed = self.row_from_cells(cell_texts, table_type)
+                        if parsed:
+                            found += 1
+                            logger.info(f"✅ HTML incident found ({table_type}): {parsed[0]}")
+                            yield parsed
+    
     def create_incident_from_html_row(self, cell_texts, table_type='unknown'):
         """Create incident from HTML table row with table-type-aware column mapping"""
+        row = self.row_from_cells(cell_texts, table_type)
+        return self.incident_from_row(row) if row else None
+    
+    def row_from_cells(self, cell_texts, table_type='unknown'):
+        """Map, classify and clean a table row into a compact, picklable tuple"""
         try:
             if len(cell_texts) < 3:
                 return None
@@ -235,22 +299,38 @@ class TranStarScraper:
             # Extract time from status
             incident_time = self.extract_time_from_status(status_time)
             
-            # Calculate severity
-            severity = self.calculate_severity(f"{location} {description}")
-            
-            # Clean up
-            location = self.clean_location(location)
-            description = self.clean_description(description)
+            with self.timer.stage('classify'):
+                # Classify once (category flags, corridor, direction, severity)
+                classification = classify_incident(location, description, table_type)
+                
+                # Clean up
+                location = self.clean_location(location)
+                description = self.clean_description(description)
+                
+                if not location:
+                    return None
             
-            if not location:
-                return None
+            return (location, description, incident_time, classification)
             
-            incident = Incident(
-                location=location,
-                description=description,
-                incident_time=incident_time,
-                severity=severity
-            )
+        except Exception as e:
+            logger.error(f"Error creating incident from HTML row: {e}")
+            return None
+    
+    def incident_from_row(self, row):
+        """Build an Incident from a compact row and geocode it (needs the database, so never in a worker)"""
+        location, description, incident_time, classification = row
+        try:
+            with self.timer.stage('classify'):
+                incident = Incident(
+                    location=location,
+                    description=description,
+                    incident_time=incident_time,
+                    severity=classification.severity,
+                    classification=classification
+                )
+                
+                # Resolve coordinates from the corridor and cross street
+                self.geocoder.locate(incident)
             
             return incident
             
@@ -260,25 +340,8 @@ class TranStarScraper:
     
     def clean_location(self, location):
         """Clean and standardize location string"""
-        if not location:
-            return None
-        
-        location = location.strip()
-        
-        # Handle common TranStar location formats
         # "IH-69 Eastex Northbound After FM-1960" -> "IH-69 Eastex NB @ FM-1960"
-        location = re.sub(r'\b(North|South|East|West)bound\b', lambda m: m.group(1)[0] + 'B', location)
-        location = re.sub(r'\bAfter\b', '@', location, flags=re.IGNORECASE)
-        location = re.sub(r'\bBefore\b', '@', location, flags=re.IGNORECASE)
-        location = re.sub(r'\bAt\b', '@', location, flags=re.IGNORECASE)
-        location = re.sub(r'\bNear\b', '@', location, flags=re.IGNORECASE)
-        
-        # Standardize highway names
-        location = re.sub(r'\bIH-(\d+)', r'IH-\1', location)
-        location = re.sub(r'\bI-(\d+)', r'IH-\1', location)
-        location = re.sub(r'\bUS-(\d+)', r'US-\1', location)
-        
-        return location
+        return parse_location(location).clean
     
     def clean_description(self, description):
         """Clean and standardize description"""
@@ -295,90 +358,30 @@ class TranStarScraper:
     
     def parse_time_string(self, time_str):
         """Parse various time string formats"""
-        if not time_str:
-            return self.get_central_time_now().strftime("%I:%M %p")
-        
-        # Handle "Verified at 3:16 PM" format
-        time_match = re.search(r'(\d{1,2}:\d{2}\s*[APap][Mm])', time_str)
-        if time_match:
-            return time_match.group(1).upper()
-        
-        # Handle 24-hour format
-        time_match = re.search(r'(\d{1,2}:\d{2})', time_str)
-        if time_match:
-            try:
-                time_obj = datetime.strptime(time_match.group(1), '%H:%M')
-                return time_obj.strftime("%I:%M %p")
-            except:
-                pass
-        
-        return self.get_central_time_now().strftime("%I:%M %p")
+        return self.extract_time_from_status(time_str)
     
     def extract_time_from_status(self, status):
         """Extract time from status string like 'Verified at 3:16 PM'"""
-        if not status:
-            return self.get_central_time_now().strftime("%I:%M %p")
-        
-        # Look for time patterns
-        time_patterns = [
-            r'(\d{1,2}:\d{2}\s*[APap][Mm])',
-            r'at\s+(\d{1,2}:\d{2}\s*[APap][Mm])',
-            r'(\d{1,2}:\d{2})'
-        ]
-        
-        for pattern in time_patterns:
-            match = re.search(pattern, status, re.IGNORECASE)
-            if match:
-                time_str = match.group(1)
-                if re.search(r'[APap][Mm]', time_str):
-                    return time_str.upper()
-                else:
-                    # Convert 24-hour to 12-hour
-                    try:
-                        time_obj = datetime.strptime(time_str, '%H:%M')
-                        return time_obj.strftime("%I:%M %p")
-                    except:
-                        pass
-        
-        return self.get_central_time_now().strftime("%I:%M %p")
+        # One compiled pattern, memoized per status string (timeparse.parse_clock)
+        clock = parse_clock(status)
+        if clock:
+            return format_clock(clock)
+        now = self.get_central_time_now()
+        return format_clock((now.hour, now.minute))
     
     def calculate_severity(self, description):
         """Calculate incident severity (1-5, higher = more urgent)"""
-        description_lower = description.lower()
-        severity = 1
-        
-        # Spill incidents are highest priority
-        if any(keyword in description_lower for keyword in ['hazmat', 'chemical', 'spill']):
-            severity += 3
-        
-        # Accident severity
-        if any(keyword in description_lower for keyword in ['accident', 'crash', 'collision']):
-            severity += 2
-        elif any(keyword in description_lower for keyword in ['rollover', 'jackknife']):
-            severity += 3
-        
-        # Heavy truck incidents get higher priority
-        if 'heavy truck' in description_lower:
-            severity += 1
-        
-        # Multiple vehicles
-        if any(keyword in description_lower for keyword in ['multiple', 'multi-vehicle', 'pile-up']):
-            severity += 1
-        
-        # Lane blockages
-        if any(keyword in description_lower for keyword in ['blocked', 'blocking', 'closed']):
-            severity += 1
-        
-        return min(severity, 5)  # Cap at 5
+        return classify_incident(description).severity
     
-    def scrape_incidents(self):
+    def scrape_incidents(self, deadline=None):
         """Main scraping method - HTML only"""
         logger.info("Starting incident scraping...")
 
-        incidents = self.scrape_html()
+        incidents = self.scrape_html(deadline)
 
         # Remove duplicates
-        unique_incidents = self.remove_duplicate_incidents(incidents)
+        with self.timer.stage('dedup'):
+            unique_incidents = self.remove_duplicate_incidents(incidents)
 
         logger.info(f"Found {len(incidents)} total incidents, {len(unique_incidents)} unique incidents")
         return unique_incidents
@@ -396,30 +399,36 @@ class TranStarScraper:
         return unique_incidents
     
     def save_new_incidents(self, incidents):
-        """Save new incidents to database"""
+        """Save new incidents to database; the unique incident hash is the dedup, delivery is the outbox's job"""
         new_incidents = []
         
         for incident in incidents:
-            if not Incident.is_already_sent(self.db, incident.incident_hash):
-                incident_id = incident.save(self.db)
-                if incident_id:
-                    new_incidents.append((incident, incident_id))
-                    logger.info(f"New incident saved: {incident.location} - {incident.description[:50]}...")
+            incident_id = incident.save(self.db)
+            if incident_id:
+                new_incidents.append((incident, incident_id))
+                logger.info(f"New incident saved: {incident.location} - {incident.description[:50]}...")
         
         return new_incidents
     
-    def run_scrape_cycle(self):
-        """Run complete scrape cycle"""
+    def run_scrape_cycle(self, deadline=None):
+        """Run complete scrape cycle within an optional coordinator.Deadline"""
         logger.info("Starting improved scrape cycle...")
         
-        incidents = self.scrape_incidents()
-        
-        if not incidents:
-            logger.info("No relevant incidents found")
-            return []
-        
-        new_incidents = self.save_new_incidents(incidents)
+        self.timer = StageTimer()
+        with SCRAPE_CYCLE_SECONDS.time():
+            try:
+                incidents = self.scrape_incidents(deadline)
+                
+                if not incidents:
+                    logger.info("No relevant incidents found")
+                    return []
+                
+                with self.timer.stage('save'):
+                    new_incidents = self.save_new_incidents(incidents)
+            finally:
+                self.timer.observe()
         
+        NEW_INCIDENTS.inc(len(new_incidents))
         if new_incidents:
             logger.info(f"Found {len(new_incidents)} new incidents to alert on")
         else:
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Local SMTP sink for load tests
+
+Accepts EHLO/AUTH/MAIL/RCPT/DATA from EmailService and keeps the messages in
+memory instead of delivering them. An optional per-message delay simulates a
+slow relay.
+
+    python smtp_sink.py [port]
+"""
+
+import socketserver
+import sys
+import threading
+import time
+from collections import namedtuple
+
+SinkMessage = namedtuple('SinkMessage', ['mail_from', 'recipients', 'data'])
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode('ascii'))
+
+    def handle(self):
+        sink = self.server.sink
+        mail_from, recipients = None, []
+        self.reply('220 localhost SMTP sink ready')
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+
+            if verb == 'EHLO':
+                self.wfile.write(b'250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n')
+            elif verb == 'HELO':
+                self.reply('250 localhost')
+            elif verb == 'AUTH':
+                # Any credentials are accepted; AUTH LOGIN prompts for username and password
+                if command.upper().startswith('AUTH LOGIN'):
+                    parts = command.split()
+                    if len(parts) < 3:
+                        self.reply('334 VXNlcm5hbWU6')
+                        self.rfile.readline()
+                    self.reply('334 UGFzc3dvcmQ6')
+                    self.rfile.readline()
+                self.reply('235 Authentication successful')
+            elif verb == 'MAIL':
+                mail_from, recipients = command[10:].strip(' <>'), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command[8:].strip(' <>'))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                chunks = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk == b'.\r\n':
+                        break
+                    chunks.append(chunk[1:] if chunk.startswith(b'..') else chunk)
+                if sink.delay:
+                    time.sleep(sink.delay)
+                sink.record(SinkMessage(mail_from, recipients, b''.join(chunks)))
+                mail_from, recipients = None, []
+                self.reply('250 OK: queued')
+            elif verb in ('RSET', 'NOOP'):
+                if verb == 'RSET':
+                    mail_from, recipients = None, []
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SMTPSink:
+    """Threaded SMTP server on localhost that stores every message it receives"""
+
+    def __init__(self, host='127.0.0.1', port=0, delay=0.0):
+        self.delay = delay
+        self.messages = []
+        self._lock = threading.Lock()
+        self.server = socketserver.ThreadingTCPServer((host, port), _SMTPHandler)
+        self.server.daemon_threads = True
+        self.server.sink = self
+        self._thread = None
+
+    @property
+    def host(self):
+        return self.server.server_address[0]
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def record(self, message):
+        with self._lock:
+            self.messages.append(message)
+
+    @property
+    def recipient_count(self):
+        with self._lock:
+            return sum(len(message.recipients) for message in self.messages)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 1025
+    sink = SMTPSink(port=port)
+    print(f"📭 SMTP sink listening on {sink.host}:{sink.port}")
+    try:
+        sink.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📬 Received {len(sink.messages)} messages for {sink.recipient_count} recipients")
+        sink.stop()
+
+
+if __name__ == "__main__":
+    main()
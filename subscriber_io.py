@@ -0,0 +1,86 @@
+import csv
+import json
+import re
+from itertools import islice
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+SUBSCRIBER_COLUMNS = ['email', 'active', 'created_at']
+IMPORT_FORMATS = ('csv', 'ndjson', 'json')
+
+# Imported active values that mean inactive; anything else (or nothing) is active
+INACTIVE_VALUES = frozenset(['0', 'false', 'no', 'n', 'off', 'inactive'])
+
+
+def is_valid_email(email):
+    """Check an already normalized (stripped, lowercased) address"""
+    return EMAIL_PATTERN.match(email) is not None
+
+
+def chunked(iterable, size):
+    """Lists of up to size items from an iterable, read lazily"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def subscriber_record(row):
+    """Values of a subscribers row in SUBSCRIBER_COLUMNS order"""
+    return [row['email'], int(bool(row['active'])), row['created_at']]
+
+
+def _active(value):
+    if value is None or value == '':
+        return True
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() not in INACTIVE_VALUES
+
+
+def _from_json(item):
+    if isinstance(item, str):
+        return item, True
+    if isinstance(item, dict) and isinstance(item.get('email'), str):
+        return item['email'], _active(item.get('active'))
+    return '', True
+
+
+def iter_import_rows(stream, fmt):
+    """(line, email, active) for each record of a text stream, parsed as it is read
+
+    CSV uses the email (and optional active) column when there is a header row,
+    otherwise the first column. NDJSON takes one address string or object per
+    line; JSON a list of them, which has to be read whole.
+    """
+    if fmt == 'csv':
+        reader = csv.reader(stream)
+        header = None
+        try:
+            for row in reader:
+                if not any(cell.strip() for cell in row):
+                    continue
+                if header is None:
+                    header = [cell.strip().lower() for cell in row]
+                    if 'email' in header:
+                        email_column = header.index('email')
+                        active_column = header.index('active') if 'active' in header else None
+                        continue
+                    email_column, active_column = 0, None
+                email = row[email_column] if email_column < len(row) else ''
+                active = row[active_column] if active_column is not None and active_column < len(row) else None
+                yield reader.line_num, email, _active(active)
+        except csv.Error as e:
+            raise ValueError(f"line {reader.line_num}: {e}")
+    elif fmt == 'ndjson':
+        for line_number, line in enumerate(stream, 1):
+            if line.strip():
+                yield (line_number,) + _from_json(json.loads(line))
+    else:
+        items = json.load(stream)
+        if isinstance(items, dict):
+            items = items.get('subscribers') or items.get('emails') or []
+        for index, item in enumerate(items, 1):
+            yield (index,) + _from_json(item)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script for incident hotspots and time-of-day heatmaps
+"""
+
+import sys
+import os
+import tempfile
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from analytics import IncidentHeatmap, heatmap_cell, HOURS
+from models import Database, Incident
+from timeparse import central_tz
+
+
+def central_ts(*args):
+    return int(central_tz.localize(datetime(*args)).timestamp())
+
+
+def save_incidents(db, rows):
+    incidents = []
+    for location, description, ts in rows:
+        incident = Incident(location, description, "8:30 AM", incident_ts=ts)
+        incident.save(db)
+        incidents.append(incident)
+    return incidents
+
+
+def test_heatmap_cells():
+    """Test cells follow Central Time across daylight saving changes"""
+    print("🕒 Testing heatmap cells...")
+
+    # Monday 2024-01-01 is CST, Monday 2024-07-01 is CDT
+    assert heatmap_cell(central_ts(2024, 1, 1, 8, 30)) == 8
+    assert heatmap_cell(central_ts(2024, 7, 1, 8, 59)) == 8
+    assert heatmap_cell(central_ts(2024, 7, 7, 23, 0)) == 6 * HOURS + 23
+
+    print("✅ Heatmap cells working")
+
+
+def test_incremental_counts_match_rebuild():
+    """Test record() updates memory and SQLite the same way a full rebuild counts"""
+    print("\n🗺️  Testing incremental analytics...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'test.db'))
+        heatmap = IncidentHeatmap(db)
+        assert heatmap.top_hotspots() == []
+
+        monday_8am = central_ts(2024, 1, 1, 8, 30)
+        friday_5pm = central_ts(2024, 1, 5, 17, 10)
+        incidents = save_incidents(db, [
+            ("IH-45 North NB @ Tidwell", "Heavy truck accident", monday_8am),
+            ("IH-45 North SB @ Tidwell", "Accident, 18-wheeler", monday_8am + 60),
+            ("IH-10 Katy WB @ Washington", "Heavy truck stall", friday_5pm),
+        ])
+        assert heatmap.record(incidents) == 3
+        assert heatmap.record([]) == 0
+
+        counts = heatmap.heatmap()
+        assert counts[0][8] == 2 and counts[4][17] == 1
+        assert sum(map(sum, counts)) == 3
+        assert heatmap.heatmap(corridor='IH-10')[4][17] == 1
+        assert sum(map(sum, heatmap.heatmap(corridor='IH-10', category='wreck'))) == 0
+
+        top = heatmap.top_hotspots(1)
+        assert top == [{'corridor': 'IH-45', 'cross_street': 'Tidwell', 'count': 2}], top
+        assert heatmap.top_hotspots(corridor='IH-10')[0]['cross_street'] == 'Washington'
+
+        # A fresh instance loads the persisted counts, and a rebuild recounts them identically
+        reloaded = IncidentHeatmap(db)
+        assert reloaded.heatmap() == counts
+        assert reloaded.top_hotspots() == heatmap.top_hotspots()
+
+        save_incidents(db, [("IH-610 West Loop NB @ Richmond", "Lost load", friday_5pm)])
+        assert reloaded.rebuild() == 4
+        assert reloaded.heatmap()[4][17] == 2
+        assert IncidentHeatmap(db).heatmap() == reloaded.heatmap()
+
+    print("✅ Incremental analytics working")
+
+
+def main():
+    """Run all tests"""
+    test_heatmap_cells()
+    test_incremental_counts_match_rebuild()
+    print("\n🎉 All analytics tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script for the asyncio scrape -> alert pipeline
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from async_pipeline import AsyncPipeline
+from coalescer import AlertCoalescer
+from config import Config
+from coordinator import Deadline
+from delivery import ALERT_RETRY, ALERT_SENT
+from email_service import EmailService
+from fixtures import PageGenerator, ReplayServer, REPLAY_PATH
+from models import Database, Subscriber
+from scraper import TranStarScraper
+from smtp_sink import SMTPSink
+from test_coalescer import FakeClock, FakeEmailService
+
+
+def make_services(db, base_url, sink):
+    scraper = TranStarScraper(db=db, base_url=base_url)
+    email_service = EmailService(db=db)
+    email_service.smtp_server, email_service.smtp_port = sink.host, sink.port
+    email_service.use_tls = False
+    email_service.username = email_service.password = email_service.from_email = 'test@example.com'
+    return scraper, email_service
+
+
+def test_pipeline_matches_sync_cycle():
+    """Test the pipeline finds the same incidents as the sequential cycle and mails them"""
+    print("🧵 Testing async pipeline against the sync cycle...")
+
+    page = PageGenerator(seed=11, rows_per_table=6, relevant_ratio=0.6).page()
+    hourly_limit, Config.MAX_ALERTS_PER_HOUR = Config.MAX_ALERTS_PER_HOUR, 10 ** 6
+    try:
+        with tempfile.TemporaryDirectory() as tmp, ReplayServer([page]) as server, SMTPSink() as sink:
+            sync_scraper = TranStarScraper(db=Database(os.path.join(tmp, 'sync.db')), base_url=server.base_url)
+            expected = {incident.incident_hash for incident, _ in sync_scraper.run_scrape_cycle()}
+
+            db = Database(os.path.join(tmp, 'async.db'))
+            Subscriber.add(db, 'driver@example.com')
+            scraper, email_service = make_services(db, server.base_url, sink)
+            pipeline = AsyncPipeline(scraper, email_service, batch_size=4, linger=0.01)
+
+            result = pipeline.run(Deadline(30))
+            assert {incident.incident_hash for incident, _ in result.new_incidents} == expected
+            assert result.alerts_sent and len(result.batches_sent) > 1
+            assert len(result.alert_latencies) == len(expected)
+            email_service.drain()
+            assert len(sink.messages) == len(result.batches_sent)
+            assert {'fetch', 'parse', 'dedup', 'save'} <= set(scraper.timer.totals)
+
+            # Everything was alerted, so a second pass has nothing new
+            assert pipeline.run(Deadline(30)).new_incidents == []
+    finally:
+        Config.MAX_ALERTS_PER_HOUR = hourly_limit
+
+    print(f"✅ {len(expected)} incidents alerted in {len(result.batches_sent)} batches")
+
+
+def test_pipeline_merges_sources():
+    """Test several sources are fetched together and duplicate rows saved once"""
+    print("\n🔀 Testing multi-source fetch...")
+
+    page = PageGenerator(seed=5, rows_per_table=3, relevant_ratio=0.6).page()
+    with tempfile.TemporaryDirectory() as tmp, ReplayServer([page]) as first, ReplayServer([page]) as second, \
+            SMTPSink() as sink:
+        db = Database(os.path.join(tmp, 'test.db'))
+        scraper, email_service = make_services(db, first.base_url, sink)
+        pipeline = AsyncPipeline(scraper, email_service)
+
+        single = TranStarScraper(db=Database(os.path.join(tmp, 'single.db')), base_url=first.base_url)
+        expected = len(single.run_scrape_cycle())
+
+        urls = [f"{first.base_url}{REPLAY_PATH}", f"{second.base_url}{REPLAY_PATH}", f"{first.base_url}/missing"]
+        result = pipeline.run(urls=urls)
+        assert len(result.new_incidents) == expected
+
+    print(f"✅ {expected} incidents from {len(urls)} sources")
+
+
+def test_pipeline_sends_through_coalescer():
+    """Test async batches share the coalescer's digest window and retries instead of sending directly"""
+    print("\n📥 Testing async pipeline through the alert coalescer...")
+
+    page = PageGenerator(seed=11, rows_per_table=6, relevant_ratio=0.6).page()
+    with tempfile.TemporaryDirectory() as tmp, ReplayServer([page]) as server, SMTPSink() as sink:
+        db = Database(os.path.join(tmp, 'test.db'))
+        scraper, email_service = make_services(db, server.base_url, sink)
+        mail, clock = FakeEmailService(), FakeClock()
+        # A window no batch reaches on its own: everything stays buffered
+        coalescer = AlertCoalescer(mail, window=300, flush_severity=99, max_per_hour=10, clock=clock)
+        pipeline = AsyncPipeline(scraper, email_service, batch_size=4, linger=0.01, coalescer=coalescer)
+
+        result = pipeline.run(Deadline(30))
+        found = len(result.new_incidents)
+        assert found > 4
+        assert result.batches_sent == [] and not result.alerts_sent
+        assert len(coalescer) == found and mail.digests == []
+        assert sink.messages == []
+
+        # A retryable failure keeps the digest buffered rather than dropping it
+        clock.now += 300
+        mail.outcome = ALERT_RETRY
+        assert coalescer.flush() is False
+        assert len(coalescer) == found
+
+        clock.now += 300
+        mail.outcome = ALERT_SENT
+        assert coalescer.flush() is True
+        assert len(mail.digests) == 1 and len(mail.digests[0]) == found
+        assert len(coalescer) == 0
+
+    print(f"✅ {found} incidents sent in one digest after a retry")
+
+
+def main():
+    """Run all tests"""
+    test_pipeline_matches_sync_cycle()
+    test_pipeline_merges_sources()
+    test_pipeline_sends_through_coalescer()
+    print("\n🎉 All async pipeline tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Test script for webhook, chat and SMS channels against local HTTP stand-ins
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from channels import (Channel, ChannelDispatcher, ChatChannel, SmsChannel, WebhookChannel, sign_payload,
+                      verify_signature, IDEMPOTENCY_HEADER, SIGNATURE_HEADER, TIMESTAMP_HEADER)
+from coalescer import AlertCoalescer
+from config import Config
+from coordinator import CycleJob, Deadline
+from delivery import ALERT_SENT
+from http_sink import HTTPSink
+from metrics import CHANNEL_SEND_SECONDS
+from models import Database, AlertOutbox
+from test_helpers import save_incidents
+
+
+def make_incidents(db):
+    """A low-severity stall and a hazmat spill, so SMS only carries the spill"""
+    return save_incidents(db, [("IH-10 EB @ Exit 2", "Heavy truck stall", 2, None),
+                               ("IH-10 EB @ Exit 5", "Hazmat spill from 18-wheeler", 5, None)])
+
+
+def test_channel_needs_a_body():
+    """Test Channel is abstract: a destination that does not say what it sends cannot be built"""
+    print("\n🧱 Testing the channel base class...")
+
+    try:
+        Channel('bare', 'http://127.0.0.1:9/')
+        assert False, "Channel without a body should not instantiate"
+    except TypeError:
+        pass
+
+    print("✅ Channel base class abstract")
+
+
+def test_signatures():
+    """Test HMAC signatures verify, and tampered bodies or stale timestamps do not"""
+    print("🔏 Testing payload signing...")
+
+    body = b'{"event": "incidents.new"}'
+    signature = sign_payload('s3cret', '1700000000', body)
+    assert signature.startswith('sha256=')
+    assert verify_signature('s3cret', '1700000000', body, signature, now=1700000100)
+    assert not verify_signature('s3cret', '1700000000', body + b' ', signature, now=1700000100)
+    assert not verify_signature('other', '1700000000', body, signature, now=1700000100)
+    assert not verify_signature('s3cret', '1700000000', body, signature, now=1700001000)
+    assert not verify_signature('s3cret', None, body, signature)
+
+    print("✅ Payload signing working")
+
+
+def test_fan_out_to_every_channel():
+    """Test one push reaches the webhook, chat and SMS stand-ins with the right payloads"""
+    print("\n📡 Testing channel fan-out...")
+
+    with tempfile.TemporaryDirectory() as tmp, HTTPSink() as hook, HTTPSink() as chat, HTTPSink() as sms:
+        db = Database(os.path.join(tmp, 'test.db'))
+        incidents = make_incidents(db)
+        dispatcher = ChannelDispatcher(db, [
+            WebhookChannel('dispatch-board', hook.url, secret='s3cret'),
+            ChatChannel('ops-chat', chat.url),
+            SmsChannel('sms', sms.url, ['+17135550100', '+17135550101'], token='tok', min_severity=4),
+        ])
+
+        before = CHANNEL_SEND_SECONDS.count(channel='sms', outcome='ok')
+        assert dispatcher.push(incidents) == {'dispatch-board': True, 'ops-chat': True, 'sms': True}
+
+        request = hook.requests[0]
+        assert verify_signature('s3cret', request.headers[TIMESTAMP_HEADER], request.body,
+                                request.headers[SIGNATURE_HEADER])
+        assert request.headers[IDEMPOTENCY_HEADER]
+        assert [incident['severity'] for incident in hook.payloads()[0]['incidents']] == [2, 5]
+        assert 'IH-10 EB @ Exit 5' in chat.payloads()[0]['text']
+
+        # SMS only carries the high-severity incident, one text per number
+        texts = sms.payloads()
+        assert sorted(text['to'] for text in texts) == ['+17135550100', '+17135550101']
+        assert all('Exit 5' in text['message'] and 'Exit 2' not in text['message'] for text in texts)
+        assert sms.requests[0].headers['Authorization'] == 'Bearer tok'
+        assert CHANNEL_SEND_SECONDS.count(channel='sms', outcome='ok') == before + 2
+
+        # Pushing the same incidents again sends nothing
+        assert dispatcher.push(incidents) == {}
+        assert len(hook.requests) == 1 and len(sms.requests) == 2
+
+    print("✅ Channel fan-out working")
+
+
+def test_retries_then_queues_for_next_push():
+    """Test transient errors are retried in place, and a dead endpoint is caught up exactly once later"""
+    print("\n🔁 Testing channel retries...")
+
+    with tempfile.TemporaryDirectory() as tmp, HTTPSink(statuses=[503]) as flaky, \
+            HTTPSink(statuses=[500, 500, 500]) as down:
+        db = Database(os.path.join(tmp, 'test.db'))
+        incidents = make_incidents(db)
+        dispatcher = ChannelDispatcher(db, [
+            WebhookChannel('flaky', flaky.url, retries=2, backoff=0.01),
+            ChatChannel('down', down.url, retries=2, backoff=0.01),
+        ], backoff=0)
+
+        assert dispatcher.push(incidents) == {'flaky': True, 'down': False}
+        assert len(flaky.requests) == 1 and not down.requests
+        assert AlertOutbox.counts(db)['pending'] == 2
+
+        # The next cycle has nothing new, but the queued chat message goes out once
+        assert dispatcher.push([]) == {'down': True}
+        assert dispatcher.push([]) == {}
+        assert len(down.requests) == 1 and len(flaky.requests) == 1
+        assert AlertOutbox.counts(db) == {'pending': 0, 'sending': 0, 'sent': 4, 'failed': 0}
+
+    print("✅ Channel retries working")
+
+
+def test_channels_send_concurrently():
+    """Test slow endpoints are pushed in parallel rather than one after another"""
+    print("\n⚡ Testing concurrent dispatch...")
+
+    with tempfile.TemporaryDirectory() as tmp, HTTPSink(delay=0.3) as one, HTTPSink(delay=0.3) as two, \
+            HTTPSink(delay=0.3) as three:
+        db = Database(os.path.join(tmp, 'test.db'))
+        dispatcher = ChannelDispatcher(db, [WebhookChannel(f'hook{n}', sink.url)
+                                            for n, sink in enumerate((one, two, three))], workers=3)
+        start = time.perf_counter()
+        assert all(dispatcher.push(make_incidents(db)).values())
+        elapsed = time.perf_counter() - start
+        assert elapsed < 0.8, f"pushes ran serially ({elapsed:.2f}s)"
+
+    print(f"✅ Three 300 ms endpoints pushed in {elapsed * 1000:.0f} ms")
+
+
+class DigestRecorder:
+    """Email service stand-in recording the incident ids of each digest"""
+
+    def __init__(self):
+        self.digests = []
+
+    def deliver_alert(self, incidents, deadline=None, rate_limit=True, requeue=None):
+        self.digests.append([incident_id for _, incident_id in incidents])
+        return ALERT_SENT
+
+
+def test_channel_errors_do_not_abort_cycle():
+    """Test a channel push that raises is logged while the cycle still buffers and sends the email digest"""
+    print("\n🧯 Testing a failing channel push inside a cycle...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.DATABASE_PATH = os.path.join(tmp, 'test.db')
+        import app as web
+        web.scheduler.pause()
+        incidents = make_incidents(Database(Config.DATABASE_PATH))
+
+        def broken_push(incidents, deadline=None):
+            raise RuntimeError('dispatcher pool shut down')
+
+        mail = DigestRecorder()
+        originals = (web.pipeline, web.coalescer, web.scraper.run_scrape_cycle, web.dispatcher.push)
+        web.pipeline, web.coalescer = None, AlertCoalescer(mail, window=300, flush_severity=5, max_per_hour=10)
+        web.scraper.run_scrape_cycle = lambda deadline=None: incidents
+        web.dispatcher.push = broken_push
+        try:
+            job = CycleJob('manual')
+            assert web.run_cycle(job, Deadline(30)) == {'new_incidents': 2, 'alerts_sent': True}
+        finally:
+            web.pipeline, web.coalescer, web.scraper.run_scrape_cycle, web.dispatcher.push = originals
+
+        assert mail.digests == [[incident_id for _, incident_id in incidents]]
+        errors = web.event_log.query(cycle_id=job.id, level='error')
+        assert [event.message for event in errors] == ["❌ Channel push failed: dispatcher pool shut down"]
+
+    print("✅ Failing channel push logged; digest still sent")
+
+
+def main():
+    """Run all tests"""
+    test_signatures()
+    test_channel_needs_a_body()
+    test_fan_out_to_every_channel()
+    test_retries_then_queues_for_next_push()
+    test_channels_send_concurrently()
+    test_channel_errors_do_not_abort_cycle()
+    print("\n🎉 All channel tests passed!")
+
+
+if __name__ == "__main__":
+    main()
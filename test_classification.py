@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script for stored incident classification
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from classification import classify_incident
+from corridors import parse_location, is_major_road
+from geocode import Geocoder, maps_link
+from models import Database, Incident
+
+
+def test_classify_incident():
+    """Test category flags, corridor and direction extraction"""
+    print("🧪 Testing incident classification...")
+
+    c = classify_incident("IH-69 Eastex Northbound After FM-1960", "Heavy Truck, Stall", "stalls")
+    assert c.category == 'stall' and c.is_stall and not c.is_wreck
+    assert c.corridor == 'IH-69' and c.direction == 'NB' and c.table_type == 'stalls'
+
+    c = classify_incident("I-45 SB @ Beltway 8", "Hazmat spill from tractor-trailer, 2 lanes blocked")
+    assert c.category == 'hazmat' and c.is_hazmat and c.is_spill and c.involves_truck
+    assert c.corridor == 'IH-45' and c.direction == 'SB'
+    assert c.severity == 5
+
+    c = classify_incident("Main St @ Elgin", "Traffic light out")
+    assert c.category == 'other' and c.corridor is None
+
+    print("✅ Classification working")
+
+
+def test_corridor_gazetteer():
+    """Test corridor, direction and cross street resolution"""
+    print("\n🛣️  Testing corridor gazetteer...")
+
+    info = parse_location("IH-69 Eastex Northbound After FM-1960")
+    assert info == ("IH-69 Eastex NB @ FM-1960", "IH-69", "NB", "FM-1960")
+
+    info = parse_location("Sam Houston Tollway North EB near Aldine Westfield")
+    assert info.corridor == "Beltway 8" and info.cross_street == "Aldine Westfield"
+
+    info = parse_location("Richey Rd @ Hardy Toll Road NB")
+    assert info.corridor == "Hardy Toll Road" and info.cross_street == "Richey Rd"
+
+    assert parse_location("Katy Fwy EB at Bunker Hill").corridor == "IH-10"
+    assert parse_location("I-45 North Southbound at Beltway 8").clean == "IH-45 North SB @ Beltway 8"
+
+    assert is_major_road("Westpark Tollway at Eldridge")
+    assert not is_major_road("Main St at Elgin")
+
+    print("✅ Corridor gazetteer working")
+
+
+def test_backfill_and_sql_filters():
+    """Test backfill of legacy rows and SQL category filtering"""
+    print("\n🗄️  Testing classification backfill...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'test.db'))
+
+        # Simulate rows stored before classification columns existed
+        conn = db.get_connection()
+        conn.executemany(
+            'INSERT INTO incidents (incident_hash, location, description) VALUES (?, ?, ?)',
+            [(f'legacy-{i}', 'US-290 WB @ Mason Rd', 'Semi truck accident' if i % 2 else 'Cargo spill')
+             for i in range(7)]
+        )
+        conn.commit()
+        conn.close()
+
+        assert Incident.backfill_classification(db, batch_size=3) == 7
+
+        groups = Incident.get_recent_by_category(db, hours=24)
+        assert len(groups['wrecks']) == 3
+        assert len(groups['spills']) == 4
+        assert all(row['corridor'] == 'US-290' for row in groups['wrecks'])
+
+        incident = Incident("IH-10 EB @ Taylor", "Hazmat leak from 18-wheeler")
+        incident_id = incident.save(db)
+        assert Incident.filter_hazmat_ids(db, [incident_id]) == {incident_id}
+
+    print("✅ Backfill and SQL filters working")
+
+
+def test_geocoding_cache():
+    """Test interchange lookup, fuzzy fallback and the persistent cache"""
+    print("\n📍 Testing geocoding...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'test.db'))
+        geocoder = Geocoder(db)
+
+        point = geocoder.geocode('IH-45', 'Beltway 8')
+        assert point.source == 'interchange'
+        assert geocoder.geocode('Beltway 8', 'IH-45 North') == point
+
+        assert geocoder.geocode('IH-10', 'Gesner Rd').source == 'fuzzy'
+        assert geocoder.geocode('IH-10', 'Nowhere Ln').source == 'corridor'
+        assert geocoder.geocode(None, 'Main St') is None
+
+        # A fresh geocoder answers from the SQLite cache
+        cached = Geocoder(db, interchanges={}).geocode('IH-45', 'Beltway 8')
+        assert cached == point
+
+        incident = Incident("IH-69 Eastex NB @ FM-1960", "Heavy truck stall",
+                            classification=classify_incident("IH-69 Eastex NB @ FM-1960", "Heavy truck stall"))
+        geocoder.locate(incident)
+        incident_id = incident.save(db)
+        conn = db.get_connection()
+        row = conn.execute('SELECT lat, lon, geocode_source FROM incidents WHERE id = ?', (incident_id,)).fetchone()
+        conn.close()
+        assert (row['lat'], row['lon'], row['geocode_source']) == (incident.lat, incident.lon, 'interchange')
+        assert incident.maps_link.endswith(f"{incident.lat:.5f},{incident.lon:.5f}")
+
+    assert 'Main%20St%20and%20Elgin' in maps_link('Main St @ Elgin')
+
+    print("✅ Geocoding working")
+
+
+def test_incident_slots_and_lazy_hash():
+    """Test incidents are slotted and only hash when asked"""
+    print("\n🧱 Testing compact incidents...")
+
+    incident = Incident("IH-45 North NB @ Tidwell", "Heavy truck accident reported", "3:16 PM")
+    assert not hasattr(incident, '__dict__')
+    assert incident._incident_hash is None
+
+    same = Incident("ih-45 north nb @ tidwell ", "Heavy truck accident reported", "4:00 PM")
+    assert incident.incident_hash == same.incident_hash
+    assert incident._incident_hash == incident.incident_hash
+
+    print("✅ Compact incidents working")
+
+
+def main():
+    """Run all tests"""
+    test_classify_incident()
+    test_corridor_gazetteer()
+    test_backfill_and_sql_filters()
+    test_geocoding_cache()
+    test_incident_slots_and_lazy_hash()
+    print("\n🎉 All classification tests passed!")
+
+
+if __name__ == "__main__":
+    main()
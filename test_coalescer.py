@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Test script for coalescing new incidents into rate-budgeted alert digests
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import Incident
+from coalescer import AlertCoalescer, BUDGET_PERIOD
+from delivery import ALERT_SENT, ALERT_RETRY, ALERT_FAILED
+
+
+class FakeClock:
+    """Simulated monotonic clock advanced by hand"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeEmailService:
+    """Records each digest instead of sending it"""
+
+    def __init__(self):
+        self.digests = []
+        self.outcome = ALERT_SENT
+        # Incidents whose bulk lane delivery fails after deliver_alert has returned
+        self.bulk_failed = []
+
+    def deliver_alert(self, incidents, deadline=None, rate_limit=True, requeue=None):
+        assert rate_limit is False
+        if self.outcome == ALERT_SENT:
+            self.digests.append([incident_id for _, incident_id in incidents])
+            if self.bulk_failed:
+                requeue([item for item in incidents if item[1] in self.bulk_failed])
+        return self.outcome
+
+
+def incidents(*ids, severity=2):
+    return [(Incident(f"IH-10 at exit {n}", "Heavy truck stall", "3:16 PM", severity), n) for n in ids]
+
+
+def test_window_and_severity_flush():
+    """Test incidents buffer until the window elapses, or a high-severity one arrives"""
+    print("🪟 Testing coalescing window...")
+
+    clock, mail = FakeClock(), FakeEmailService()
+    coalescer = AlertCoalescer(mail, window=300, flush_severity=4, max_per_hour=10, clock=clock)
+
+    assert coalescer.flush() is None
+    assert coalescer.offer(incidents(1, 2)) is None
+    clock.advance(120)
+    assert coalescer.offer(incidents(2, 3)) is None
+    assert len(coalescer) == 3
+    clock.advance(180)
+    assert coalescer.flush() is True
+    assert mail.digests == [[1, 2, 3]] and len(coalescer) == 0
+
+    # A new window opens with the next incident; high severity cuts it short
+    assert coalescer.offer(incidents(4)) is None
+    clock.advance(10)
+    assert coalescer.offer(incidents(5, severity=5)) is True
+    assert mail.digests[-1] == [4, 5]
+
+    print("✅ Coalescing window working")
+
+
+def test_budget_overflow_is_queued():
+    """Test flushes past the hourly budget stay queued and go out once budget frees up"""
+    print("\n⏳ Testing hourly budget overflow...")
+
+    clock, mail = FakeClock(), FakeEmailService()
+    coalescer = AlertCoalescer(mail, window=60, flush_severity=4, max_per_hour=2, clock=clock)
+
+    for n in range(2):
+        assert coalescer.offer(incidents(n, severity=5)) is True
+    assert coalescer.budget_left() == 0
+
+    # Urgent or not, nothing is dropped while the budget is spent
+    assert coalescer.offer(incidents(10, severity=5)) is None
+    clock.advance(600)
+    assert coalescer.offer(incidents(11)) is None
+    assert len(mail.digests) == 2 and len(coalescer) == 2
+
+    clock.advance(BUDGET_PERIOD - 600)
+    assert coalescer.flush() is True
+    assert mail.digests[-1] == [10, 11]
+
+    print("✅ Budget overflow queued")
+
+
+def test_failed_send_is_retried():
+    """Test a failed digest is kept, ahead of later arrivals, for the next window"""
+    print("\n🔁 Testing failed digest retry...")
+
+    clock, mail = FakeClock(), FakeEmailService()
+    coalescer = AlertCoalescer(mail, window=60, flush_severity=4, max_per_hour=5, clock=clock)
+
+    mail.outcome = ALERT_RETRY
+    assert coalescer.offer(incidents(1, 2, severity=4)) is False
+    assert len(coalescer) == 2 and coalescer.budget_left() == 5
+
+    mail.outcome = ALERT_SENT
+    assert coalescer.offer(incidents(3)) is None
+    clock.advance(60)
+    assert coalescer.flush() is True
+    assert mail.digests == [[1, 2, 3]]
+
+    print("✅ Failed digest retried")
+
+
+def test_failures_do_not_grow_the_buffer():
+    """Test permanent failures are dropped at once and transient ones after max_attempts windows"""
+    print("\n📭 Testing failed digests are bounded...")
+
+    clock, mail = FakeClock(), FakeEmailService()
+    coalescer = AlertCoalescer(mail, window=60, flush_severity=4, max_per_hour=50, max_attempts=3, clock=clock)
+
+    # Bad email configuration will not fix itself: the outbox keeps the deliveries, not the buffer
+    mail.outcome = ALERT_FAILED
+    assert coalescer.offer(incidents(1, severity=4)) is False
+    assert len(coalescer) == 0
+
+    # An SMTP outage is retried each window, then handed back to the outbox
+    mail.outcome = ALERT_RETRY
+    for attempt in range(3):
+        assert coalescer.offer(incidents(10 + attempt, severity=4)) is False
+        clock.advance(60)
+        assert len(coalescer) == (attempt + 1 if attempt < 2 else 0)
+
+    mail.outcome = ALERT_SENT
+    assert coalescer.offer(incidents(20, severity=4)) is True
+    assert mail.digests == [[20]]
+
+    print("✅ Failed digests bounded")
+
+
+def test_failed_bulk_delivery_is_requeued():
+    """Test incidents a bulk lane delivery left undelivered come back for the next window"""
+    print("\n📨 Testing late bulk failures...")
+
+    clock, mail = FakeClock(), FakeEmailService()
+    coalescer = AlertCoalescer(mail, window=60, flush_severity=4, max_per_hour=50, clock=clock)
+
+    mail.bulk_failed = [2]
+    assert coalescer.offer(incidents(1, 2, severity=4)) is True
+    assert len(coalescer) == 1
+
+    mail.bulk_failed = []
+    clock.advance(60)
+    assert coalescer.flush() is True
+    assert mail.digests == [[1, 2], [2]]
+
+    print("✅ Late bulk failures requeued")
+
+
+def main():
+    """Run all tests"""
+    test_window_and_severity_flush()
+    test_budget_overflow_is_queued()
+    test_failed_send_is_retried()
+    test_failures_do_not_grow_the_buffer()
+    test_failed_bulk_delivery_is_requeued()
+    print("\n🎉 All coalescer tests passed!")
+
+
+if __name__ == "__main__":
+    main()
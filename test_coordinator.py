@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for the scrape cycle coordinator
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from coordinator import CycleCoordinator, Deadline
+from fixtures import synthesize_page
+
+
+def test_single_flight():
+    """Test triggers during a running cycle join it instead of starting another"""
+    print("🚦 Testing single-flight cycles...")
+
+    release = threading.Event()
+    runs = []
+
+    def run_cycle(job, deadline):
+        runs.append(job.source)
+        release.wait(5)
+        return {'new_incidents': 3}
+
+    coordinator = CycleCoordinator(run_cycle, deadline_seconds=30)
+    manual = coordinator.submit('manual')
+    while coordinator.current is None:
+        time.sleep(0.01)
+
+    # A scheduled trigger blocks on the manual cycle instead of running its own
+    scheduled = []
+    thread = threading.Thread(target=lambda: scheduled.append(coordinator.run('scheduled')))
+    thread.start()
+    assert coordinator.submit('manual') is manual
+    release.set()
+    thread.join(5)
+
+    assert scheduled[0] is manual and manual.status == 'done'
+    assert manual.result == {'new_incidents': 3} and manual.joined == ['scheduled', 'manual']
+    assert runs == ['manual'] and coordinator.get(manual.id) is manual
+
+    # The next trigger starts a fresh cycle
+    assert coordinator.run('scheduled') is not manual and runs == ['manual', 'scheduled']
+
+    print("✅ Single-flight working")
+
+
+def test_failures_and_deadline():
+    """Test failed cycles are recorded and stage budgets respect the deadline"""
+    print("\n⏰ Testing deadline budgets...")
+
+    def failing_cycle(job, deadline):
+        raise RuntimeError("TranStar unreachable")
+
+    job = CycleCoordinator(failing_cycle, deadline_seconds=30).run('scheduled')
+    assert job.status == 'failed' and job.error == "TranStar unreachable" and job.finished_at
+
+    deadline = Deadline(10)
+    assert 4.9 < deadline.budget('fetch') <= 5.0
+    assert 2.4 < deadline.budget('parse') <= 2.5
+    assert 9.9 < deadline.budget('save') <= 10.0
+    assert Deadline(0).budget('fetch') == 0 and Deadline(0).expired()
+
+    print("✅ Deadline budgets working")
+
+
+def test_scraper_honours_deadline():
+    """Test the scraper skips work once its budget is spent"""
+    print("\n🛑 Testing scraper deadline handling...")
+
+    from scraper import TranStarScraper
+    scraper = TranStarScraper(base_url='http://127.0.0.1:9')
+
+    # An exhausted deadline skips the fetch entirely
+    assert scraper.run_scrape_cycle(Deadline(0)) == []
+    assert 'fetch' not in scraper.timer.totals
+
+    # An exhausted parse budget stops part way through the page
+    page = synthesize_page(seed=5, rows_per_table=10, relevant_ratio=1.0)
+    assert scraper.parse_html(page)
+    assert scraper.parse_html(page, stop_at=time.monotonic() - 1) == []
+
+    print("✅ Scraper deadline handling working")
+
+
+def main():
+    """Run all tests"""
+    test_single_flight()
+    test_failures_and_deadline()
+    test_scraper_honours_deadline()
+    print("\n🎉 All coordinator tests passed!")
+
+
+if __name__ == "__main__":
+    main()
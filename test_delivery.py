@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test script for the priority and bulk alert delivery lanes
+"""
+
+import sys
+import os
+import threading
+from contextlib import contextmanager
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from delivery import PRIORITY, BULK, AlertMessage, DeliveryLane, RateLimiter, deliver, lane_for
+from models import Incident
+
+
+class FakeMailer:
+    """Records messages per connection; subjects starting with 'slow' block until released"""
+
+    def __init__(self):
+        self.sent = []
+        self.connections = 0
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connect(self, timeout):
+        with self._lock:
+            self.connections += 1
+        yield self
+
+    def send_message(self, server, message):
+        if message.subject.startswith('slow'):
+            assert self.release.wait(5)
+        if message.subject.startswith('broken'):
+            raise OSError('relay refused')
+        with self._lock:
+            self.sent.append(message.subject)
+
+
+def message(subject):
+    return AlertMessage(subject, '<p>alert</p>', 'alert', ['driver@example.com'], {})
+
+
+def test_lane_for():
+    """Test hazmat and high-severity messages take the priority lane"""
+    print("🚦 Testing lane selection...")
+
+    stall = [(Incident("IH-10 EB @ Taylor", "Heavy truck stall", "3:16 PM", 1), 1)]
+    wreck = stall + [(Incident("IH-45 NB @ Tidwell", "Heavy truck accident", "3:20 PM", 4), 2)]
+    assert lane_for('standard', stall) == BULK
+    assert lane_for('standard', wreck) == PRIORITY
+    assert lane_for('hazmat', stall) == PRIORITY
+
+    print("✅ Lane selection working")
+
+
+def test_priority_not_blocked_by_bulk():
+    """Test a priority message is delivered while the bulk lane is still stuck sending"""
+    print("\n🏎️  Testing priority lane isolation...")
+
+    mailer = FakeMailer()
+    lanes = {PRIORITY: DeliveryLane(PRIORITY, mailer, workers=2), BULK: DeliveryLane(BULK, mailer, workers=1)}
+    bulk = lanes[BULK].submit([message('slow digest'), message('stall digest')], timeout=5)
+    urgent = lanes[PRIORITY].submit([message('hazmat spill'), message('rollover')], timeout=5)
+
+    for future in urgent:
+        future.result(timeout=5)
+    assert sorted(mailer.sent) == ['hazmat spill', 'rollover']
+    assert not any(future.done() for future in bulk)
+
+    mailer.release.set()
+    for future in bulk:
+        future.result(timeout=5)
+    assert mailer.sent[-2:] == ['slow digest', 'stall digest']
+    # Two priority workers and one bulk worker, one connection each
+    assert mailer.connections == 3
+
+    print("✅ Priority lane isolated from bulk")
+
+
+def test_deliver_waits_for_priority_only():
+    """Test deliver returns once the priority lane has sent, handing back the bulk lane's futures"""
+    print("\n📬 Testing deliver across lanes...")
+
+    mailer = FakeMailer()
+    lanes = {PRIORITY: DeliveryLane(PRIORITY, mailer), BULK: DeliveryLane(BULK, mailer)}
+    bulk = deliver(lanes, [(BULK, message('slow digest')), (PRIORITY, message('hazmat spill'))], timeout=5)
+    assert mailer.sent == ['hazmat spill']
+    assert len(bulk) == 1 and not bulk[0].done()
+    mailer.release.set()
+    bulk[0].result(timeout=5)
+    assert mailer.sent == ['hazmat spill', 'slow digest']
+
+    # A priority failure still reaches the caller; a bulk failure only shows on its future
+    try:
+        deliver(lanes, [(PRIORITY, message('broken spill'))], timeout=5)
+        assert False, "a failed priority lane should raise"
+    except OSError:
+        pass
+    bulk = deliver(lanes, [(BULK, message('broken digest'))], timeout=5)
+    assert isinstance(bulk[0].exception(timeout=5), OSError)
+
+    print("✅ Deliver working")
+
+
+def test_rate_limiter_spacing():
+    """Test sends are spaced evenly at the lane's per-minute limit"""
+    print("\n⏱️  Testing lane rate limit...")
+
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    limiter = RateLimiter(per_minute=30, clock=lambda: now[0], sleep=sleep)
+    for _ in range(3):
+        limiter.wait()
+    assert sleeps == [2.0, 2.0] and now[0] == 4.0
+
+    now[0] += 10
+    limiter.wait()
+    assert len(sleeps) == 2
+
+    unlimited = RateLimiter(per_minute=0, clock=lambda: now[0], sleep=sleep)
+    unlimited.wait()
+    unlimited.wait()
+    assert len(sleeps) == 2
+
+    print("✅ Lane rate limit working")
+
+
+def main():
+    """Run all tests"""
+    test_lane_for()
+    test_priority_not_blocked_by_bulk()
+    test_deliver_waits_for_priority_only()
+    test_rate_limiter_spacing()
+    print("\n🎉 All delivery lane tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script for the structured scrape event log
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from event_log import EventLog, event_to_dict
+from models import Database
+
+
+def test_ring_buffer():
+    """Test the ring buffer keeps only the newest events"""
+    print("🌀 Testing ring buffer...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = EventLog(Database(os.path.join(tmp, 'test.db')), capacity=5, flush_interval=60)
+        for n in range(12):
+            log.record(f"event {n}")
+
+        assert [event.message for event in log.recent(10)] == [f"event {n}" for n in range(11, 6, -1)]
+        assert event_to_dict(log.recent(1)[0])['timestamp'].endswith(('CST', 'CDT'))
+
+    print("✅ Ring buffer working")
+
+
+def test_spill_and_query():
+    """Test events spill to SQLite and page with filters"""
+    print("\n💾 Testing spillover and paged queries...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'test.db'))
+        log = EventLog(db, capacity=3, flush_interval=60)
+        for n in range(10):
+            log.record(f"cycle a stage {n}", cycle_id='a', stage='parse', duration_ms=float(n))
+        log.record("cycle b failed", level='error', cycle_id='b', counts={'new_incidents': 0})
+        assert log.flush() == 11
+        log.record("unflushed", cycle_id='a')
+
+        conn = db.get_connection()
+        assert conn.execute('SELECT COUNT(*) FROM scrape_events').fetchone()[0] == 11
+        conn.close()
+
+        errors = log.query(level='error')
+        assert len(errors) == 1 and errors[0].counts == {'new_incidents': 0}
+
+        # Unflushed events are included and newest first
+        page = log.query(cycle_id='a', limit=4)
+        assert [event.message for event in page] == ['unflushed'] + [f"cycle a stage {n}" for n in (9, 8, 7)]
+        page = log.query(cycle_id='a', before=page[-1].ts, limit=4)
+        assert [event.message for event in page] == [f"cycle a stage {n}" for n in (6, 5, 4, 3)]
+
+        assert len(log.query(stage='parse', limit=100)) == 10
+
+    print("✅ Spillover and queries working")
+
+
+def test_debug_skipped_before_limit():
+    """Test hidden debug events do not leave live or paged results short"""
+    print("\n🔇 Testing debug filtering...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = EventLog(Database(os.path.join(tmp, 'test.db')), capacity=20, flush_interval=60)
+        for n in range(8):
+            log.record(f"info {n}")
+            log.record(f"debug {n}", level='debug')
+
+        live = log.recent(4, exclude_level='debug')
+        assert [event.message for event in live] == [f"info {n}" for n in (7, 6, 5, 4)]
+        log.flush()
+        page = log.query(before=live[-1].ts, limit=4, exclude_level='debug')
+        assert [event.message for event in page] == [f"info {n}" for n in (3, 2, 1, 0)]
+        assert log.query(level='debug', limit=1)[0].message == "debug 7"
+
+        # The shutdown flush writes whatever the flusher thread has not
+        log.record("last words")
+        log.close()
+        conn = log.db.get_connection()
+        assert conn.execute("SELECT COUNT(*) FROM scrape_events WHERE message = 'last words'").fetchone()[0] == 1
+        conn.close()
+
+    print("✅ Debug filtering working")
+
+
+def main():
+    """Run all tests"""
+    test_ring_buffer()
+    test_spill_and_query()
+    test_debug_skipped_before_limit()
+    print("\n🎉 All event log tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming incident exports
+"""
+
+import sys
+import os
+import csv
+import io
+import json
+import sqlite3
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from export import EXPORT_COLUMNS, export_stream
+from models import Database, Incident
+from test_helpers import save_incidents
+
+
+def make_db(tmp):
+    """Three incidents share a timestamp, so chunk boundaries have to break ties on id"""
+    db = Database(os.path.join(tmp, 'test.db'))
+    save_incidents(db, [
+        ("IH-45 North NB @ Tidwell", "Heavy truck accident", 1, 1000),
+        ("IH-45 Gulf SB @ Edgebrook", "Hazmat spill, tanker", 1, 2000),
+        ("IH-10 Katy WB @ Washington", "Heavy truck stall", 1, 2000),
+        ("IH-610 West Loop NB @ Richmond", "Accident, 18-wheeler", 1, 2000),
+        ("IH-45 North SB @ Tidwell", "Truck accident, left lane", 1, 5000),
+    ])
+    return db
+
+
+def test_iter_range_chunks():
+    """Test keyset chunks cover the range once, oldest first, without holding a read lock"""
+    print("📦 Testing chunked incident reads...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_db(tmp)
+
+        chunks = list(Incident.iter_range(db, chunk_size=2))
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert [row['id'] for chunk in chunks for row in chunk] == [1, 2, 3, 4, 5]
+        assert [row['id'] for chunk in Incident.iter_range(db, 2000, 5000, chunk_size=2) for row in chunk] == [2, 3, 4]
+        assert list(Incident.iter_range(db, 6000)) == []
+
+        # A writer that refuses to wait still gets in between chunks
+        reader = Incident.iter_range(db, chunk_size=2)
+        next(reader)
+        writer = sqlite3.connect(db.db_path, timeout=0)
+        writer.execute("UPDATE incidents SET severity = 5 WHERE id = 1")
+        writer.commit()
+        writer.close()
+        assert sum(len(chunk) for chunk in reader) == 3
+
+    print("✅ Chunked reads working")
+
+
+def test_csv_and_ndjson_streams():
+    """Test both formats carry every column and row"""
+    print("\n📤 Testing export formats...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_db(tmp)
+
+        text = ''.join(export_stream('csv', Incident.iter_range(db, chunk_size=2)))
+        rows = list(csv.reader(io.StringIO(text)))
+        assert rows[0] == EXPORT_COLUMNS
+        assert len(rows) == 6
+        first = dict(zip(EXPORT_COLUMNS, rows[1]))
+        assert first['location'] == "IH-45 North NB @ Tidwell"
+        assert first['corridor'] == 'IH-45'
+        assert first['reported_at'] == '1969-12-31T18:16:40-06:00'
+
+        lines = ''.join(export_stream('ndjson', Incident.iter_range(db, chunk_size=2))).splitlines()
+        records = [json.loads(line) for line in lines]
+        assert [record['id'] for record in records] == [1, 2, 3, 4, 5]
+        assert records[2]['description'] == "Heavy truck stall"
+        assert set(records[0]) == set(EXPORT_COLUMNS)
+
+    print("✅ Export formats working")
+
+
+def main():
+    """Run all tests"""
+    test_iter_range_chunks()
+    test_csv_and_ndjson_streams()
+    print("\n🎉 All export tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script for geofenced subscriber areas
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from geofence import Area, GeofenceIndex, area_from_row
+from models import Database, Incident, SubscriberArea
+from rules import Rule, RuleMatcher, group_plan
+
+
+def make_incident(location, description, lat, lon, source='interchange'):
+    incident = Incident(location, description)
+    incident.lat, incident.lon, incident.geocode_source = lat, lon, source
+    return incident
+
+
+def test_index_matching():
+    """Test corridor, radius and polygon matching"""
+    print("🧪 Testing geofence index...")
+
+    yard = (29.9395, -95.4080)  # IH-45 @ Beltway 8
+    areas = [
+        Area('corridor@example.com', 'corridor', 'IH-10', None, None, None, None),
+        Area('yard@example.com', 'radius', None, yard[0], yard[1], 5.0, None),
+        Area('downtown@example.com', 'polygon', None, None, None, None,
+             [(29.74, -95.39), (29.78, -95.39), (29.78, -95.35), (29.74, -95.35)]),
+    ]
+    index = GeofenceIndex(areas)
+
+    assert index.match(29.9500, -95.4100, 'IH-45') == {'yard@example.com'}
+    assert index.match(29.7600, -95.3700, 'IH-10') == {'corridor@example.com', 'downtown@example.com'}
+    assert index.match(29.6000, -95.2000, 'SH-225') == set()
+
+    # Subscribers without areas keep receiving everything
+    incident = make_incident("IH-45 NB @ Beltway 8", "Heavy truck accident", 29.9395, -95.4080)
+    emails = ['everything@example.com', 'yard@example.com', 'downtown@example.com']
+    assert index.recipients_for(incident, emails) == ['everything@example.com', 'yard@example.com']
+
+    # An unresolved cross street falls back to the corridor centroid: only corridor areas can match it
+    emails.append('corridor@example.com')
+    centroid = make_incident("IH-10 WB @ Unknown Rd", "Heavy truck accident", 29.7600, -95.3700, source='corridor')
+    assert index.recipients_for(centroid, emails) == ['everything@example.com', 'corridor@example.com']
+    centroid.geocode_source = 'interchange'
+    assert 'downtown@example.com' in index.recipients_for(centroid, emails)
+
+    print("✅ Geofence index working")
+
+
+def test_group_recipients():
+    """Test grouping recipients by the incidents they match"""
+    print("\n📬 Testing recipient grouping...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'test.db'))
+        version = SubscriberArea.get_version(db)
+        SubscriberArea.add_radius(db, 'yard@example.com', 29.9395, -95.4080, 5.0)
+        assert SubscriberArea.get_version(db) == version + 1
+
+        index = GeofenceIndex([area_from_row(row) for row in SubscriberArea.get_all(db)])
+        near = make_incident("IH-45 NB @ Beltway 8", "Heavy truck accident", 29.9395, -95.4080)
+        far = make_incident("SH-225 EB @ Richey", "Semi truck stall", 29.7040, -95.2020)
+
+        matcher = RuleMatcher([Rule(None, email, None, 1, None, None, None, 'standard')
+                               for email in ('all@example.com', 'yard@example.com')])
+        plan = matcher.build_plan([(near, 1), (far, 2)], 12 * 60, geofence=index)
+        by_ids = {tuple(i for _, i in group_incidents): recipients for _, group_incidents, recipients in group_plan(plan)}
+        assert by_ids == {(1, 2): ['all@example.com'], (1,): ['yard@example.com']}
+
+    print("✅ Recipient grouping working")
+
+
+def main():
+    """Run all tests"""
+    test_index_matching()
+    test_group_recipients()
+    print("\n🎉 All geofence tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the test scripts (no tests of its own)
+"""
+
+from models import Incident
+
+
+def save_incidents(db, rows):
+    """Save (location, description, severity, incident_ts) rows; returns (incident, incident_id) pairs"""
+    incidents = []
+    for location, description, severity, incident_ts in rows:
+        incident = Incident(location, description, "3:16 PM", severity, incident_ts=incident_ts)
+        incidents.append((incident, incident.save(db)))
+    return incidents
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for scrape cycle metrics
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from metrics import Registry, StageTimer
+
+
+def test_stage_timer():
+    """Test nested stages are excluded from their parent"""
+    print("⏱️  Testing stage timer...")
+
+    registry = Registry()
+    stages = registry.histogram('test_stage_seconds', 'Test stages', ['stage'])
+    timer = StageTimer(stages)
+
+    with timer.stage('parse'):
+        time.sleep(0.01)
+        for _ in range(3):
+            with timer.stage('classify'):
+                time.sleep(0.01)
+    timer.observe()
+
+    assert timer.totals['classify'] >= 0.03
+    assert 0.01 <= timer.totals['parse'] < 0.03
+    assert stages.count(stage='parse') == 1 and stages.count(stage='classify') == 1
+
+    print("✅ Stage timer working")
+
+
+def test_prometheus_format():
+    """Test counters and histograms render in Prometheus text format"""
+    print("\n📈 Testing Prometheus exposition...")
+
+    registry = Registry()
+    rows = registry.counter('test_rows_total', 'Rows seen')
+    emails = registry.counter('test_emails_total', 'Emails sent', ['template'])
+    cycle = registry.histogram('test_cycle_seconds', 'Cycle duration', buckets=(0.1, 1.0))
+
+    rows.inc(5)
+    emails.inc(template='hazmat')
+    cycle.observe(0.05)
+    cycle.observe(0.5)
+    cycle.observe(2.0)
+
+    text = registry.render()
+    assert '# TYPE test_rows_total counter' in text
+    assert 'test_rows_total 5' in text
+    assert 'test_emails_total{template="hazmat"} 1' in text
+    assert '# TYPE test_cycle_seconds histogram' in text
+    assert 'test_cycle_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_cycle_seconds_bucket{le="1.0"} 2' in text
+    assert 'test_cycle_seconds_bucket{le="+Inf"} 3' in text
+    assert 'test_cycle_seconds_sum 2.55' in text
+    assert 'test_cycle_seconds_count 3' in text
+
+    print("✅ Prometheus exposition working")
+
+
+def test_metrics_endpoint_protected():
+    """Test /metrics needs an admin login or the configured bearer token"""
+    print("\n🔒 Testing /metrics access...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.DATABASE_PATH = os.path.join(tmp, 'test.db')
+        import app as web
+        web.scheduler.pause()
+        client = web.app.test_client()
+        original_token, Config.METRICS_TOKEN = Config.METRICS_TOKEN, 'scrape-me'
+        try:
+            assert client.get('/metrics').status_code == 302
+            assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 302
+            response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-me'})
+            assert response.status_code == 200 and b'# TYPE' in response.data
+
+            Config.METRICS_TOKEN = None
+            assert client.get('/metrics', headers={'Authorization': 'Bearer None'}).status_code == 302
+            client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+            assert client.get('/metrics').status_code == 200
+        finally:
+            Config.METRICS_TOKEN = original_token
+
+    print("✅ /metrics protected")
+
+
+def main():
+    """Run all tests"""
+    test_stage_timer()
+    test_prometheus_format()
+    test_metrics_endpoint_protected()
+    print("\n🎉 All metrics tests passed!")
+
+
+if __name__ == "__main__":
+    main()
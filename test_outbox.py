@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Fault-injection tests for exactly-once alert delivery through the outbox
+"""
+
+import sys
+import os
+import smtplib
+import tempfile
+from collections import Counter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from delivery import ALERT_SENT
+from email_service import EmailService
+from models import Database, AlertOutbox, Subscriber, SubscriptionRule, HAZMAT_CATEGORIES, outbox_key
+from scraper import TranStarScraper
+from test_helpers import save_incidents
+
+DRIVERS = ['a@fleet.com', 'b@fleet.com', 'c@fleet.com']
+
+
+class Crash(BaseException):
+    """Stands in for the process dying; nothing in the sender catches it"""
+
+
+class FaultyRelay:
+    """SMTP stand-in recording (recipient, location) deliveries, with one fault per message index"""
+
+    def __init__(self, incidents, faults=None):
+        self.locations = [incident.location for incident, _ in incidents]
+        self.faults = faults or {}
+        self.calls = 0
+        self.delivered = Counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def send_message(self, msg):
+        fault = self.faults.get(self.calls, '')
+        self.calls += 1
+        if fault == 'disconnect':
+            raise smtplib.SMTPServerDisconnected('connection dropped before DATA')
+        if fault == 'crash_before':
+            raise Crash()
+
+        text = msg.get_payload()[0].get_payload(decode=True).decode()
+        refused = {email: (550, b'mailbox unavailable') for email in fault.split(',') if email}
+        for email in msg['To'].split(', '):
+            if email not in refused:
+                for location in self.locations:
+                    if location in text:
+                        self.delivered[(email, location)] += 1
+        if fault == 'crash_after':
+            raise Crash()
+        return refused
+
+
+def make_world(tmp):
+    """Three drivers whose rules give each a different incident set, so each gets its own message"""
+    db = Database(os.path.join(tmp, 'test.db'))
+    conn = db.get_connection()
+    conn.execute('DELETE FROM subscribers')
+    conn.execute('DELETE FROM subscription_rules')
+    conn.commit()
+    conn.close()
+    for min_severity, email in enumerate(DRIVERS, start=1):
+        Subscriber.add(db, email)
+        SubscriptionRule.add(db, email, min_severity=min_severity)
+    SubscriptionRule.bump_version(db)
+
+    return db, save_incidents(db, [(f"IH-10 EB @ Exit {severity}", "Heavy truck accident blocking lanes", severity, None)
+                                   for severity in (1, 2, 3)])
+
+
+def make_service(db, relay):
+    email_service = EmailService(db=db)
+    email_service.username = email_service.password = email_service.from_email = 'alerts@example.com'
+    email_service.connect = lambda timeout: relay
+    return email_service
+
+
+def expected(incidents):
+    """Every (recipient, location) the rules owe, each exactly once"""
+    return Counter({(email, incident.location): 1
+                    for min_severity, email in enumerate(DRIVERS, start=1)
+                    for incident, _ in incidents if incident.severity >= min_severity})
+
+
+def test_idempotent_resend():
+    """Test sending the same incidents twice delivers nothing new and records each incident once"""
+    print("📮 Testing idempotent send...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db, incidents = make_world(tmp)
+        relay = FaultyRelay(incidents)
+        email_service = make_service(db, relay)
+
+        assert email_service.send_alert(incidents, rate_limit=False)
+        email_service.drain()
+        assert email_service.send_alert(incidents, rate_limit=False)
+        email_service.drain()
+        assert relay.delivered == expected(incidents)
+        assert relay.calls == 3
+        assert AlertOutbox.counts(db)['sent'] == sum(expected(incidents).values())
+        conn = db.get_connection()
+        assert conn.execute('SELECT COUNT(*) FROM sent_alerts').fetchone()[0] == 3
+        conn.close()
+
+    print("✅ Idempotent send working")
+
+
+def test_transient_failures_retry_exactly_once():
+    """Test a dropped connection and a refused recipient are retried without repeating what went out"""
+    print("\n🔌 Testing transient relay faults...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db, incidents = make_world(tmp)
+        # Message 0 goes out, message 1 drops the connection before the relay accepts it; these are
+        # all low-severity digests, so the failure comes back through requeue rather than the result
+        relay = FaultyRelay(incidents, {1: 'disconnect'})
+        email_service = make_service(db, relay)
+        requeued = []
+        assert email_service.deliver_alert(incidents, rate_limit=False, requeue=requeued.append) == ALERT_SENT
+        email_service.drain()
+        assert AlertOutbox.counts(db)['pending'] > 0
+        assert sorted(requeued[0], key=lambda pair: pair[1]) == incidents
+
+        # The retry's first message is accepted except for one refused recipient
+        relay.faults = {relay.calls: 'b@fleet.com'}
+        assert email_service.deliver_alert(incidents, rate_limit=False, requeue=requeued.append) == ALERT_SENT
+        email_service.drain()
+        assert len(requeued) == 2
+        assert email_service.deliver_alert(incidents, rate_limit=False, requeue=requeued.append) == ALERT_SENT
+        email_service.drain()
+        assert len(requeued) == 2
+        assert relay.delivered == expected(incidents)
+        assert AlertOutbox.counts(db) == {'pending': 0, 'sending': 0, 'sent': 6, 'failed': 0}
+
+    print("✅ Transient faults retried exactly once")
+
+
+def test_crash_mid_send_then_recover():
+    """Test a crash after the relay accepted a message is never resent, and the rest go out after restart"""
+    print("\n💥 Testing crash during delivery...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db, incidents = make_world(tmp)
+        relay = FaultyRelay(incidents, {0: 'crash_after'})
+        crashed = make_service(db, relay)
+        crashed.send_alert(incidents, rate_limit=False)
+        # The crash kills the bulk lane sender before it settles anything
+        crashed.drain()
+        assert AlertOutbox.counts(db)['sending'] > 0
+
+        # Restart: the interrupted delivery is failed, not repeated; the untouched ones are still owed
+        relay.faults = {}
+        restarted = make_service(db, relay)
+        recovered = restarted.recover_outbox()
+        assert [incident_id for _, incident_id in recovered] == [incident_id for _, incident_id in incidents]
+        assert restarted.send_alert(recovered, rate_limit=False)
+        restarted.drain()
+
+        counts = AlertOutbox.counts(db)
+        assert counts['sending'] == counts['pending'] == 0 and counts['failed'] > 0
+        assert max(relay.delivered.values()) == 1
+        assert relay.delivered == expected(incidents)
+        assert restarted.recover_outbox() == []
+
+    print("✅ Crash recovery delivered each alert exactly once")
+
+
+def test_crash_before_accept_is_flagged():
+    """Test a crash before the relay accepted leaves the delivery failed for review rather than guessing"""
+    print("\n🚩 Testing crash before the relay accepted...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db, incidents = make_world(tmp)
+        relay = FaultyRelay(incidents, {0: 'crash_before'})
+        crashed = make_service(db, relay)
+        crashed.send_alert(incidents, rate_limit=False)
+        crashed.drain()
+
+        restarted = make_service(db, relay)
+        assert restarted.send_alert(restarted.recover_outbox(), rate_limit=False)
+        restarted.drain()
+        lost = sum(expected(incidents).values()) - sum(relay.delivered.values())
+        assert lost == AlertOutbox.counts(db)['failed'] > 0
+        assert max(relay.delivered.values()) == 1
+
+        # An admin retry sends exactly what was missing
+        assert restarted.send_alert(restarted.retry_failed(), rate_limit=False)
+        restarted.drain()
+        assert relay.delivered == expected(incidents)
+
+    print("✅ Ambiguous deliveries flagged and retried on request")
+
+
+def test_saved_but_unplanned_incidents_recovered():
+    """Test incidents saved just before a crash are alerted after restart instead of lost to dedup"""
+    print("\n🧯 Testing incidents saved before a crash...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db, incidents = make_world(tmp)
+        # Saving again is a no-op: the unique hash is the dedup, so these would never be "new" again
+        scraper = TranStarScraper(db=db)
+        assert scraper.save_new_incidents([incident for incident, _ in incidents]) == []
+
+        relay = FaultyRelay(incidents)
+        email_service = make_service(db, relay)
+        recovered = email_service.recover_outbox()
+        assert {incident.incident_hash for incident, _ in recovered} == {i.incident_hash for i, _ in incidents}
+        assert email_service.send_alert(recovered, rate_limit=False)
+        email_service.drain()
+        assert relay.delivered == expected(incidents)
+
+    print("✅ Saved incidents recovered")
+
+
+def test_standard_and_hazmat_rules_both_delivered():
+    """Test a recipient with a standard and a hazmat rule gets both emails for a spill, each once"""
+    print("\n☣️ Testing standard and hazmat alerts to one recipient...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db, _ = make_world(tmp)
+        SubscriptionRule.add(db, DRIVERS[0], categories=HAZMAT_CATEGORIES, template='hazmat')
+        SubscriptionRule.bump_version(db)
+        spill = save_incidents(db, [("IH-610 West Loop SB @ Exit 3", "Hazmat spill from tanker", 3, None)])
+
+        relay = FaultyRelay(spill)
+        email_service = make_service(db, relay)
+        assert email_service.send_alert(spill, rate_limit=False)
+        assert email_service.send_alert(spill, rate_limit=False)
+        email_service.drain()
+        location = spill[0][0].location
+        assert relay.delivered[(DRIVERS[0], location)] == 2
+        assert AlertOutbox.counts(db) == {'pending': 0, 'sending': 0, 'sent': len(DRIVERS) + 1, 'failed': 0}
+
+        # A hazmat key written before the template was part of it (the standard row was dropped as a
+        # duplicate then) is brought in line on startup
+        conn = db.get_connection()
+        conn.execute("DELETE FROM alert_outbox WHERE template = 'standard' AND email = ?", (DRIVERS[0],))
+        conn.execute("UPDATE alert_outbox SET idempotency_key = incident_id || ':' || email WHERE template = 'hazmat'")
+        conn.commit()
+        conn.close()
+        Database(db.db_path)
+        conn = db.get_connection()
+        keys = {row[0] for row in conn.execute('SELECT idempotency_key FROM alert_outbox')}
+        conn.close()
+        assert outbox_key(spill[0][1], DRIVERS[0]) not in keys
+        assert outbox_key(spill[0][1], DRIVERS[0], template='hazmat') in keys
+
+    print("✅ Standard and hazmat alerts both delivered")
+
+
+def main():
+    """Run all tests"""
+    test_idempotent_resend()
+    test_transient_failures_retry_exactly_once()
+    test_crash_mid_send_then_recover()
+    test_crash_before_accept_is_flagged()
+    test_saved_but_unplanned_incidents_recovered()
+    test_standard_and_hazmat_rules_both_delivered()
+    print("\n🎉 All outbox tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for offloading parse+classify to the process pool
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from async_pipeline import AsyncPipeline
+from email_service import EmailService
+from fixtures import PageGenerator, ReplayServer, REPLAY_PATH
+from metrics import ROWS_SEEN, ROWS_RELEVANT
+from models import Database, Settings
+from scraper import TranStarScraper
+
+
+def incident_keys(incidents):
+    return sorted((i.incident_hash, i.category, i.corridor, i.lat, i.lon) for i in incidents)
+
+
+def test_pool_matches_in_process_parse():
+    """Test pooled parsing yields the same incidents and row counts as the scrape thread"""
+    print("🏭 Testing process-pool parsing...")
+
+    page = PageGenerator(seed=21, rows_per_table=20, relevant_ratio=0.6).page()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'test.db'))
+        in_process = TranStarScraper(db=db, parse_workers=0)
+        pooled = TranStarScraper(db=db, parse_workers=1)
+        try:
+            seen, relevant = ROWS_SEEN.value(), ROWS_RELEVANT.value()
+            expected = in_process.parse_html(page)
+            counts = ROWS_SEEN.value() - seen, ROWS_RELEVANT.value() - relevant
+
+            seen, relevant = ROWS_SEEN.value(), ROWS_RELEVANT.value()
+            incidents = pooled.parse_html(page)
+            assert pooled.parse_pool is not None
+            assert incident_keys(incidents) == incident_keys(expected)
+            # Counters incremented in the worker are merged back into this process
+            assert (ROWS_SEEN.value() - seen, ROWS_RELEVANT.value() - relevant) == counts
+
+            # Settings are read in the parent and handed to the worker
+            Settings.set_include_stalls(db, False)
+            assert not any(incident.is_stall for incident in pooled.parse_html(page))
+        finally:
+            pooled.shutdown_parse_pool()
+
+    print(f"✅ {len(incidents)} incidents parsed identically in the pool")
+
+
+def test_pipeline_parses_sources_in_pool():
+    """Test the async pipeline hands several pages to the pool"""
+    print("\n🔀 Testing pooled multi-source pipeline...")
+
+    pages = [PageGenerator(seed=seed, rows_per_table=5, relevant_ratio=0.6).page() for seed in (1, 2)]
+    with tempfile.TemporaryDirectory() as tmp, ReplayServer([pages[0]]) as first, ReplayServer([pages[1]]) as second:
+        db = Database(os.path.join(tmp, 'test.db'))
+        expected = TranStarScraper(db=Database(os.path.join(tmp, 'sync.db')), parse_workers=0)
+        expected_hashes = {incident.incident_hash for page in pages for incident in expected.parse_html(page)}
+
+        scraper = TranStarScraper(db=db, parse_workers=2)
+        try:
+            result = AsyncPipeline(scraper, EmailService(db=db)).run(
+                urls=[f"{first.base_url}{REPLAY_PATH}", f"{second.base_url}{REPLAY_PATH}"])
+        finally:
+            scraper.shutdown_parse_pool()
+        assert {incident.incident_hash for incident, _ in result.new_incidents} == expected_hashes
+
+    print(f"✅ {len(expected_hashes)} incidents from 2 pooled sources")
+
+
+def main():
+    """Run all tests"""
+    test_pool_matches_in_process_parse()
+    test_pipeline_parses_sources_in_pool()
+    print("\n🎉 All parse pool tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Test script for rule-based subscriptions
+"""
+
+import sys
+import os
+import tempfile
+import sqlite3
+from contextlib import redirect_stdout
+from io import StringIO
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from models import Database, Incident, Subscriber, HazmatSubscriber, SubscriptionRule
+from rules import Rule, RuleMatcher, group_plan, in_time_window
+
+
+def rule(email, categories=None, min_severity=1, corridors=None, start=None, end=None, template='standard'):
+    return Rule(None, email, frozenset(categories) if categories else None, min_severity,
+                frozenset(corridors) if corridors else None, start, end, template)
+
+
+def test_rule_matching():
+    """Test category, severity, corridor and time window matching"""
+    print("🧪 Testing rule matcher...")
+
+    matcher = RuleMatcher([
+        rule('any@example.com'),
+        rule('severe@example.com', min_severity=3),
+        rule('i10@example.com', categories=['wreck'], corridors=['IH-10']),
+        rule('night@example.com', start=22 * 60, end=6 * 60),
+        rule('hazmat@example.com', categories=['hazmat', 'spill'], template='hazmat'),
+    ])
+
+    wreck = Incident("IH-10 Katy Fwy WB @ Washington", "Heavy truck accident")
+    spill = Incident("IH-45 North NB @ Tidwell", "Hazmat spill from tanker", severity=3)
+    assert wreck.category == 'wreck' and spill.category == 'hazmat'
+
+    noon = 12 * 60
+    assert {email for email, _ in matcher.match(wreck, noon)} == {'any@example.com', 'i10@example.com'}
+    assert matcher.match(spill, noon) == {('any@example.com', 'standard'), ('severe@example.com', 'standard'),
+                                          ('hazmat@example.com', 'hazmat')}
+    assert ('night@example.com', 'standard') in matcher.match(wreck, 23 * 60)
+    assert ('night@example.com', 'standard') in matcher.match(wreck, 2 * 60)
+
+    # Windows that wrap midnight
+    assert in_time_window(rule('x', start=22 * 60, end=6 * 60), 0)
+    assert not in_time_window(rule('x', start=22 * 60, end=6 * 60), 12 * 60)
+    assert in_time_window(rule('x', start=8 * 60, end=17 * 60), 8 * 60)
+
+    # A wreck that spilled fuel is filed as a spill, but wreck rules still get it, and only once
+    fuel = Incident("IH-10 EB @ Taylor", "Heavy truck accident, fuel spill, lanes blocked", severity=4)
+    assert fuel.category == 'spill' and fuel.is_wreck
+    assert {email for email, _ in matcher.match(fuel, noon)} == {'any@example.com', 'severe@example.com',
+                                                                 'i10@example.com', 'hazmat@example.com'}
+    assert len(list(matcher.candidates(('spill', 'wreck', 'hazmat'), 5))) == 5
+
+    plan = matcher.build_plan([(wreck, 1), (spill, 2)], noon)
+    groups = {(template, tuple(i for _, i in incidents)): emails for template, incidents, emails in group_plan(plan)}
+    assert groups == {
+        ('standard', (1, 2)): ['any@example.com'],
+        ('standard', (1,)): ['i10@example.com'],
+        ('standard', (2,)): ['severe@example.com'],
+        ('hazmat', (2,)): ['hazmat@example.com'],
+    }
+
+    print("✅ Rule matcher working")
+
+
+def test_hazmat_migration():
+    """Test hazmat subscribers migrate into rules and subscribers become implicit rules"""
+    print("\n📦 Testing hazmat subscriber migration...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'test.db')
+        conn = sqlite3.connect(path)
+        conn.execute('''
+            CREATE TABLE hazmat_subscribers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                email TEXT UNIQUE NOT NULL,
+                active BOOLEAN DEFAULT 1,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute("INSERT INTO hazmat_subscribers (email, active) VALUES ('legacy@example.com', 0)")
+        conn.commit()
+        conn.close()
+
+        output = StringIO()
+        with redirect_stdout(output):
+            db = Database(path)
+        assert "Migrated 1 hazmat subscribers" in output.getvalue()
+        conn = db.get_connection()
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'hazmat_subscribers'").fetchone() is None
+        conn.close()
+
+        hazmat = {row['email']: row['active'] for row in HazmatSubscriber.get_all(db)}
+        assert hazmat['legacy@example.com'] == 0
+        assert HazmatSubscriber.toggle_active(db, 'legacy@example.com')
+        assert 'legacy@example.com' in HazmatSubscriber.get_all_active(db)
+        assert not HazmatSubscriber.add(db, 'legacy@example.com')
+
+        version = SubscriptionRule.get_version(db)
+        Subscriber.add(db, 'driver@example.com')
+        assert SubscriptionRule.get_version(db) == version + 1
+
+        rules = SubscriptionRule.get_active_rules(db)
+        assert rule('driver@example.com') in rules
+
+        # An explicit standard rule replaces the implicit catch-all rule
+        SubscriptionRule.add(db, 'driver@example.com', categories=['wreck'], min_severity=2)
+        rules = SubscriptionRule.get_active_rules(db)
+        driver_rules = [r for r in rules if r.email == 'driver@example.com']
+        assert len(driver_rules) == 1 and driver_rules[0].categories == frozenset(['wreck'])
+
+    print("✅ Hazmat subscriber migration working")
+
+
+def test_rules_follow_subscriber():
+    """Test standard rules stop matching once their subscriber is deactivated or removed"""
+    print("\n🔕 Testing rules of inactive subscribers...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'test.db'))
+        for email in ('a@b.com', 'c@d.com'):
+            Subscriber.add(db, email)
+            SubscriptionRule.add(db, email, categories=['wreck'])
+        HazmatSubscriber.add(db, 'a@b.com')
+
+        def emails(template):
+            return {r.email for r in SubscriptionRule.get_active_rules(db) if r.template == template}
+
+        Subscriber.toggle_active(db, 'a@b.com')
+        assert 'a@b.com' not in emails('standard') and 'a@b.com' in emails('hazmat')
+        Subscriber.toggle_active(db, 'a@b.com')
+        assert 'a@b.com' in emails('standard')
+
+        # Removing deletes the standard rules, so re-subscribing starts from the catch-all rule
+        Subscriber.update_many(db, 'remove', ['a@b.com'])
+        Subscriber.remove(db, 'c@d.com')
+        assert emails('standard').isdisjoint({'a@b.com', 'c@d.com'})
+        assert 'a@b.com' in emails('hazmat')
+        Subscriber.add(db, 'a@b.com')
+        assert rule('a@b.com') in SubscriptionRule.get_active_rules(db)
+
+    print("✅ Rules follow their subscriber")
+
+
+def test_rule_api_validation():
+    """Test the rule API rejects bad categories, corridors and severities with a 400"""
+    print("\n🧩 Testing rule API validation...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.DATABASE_PATH = os.path.join(tmp, 'test.db')
+        import app as web
+        web.scheduler.pause()
+        # The app may already be imported against another database
+        original_db, web.db = web.db, Database(Config.DATABASE_PATH)
+        Subscriber.add(web.db, 'driver@example.com')
+        client = web.app.test_client()
+        client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+
+        for bad in ({'categories': 'wreck'}, {'categories': ['potholes']}, {'corridors': ['IH-999']},
+                    {'corridors': 'IH-10'}, {'min_severity': 9}, {'min_severity': 'high'}):
+            response = client.post('/api/subscription_rules', json={'email': 'driver@example.com', **bad})
+            assert response.status_code == 400, bad
+
+        response = client.post('/api/subscription_rules', json={'email': 'driver@example.com',
+                                                                 'categories': ['wreck'], 'corridors': ['IH-10'],
+                                                                 'min_severity': 3})
+        assert response.status_code == 201
+        created = [r for r in SubscriptionRule.get_active_rules(web.db) if r.id == response.get_json()['id']]
+        assert created[0].categories == frozenset(['wreck']) and created[0].corridors == frozenset(['IH-10'])
+        web.db = original_db
+
+    print("✅ Rule API validation working")
+
+
+def main():
+    """Run all tests"""
+    test_rule_matching()
+    test_hazmat_migration()
+    test_rules_follow_subscriber()
+    test_rule_api_validation()
+    print("\n🎉 All rule tests passed!")
+
+
+if __name__ == "__main__":
+    main()
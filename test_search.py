@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for full-text incident search
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import Database, Incident, fts_match_expression
+from test_helpers import save_incidents
+
+
+def make_db(tmp):
+    """Overlapping words, corridors and severities to rank and filter"""
+    db = Database(os.path.join(tmp, 'test.db'))
+    save_incidents(db, [
+        ("IH-45 North NB @ Tidwell", "Heavy truck accident", 3, 1000),
+        ("IH-45 Gulf SB @ Edgebrook", "Hazmat spill from tanker", 5, 2000),
+        ("IH-10 Katy WB @ Washington", "Heavy truck stall", 1, 3000),
+        ("IH-610 West Loop NB @ Richmond", "Accident, 18-wheeler", 3, 4000),
+        ("IH-45 North SB @ Tidwell", "Truck accident, left lane", 2, 5000),
+    ])
+    return db
+
+
+def test_search_filters_and_ranking():
+    """Test matching, filters and BM25 ordering"""
+    print("🔎 Testing incident search...")
+
+    assert fts_match_expression('IH-45 tid*') == '"IH-45" "tid"*'
+    assert fts_match_expression('say "hi" *') == '"say" """hi"""'
+    assert fts_match_expression('   ') is None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_db(tmp)
+
+        tidwell = Incident.search(db, 'tidwell')
+        assert {row['location'] for row in tidwell} == {"IH-45 North NB @ Tidwell", "IH-45 North SB @ Tidwell"}
+        assert [row['score'] for row in tidwell] == sorted(row['score'] for row in tidwell)
+
+        assert [row['location'] for row in Incident.search(db, 'haz*')] == ["IH-45 Gulf SB @ Edgebrook"]
+        assert len(Incident.search(db, 'accident', min_severity=3)) == 2
+        assert {row['corridor'] for row in Incident.search(db, 'truck', corridor='IH-10')} == {'IH-10'}
+        assert [row['incident_ts'] for row in Incident.search(db, since=2000, until=4000)] == [3000, 2000]
+
+        # Without a query, newest first
+        assert [row['incident_ts'] for row in Incident.search(db)] == [5000, 4000, 3000, 2000, 1000]
+
+    print("✅ Search working")
+
+
+def test_keyset_pages_and_trigger_sync():
+    """Test pages follow on without overlap and the index tracks updates and deletes"""
+    print("\n📄 Testing search pagination...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_db(tmp)
+
+        # A query of only wildcards builds no MATCH expression and pages by time like no query
+        for query in ('ih', None, '*'):
+            seen, after = [], None
+            while True:
+                page = Incident.search(db, query, after=after, limit=2)
+                seen.extend(row['id'] for row in page)
+                if len(page) < 2:
+                    break
+                after = Incident.search_cursor(page[-1])
+            assert sorted(seen) == [1, 2, 3, 4, 5], (query, seen)
+        assert Incident.search_cursor(Incident.search(db, '*', limit=1)[0]) == (5000, 5)
+
+        conn = db.get_connection()
+        conn.execute("UPDATE incidents SET description = 'Lost load, debris' WHERE id = 3")
+        conn.execute('DELETE FROM incidents WHERE id = 2')
+        conn.commit()
+        conn.close()
+        assert [row['id'] for row in Incident.search(db, 'debris')] == [3]
+        assert Incident.search(db, 'stall') == []
+        assert Incident.search(db, 'hazmat') == []
+
+    print("✅ Pagination and sync working")
+
+
+def main():
+    """Run all tests"""
+    test_search_filters_and_ranking()
+    test_keyset_pages_and_trigger_sync()
+    print("\n🎉 All search tests passed!")
+
+
+if __name__ == "__main__":
+    main()
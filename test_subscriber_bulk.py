@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk subscriber import, export and mutations
+"""
+
+import sys
+import os
+import io
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from export import export_stream
+from models import Database, Subscriber
+from subscriber_io import SUBSCRIBER_COLUMNS, iter_import_rows, subscriber_record
+
+
+def make_db(tmp):
+    db = Database(os.path.join(tmp, 'test.db'))
+    # Start from an empty list rather than the built-in defaults
+    conn = db.get_connection()
+    conn.execute('DELETE FROM subscribers')
+    conn.commit()
+    conn.close()
+    return db
+
+
+def test_import_parsing():
+    """Test CSV (with and without a header), NDJSON and JSON parsing"""
+    print("📥 Testing import parsing...")
+
+    rows = list(iter_import_rows(io.StringIO("Email,Active\na@x.com,1\n\nb@x.com,false\n"), 'csv'))
+    assert rows == [(2, 'a@x.com', True), (4, 'b@x.com', False)], rows
+    rows = list(iter_import_rows(io.StringIO("a@x.com\nb@x.com\n"), 'csv'))
+    assert [email for _, email, _ in rows] == ['a@x.com', 'b@x.com']
+    rows = list(iter_import_rows(io.StringIO('"a@x.com"\n{"email": "b@x.com", "active": 0}\n[1]\n'), 'ndjson'))
+    assert rows == [(1, 'a@x.com', True), (2, 'b@x.com', False), (3, '', True)], rows
+    rows = list(iter_import_rows(io.StringIO('{"emails": ["a@x.com", "b@x.com"]}'), 'json'))
+    assert [line for line, _, _ in rows] == [1, 2]
+
+    try:
+        list(iter_import_rows(io.StringIO('{"email": '), 'ndjson'))
+        assert False, "truncated NDJSON should not parse"
+    except ValueError:
+        pass
+
+    print("✅ Import parsing working")
+
+
+def test_add_many_outcomes():
+    """Test one-transaction import reports every row and skips existing/duplicate/invalid"""
+    print("\n👥 Testing bulk import...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_db(tmp)
+        Subscriber.add(db, 'existing@x.com')
+
+        rows = [(1, ' New@X.com ', True), (2, 'existing@x.com', True), (3, 'not-an-email', True),
+                (4, 'new@x.com', True), (5, 'paused@x.com', False)]
+        results = Subscriber.add_many(db, rows, chunk_size=2)
+        assert [outcome for _, _, outcome in results] == ['added', 'exists', 'invalid', 'duplicate', 'added']
+        assert results[0] == (1, 'new@x.com', 'added')
+        assert sorted(Subscriber.get_all_active(db)) == ['existing@x.com', 'new@x.com']
+
+        # Export streams back in a form the import reads unchanged
+        text = ''.join(export_stream('csv', Subscriber.iter_all(db, chunk_size=2), SUBSCRIBER_COLUMNS,
+                                     subscriber_record))
+        exported = list(iter_import_rows(io.StringIO(text), 'csv'))
+        assert [(email, active) for _, email, active in exported] == [
+            ('existing@x.com', True), ('new@x.com', True), ('paused@x.com', False)]
+
+    print("✅ Bulk import working")
+
+
+def test_update_many():
+    """Test bulk toggle/deactivate/remove with per-address outcomes"""
+    print("\n🔁 Testing bulk mutations...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_db(tmp)
+        Subscriber.add_many(db, [(n, f'driver{n}@x.com', True) for n in range(5)])
+
+        results = Subscriber.update_many(db, 'toggle', ['driver0@x.com', 'DRIVER0@x.com', 'ghost@x.com'])
+        assert results == [('driver0@x.com', 'updated'), ('driver0@x.com', 'duplicate'), ('ghost@x.com', 'not_found')]
+        assert 'driver0@x.com' not in Subscriber.get_all_active(db)
+
+        Subscriber.update_many(db, 'deactivate', [f'driver{n}@x.com' for n in range(3)], chunk_size=2)
+        assert sorted(Subscriber.get_all_active(db)) == ['driver3@x.com', 'driver4@x.com']
+
+        results = Subscriber.update_many(db, 'remove', ['driver4@x.com'])
+        assert results == [('driver4@x.com', 'removed')]
+        assert len(Subscriber.get_all(db)) == 4
+
+        try:
+            Subscriber.update_many(db, 'explode', ['driver1@x.com'])
+            assert False, "unknown action should raise"
+        except ValueError:
+            pass
+
+    print("✅ Bulk mutations working")
+
+
+def main():
+    """Run all tests"""
+    test_import_parsing()
+    test_add_many_outcomes()
+    test_update_many()
+    print("\n🎉 All bulk subscriber tests passed!")
+
+
+if __name__ == "__main__":
+    main()
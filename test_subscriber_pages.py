@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script for paginated, filtered subscriber listings
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from models import Database, Subscriber, HazmatSubscriber, SubscriptionRule, email_prefix_bounds
+
+
+def all_pages(page_fn, db, **kwargs):
+    emails, after = [], None
+    while True:
+        page, after = page_fn(db, after=after, limit=3, **kwargs)
+        emails.extend(row['email'] for row in page)
+        if after is None:
+            return emails
+
+
+def test_keyset_pages_and_filters():
+    """Test pages follow on in email order with prefix and status filters"""
+    print("📄 Testing subscriber pages...")
+
+    assert email_prefix_bounds('d1') == ('d1', 'd2')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'test.db'))
+        Subscriber.add_many(db, [(n, f'driver{n}@fleet.com', n % 2 == 0) for n in range(8)])
+        HazmatSubscriber.add(db, 'tanker@fleet.com')
+
+        fleet = all_pages(Subscriber.page, db, prefix='Driver')
+        assert fleet == [f'driver{n}@fleet.com' for n in range(8)], fleet
+        assert all_pages(Subscriber.page, db, prefix='driver', active=False) == [
+            'driver1@fleet.com', 'driver3@fleet.com', 'driver5@fleet.com', 'driver7@fleet.com']
+        page, after = Subscriber.page(db, prefix='driver', limit=8)
+        assert len(page) == 8 and after is None
+        assert Subscriber.page(db, prefix='nobody')[0] == []
+
+        hazmat = all_pages(HazmatSubscriber.page, db)
+        assert 'tanker@fleet.com' in hazmat and 'driver0@fleet.com' not in hazmat
+        assert all_pages(HazmatSubscriber.page, db, prefix='tank', active=True) == ['tanker@fleet.com']
+
+    print("✅ Subscriber pages working")
+
+
+def test_cached_counts():
+    """Test counts are served from cache until the subscriptions version changes"""
+    print("\n🔢 Testing cached subscriber counts...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'test.db'))
+        before = Subscriber.counts(db)
+
+        Subscriber.add(db, 'new@fleet.com')
+        Subscriber.toggle_active(db, 'new@fleet.com')
+        counts = Subscriber.counts(db)
+        assert counts == {'total': before['total'] + 1, 'active': before['active']}, counts
+
+        # A write that skips bump_version is not seen until the next subscription change
+        conn = db.get_connection()
+        conn.execute("INSERT INTO subscribers (email) VALUES ('sneaky@fleet.com')")
+        conn.commit()
+        conn.close()
+        assert Subscriber.counts(db) == counts
+        SubscriptionRule.bump_version(db)
+        assert Subscriber.counts(db)['total'] == counts['total'] + 1
+
+        hazmat = HazmatSubscriber.counts(db)
+        HazmatSubscriber.add(db, 'tanker@fleet.com')
+        assert HazmatSubscriber.counts(db)['total'] == hazmat['total'] + 1
+
+    print("✅ Cached counts working")
+
+
+def test_stats_use_cached_counts():
+    """Test the dashboard and /api/stats read subscriber counts from the cache, not the table"""
+    print("\n📊 Testing dashboard subscriber counts...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.DATABASE_PATH = os.path.join(tmp, 'test.db')
+        import app as web
+        web.scheduler.pause()
+        # The app may already be imported against another database
+        original_db, web.db = web.db, Database(Config.DATABASE_PATH)
+        client = web.app.test_client()
+        client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+
+        Subscriber.add(web.db, 'new@fleet.com')
+        Subscriber.toggle_active(web.db, 'new@fleet.com')
+        counts = Subscriber.counts(web.db)
+        # Listing every subscriber would now fail
+        listings = Subscriber.get_all, Subscriber.get_all_active
+        Subscriber.get_all = Subscriber.get_all_active = None
+        try:
+            stats = client.get('/api/stats').get_json()
+            assert (stats['total_subscribers'], stats['active_subscribers']) == (counts['total'], counts['active'])
+            assert client.get('/dashboard').status_code == 200
+        finally:
+            Subscriber.get_all, Subscriber.get_all_active = listings
+            web.db = original_db
+
+    print("✅ Dashboard counts cached")
+
+
+def main():
+    """Run all tests"""
+    test_keyset_pages_and_filters()
+    test_cached_counts()
+    test_stats_use_cached_counts()
+    print("\n🎉 All subscriber page tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for status time parsing and incident timestamps
+"""
+
+import sys
+import os
+import tempfile
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import Database, Incident
+from timeparse import central_tz, parse_clock, format_clock, clock_timestamp, incident_timestamp
+
+
+def central(*args):
+    return central_tz.localize(datetime(*args))
+
+
+def test_parse_clock():
+    """Test 12- and 24-hour status strings parse to one clock form"""
+    print("🕒 Testing clock parsing...")
+
+    assert parse_clock('Verified at 3:16 PM') == (15, 16)
+    assert parse_clock('Detected at 12:05am') == (0, 5)
+    assert parse_clock('12:30 PM') == (12, 30)
+    assert parse_clock('Cleared 15:16') == (15, 16)
+    assert parse_clock('Verified') is None
+    assert parse_clock('') is None
+    assert parse_clock('25:00') is None
+
+    hits = parse_clock.cache_info().hits
+    parse_clock('Verified at 3:16 PM')
+    assert parse_clock.cache_info().hits == hits + 1
+
+    assert format_clock((15, 16)) == '3:16 PM'
+    assert format_clock((0, 5)) == '12:05 AM'
+
+    print("✅ Clock parsing working")
+
+
+def test_timestamps_roll_back_over_midnight():
+    """Test clock times resolve to the most recent Central Time occurrence"""
+    print("\n🌙 Testing midnight rollover...")
+
+    now = central(2026, 3, 10, 0, 10)
+    assert clock_timestamp((23, 55), now) == int(central(2026, 3, 9, 23, 55).timestamp())
+    assert clock_timestamp((0, 5), now) == int(central(2026, 3, 10, 0, 5).timestamp())
+    # Slightly ahead of our clock is still today
+    assert clock_timestamp((0, 20), now) == int(central(2026, 3, 10, 0, 20).timestamp())
+
+    # Yesterday's 11 PM across the spring-forward change keeps its own UTC offset
+    now = central(2026, 3, 8, 3, 30)
+    assert clock_timestamp((23, 0), now) == int(central(2026, 3, 7, 23, 0).timestamp())
+
+    assert incident_timestamp('no time here', now) == int(now.timestamp())
+
+    print("✅ Midnight rollover working")
+
+
+def test_incident_ts_stored_and_backfilled():
+    """Test incidents store incident_ts and old rows are backfilled"""
+    print("\n💾 Testing stored timestamps...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'test.db'))
+        incident = Incident("IH-45 North NB @ Tidwell", "Heavy truck accident", "3:16 PM")
+        incident_id = incident.save(db)
+
+        conn = db.get_connection()
+        conn.execute('''
+            INSERT INTO incidents (incident_hash, location, description, incident_time, scraped_at)
+            VALUES ('old', 'IH-10 EB @ Taylor', 'Truck stall', '11:55 PM', '2026-03-10 05:10:00')
+        ''')
+        conn.commit()
+        stored = conn.execute('SELECT incident_ts FROM incidents WHERE id = ?', (incident_id,)).fetchone()[0]
+        conn.close()
+        assert stored == incident.incident_ts
+
+        assert Incident.backfill_timestamps(db) == 1
+        # Scraped at 12:10 AM Central, so "11:55 PM" was the previous evening
+        old = Incident.get_in_range(db, 0, int(central(2026, 3, 10).timestamp()))
+        assert [row['incident_hash'] for row in old] == ['old']
+        assert old[0]['incident_ts'] == int(central(2026, 3, 9, 23, 55).timestamp())
+
+    print("✅ Stored timestamps working")
+
+
+def main():
+    """Run all tests"""
+    test_parse_clock()
+    test_timestamps_roll_back_over_midnight()
+    test_incident_ts_stored_and_backfilled()
+    print("\n🎉 All time parsing tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Test script for the HTTP transport against a local flaky server
+"""
+
+import sys
+import os
+import gzip
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+from transport import Transport, CircuitBreaker, CircuitOpenError
+
+PAGE = b'<html><body><table><tr><td>IH-45 North At Tidwell</td></tr></table></body></html>' * 20
+
+
+class FlakyServer:
+    """Local stand-in for TranStar that plays a script of behaviours, one per request"""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.requests = 0
+        self.encodings = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                behaviour = server.script[min(server.requests, len(server.script) - 1)]
+                server.requests += 1
+                server.encodings.append(self.headers.get('Accept-Encoding', ''))
+
+                if behaviour == 'slow':
+                    time.sleep(0.5)
+                if behaviour == 'drop':
+                    self.close_connection = True
+                    self.connection.close()
+                    return
+                if behaviour == 'redirect':
+                    self.send_response(302)
+                    self.send_header('Location', self.path)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if behaviour == '503':
+                    self.send_response(503)
+                    self.send_header('Retry-After', '0')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                body = gzip.compress(PAGE)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html')
+                self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        # Clients that timed out leave broken pipes behind; that is the point of the test
+        self.httpd.handle_error = lambda request, client_address: None
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/roadclosures/"
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def make_transport(**kwargs):
+    options = dict(connect_timeout=0.5, read_timeout=0.2, retries=3, backoff=0.01, max_backoff=0.02)
+    options.update(kwargs)
+    return Transport(**options)
+
+
+def test_retries_and_compression():
+    """Test 503s, dropped connections and slow responses are retried, and gzip is negotiated"""
+    print("🔁 Testing retries against a flaky server...")
+
+    server = FlakyServer(['503', 'drop', 'slow', 'ok'])
+    try:
+        response = make_transport().get(server.url)
+        assert response.status_code == 200 and response.content == PAGE
+        assert server.requests == 4
+        assert all('gzip' in encoding for encoding in server.encodings)
+    finally:
+        server.stop()
+
+    print("✅ Retries and compression working")
+
+
+def test_budget_caps_retries():
+    """Test the total budget stops retrying a server that never answers in time"""
+    print("\n⏱️  Testing retry budget...")
+
+    server = FlakyServer(['slow'])
+    try:
+        start = time.monotonic()
+        try:
+            make_transport(retries=10).get(server.url, budget=0.5)
+            assert False, "Expected a timeout"
+        except requests.Timeout:
+            pass
+        assert time.monotonic() - start < 1.5
+        assert server.requests <= 4
+    finally:
+        server.stop()
+
+    print("✅ Retry budget working")
+
+
+def test_circuit_breaker():
+    """Test the breaker opens after repeated failures and probes once after the cool-down"""
+    print("\n🔌 Testing circuit breaker...")
+
+    server = FlakyServer(['503', '503', '503', '503', 'ok'])
+    try:
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.3)
+        transport = make_transport(retries=0, breaker=breaker)
+
+        for _ in range(2):
+            try:
+                transport.get(server.url)
+            except requests.HTTPError:
+                pass
+        assert breaker.state == 'open'
+
+        # Open circuit fails fast without reaching the server
+        try:
+            transport.get(server.url)
+            assert False, "Expected the circuit to be open"
+        except CircuitOpenError:
+            pass
+        assert server.requests == 2
+
+        # A failed probe re-opens the circuit; a successful one closes it
+        time.sleep(0.35)
+        try:
+            transport.get(server.url)
+        except requests.HTTPError:
+            pass
+        assert breaker.state == 'open' and server.requests == 3
+
+        time.sleep(0.35)
+        server.script = ['ok']
+        assert transport.get(server.url).content == PAGE
+        assert breaker.state == 'closed'
+    finally:
+        server.stop()
+
+    print("✅ Circuit breaker working")
+
+
+def test_probe_released_on_other_errors():
+    """Test a half-open probe that fails with a non-connection error re-opens the circuit instead of wedging it"""
+    print("\n🔀 Testing probe failing with a redirect loop...")
+
+    server = FlakyServer(['503', 'redirect', 'ok'])
+    try:
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.2)
+        transport = make_transport(retries=0, breaker=breaker)
+        transport.session.max_redirects = 2
+        try:
+            transport.get(server.url)
+        except requests.HTTPError:
+            pass
+        assert breaker.state == 'open'
+
+        time.sleep(0.25)
+        server.script = ['redirect']
+        try:
+            transport.get(server.url)
+            assert False, "Expected a redirect loop"
+        except requests.TooManyRedirects:
+            pass
+        assert breaker.state == 'open' and not breaker._probing
+
+        # The next cool-down lets a probe through again, which closes the circuit
+        time.sleep(0.25)
+        server.script = ['ok']
+        assert transport.get(server.url).content == PAGE
+        assert breaker.state == 'closed'
+    finally:
+        server.stop()
+
+    print("✅ Probe released after a non-connection error")
+
+
+def main():
+    """Run all tests"""
+    test_retries_and_compression()
+    test_budget_caps_retries()
+    test_circuit_breaker()
+    test_probe_released_on_other_errors()
+    print("\n🎉 All transport tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Test script for webhook subscriptions: filters, batching, backoff, dead letters and the admin API
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from channels import ChannelDispatcher, verify_signature, SIGNATURE_HEADER, TIMESTAMP_HEADER
+from config import Config
+from http_sink import HTTPSink
+from models import Database, AlertOutbox, WebhookSubscription, webhook_channel_name
+from test_helpers import save_incidents
+
+
+def make_incidents(db):
+    """A wreck on IH-10, a stall on IH-45 and a hazmat spill on IH-610"""
+    return save_incidents(db, [("IH-10 Katy EB @ Exit 1", "Heavy truck accident blocking lanes", 3, None),
+                               ("IH-45 North NB @ Exit 2", "Stalled 18-wheeler on shoulder", 1, None),
+                               ("IH-610 West Loop SB @ Exit 3", "Hazmat spill from tanker", 5, None)])
+
+
+def delivered(sink):
+    """Locations each POST carried"""
+    return [[incident['location'] for incident in payload['incidents']] for payload in sink.payloads()]
+
+
+def test_subscription_filters_and_signing():
+    """Test each subscription only gets its category/severity/corridor matches, batched and signed"""
+    print("🔌 Testing webhook subscription filters...")
+
+    with tempfile.TemporaryDirectory() as tmp, HTTPSink() as board, HTTPSink() as tms, HTTPSink() as hazmat:
+        db = Database(os.path.join(tmp, 'test.db'))
+        WebhookSubscription.add(db, 'dispatch-board', board.url, 'board-secret')
+        WebhookSubscription.add(db, 'tms', tms.url, 'tms-secret', corridors=['IH-10', 'IH-45'], min_severity=2)
+        WebhookSubscription.add(db, 'hazmat', hazmat.url, 'hazmat-secret', categories=['hazmat', 'spill'])
+        assert WebhookSubscription.add(db, 'tms', tms.url, 'again') is None
+
+        incidents = make_incidents(db)
+        dispatcher = ChannelDispatcher(db, [])
+        assert all(dispatcher.push(incidents).values())
+
+        # Everything for the board in one POST; the TMS and hazmat desk only see their matches
+        assert len(board.requests) == 1 and len(delivered(board)[0]) == 3
+        assert delivered(tms) == [["IH-10 Katy EB @ Exit 1"]]
+        assert delivered(hazmat) == [["IH-610 West Loop SB @ Exit 3"]]
+
+        request = tms.requests[0]
+        assert verify_signature('tms-secret', request.headers[TIMESTAMP_HEADER], request.body,
+                                request.headers[SIGNATURE_HEADER])
+        assert not verify_signature('board-secret', request.headers[TIMESTAMP_HEADER], request.body,
+                                    request.headers[SIGNATURE_HEADER])
+
+    print("✅ Webhook filters working")
+
+
+def test_filters_match_every_flagged_category():
+    """Test a category subscription gets incidents whose primary category is something else"""
+    print("\n🛢️  Testing multi-category webhook filters...")
+
+    with tempfile.TemporaryDirectory() as tmp, HTTPSink() as spills, HTTPSink() as wrecks:
+        db = Database(os.path.join(tmp, 'test.db'))
+        WebhookSubscription.add(db, 'spills', spills.url, 'spill-secret', categories=['spill'])
+        WebhookSubscription.add(db, 'wrecks', wrecks.url, 'wreck-secret', categories=['wreck'])
+
+        incidents = save_incidents(db, [("IH-10 Katy EB @ Exit 1", "Heavy truck accident, fuel spill", 3, None)])
+        assert all(ChannelDispatcher(db, []).push(incidents).values())
+
+        # The wreck is also a spill, so both desks hear about it
+        assert delivered(spills) == [["IH-10 Katy EB @ Exit 1"]]
+        assert delivered(wrecks) == [["IH-10 Katy EB @ Exit 1"]]
+
+    print("✅ Multi-category filters working")
+
+
+def test_changes_apply_on_next_push():
+    """Test pausing, adding and removing subscriptions takes effect without restarting the dispatcher"""
+    print("\n🔄 Testing subscription reloads...")
+
+    with tempfile.TemporaryDirectory() as tmp, HTTPSink() as first, HTTPSink() as second:
+        db = Database(os.path.join(tmp, 'test.db'))
+        first_id = WebhookSubscription.add(db, 'first', first.url, 's1')
+        dispatcher = ChannelDispatcher(db, [])
+        channel = dispatcher.refresh()[0]
+
+        second_id = WebhookSubscription.add(db, 'second', second.url, 's2')
+        assert WebhookSubscription.toggle_active(db, first_id)
+        assert [c.name for c in dispatcher.refresh()] == [webhook_channel_name(second_id)]
+
+        # Resuming keeps nothing from the paused one, but an unchanged subscription keeps its channel
+        assert WebhookSubscription.toggle_active(db, first_id)
+        channels = dispatcher.refresh()
+        WebhookSubscription.remove(db, second_id)
+        assert dispatcher.refresh() == [channels[0]] and channels[0].url == channel.url
+
+        incidents = make_incidents(db)
+        assert dispatcher.push(incidents) == {webhook_channel_name(first_id): True}
+        assert len(first.requests) == 1 and not second.requests
+
+    print("✅ Subscription reloads working")
+
+
+def test_backoff_then_dead_letter():
+    """Test a failing endpoint waits longer between attempts, dead-letters, and can be retried"""
+    print("\n🪦 Testing backoff and dead-lettering...")
+
+    with tempfile.TemporaryDirectory() as tmp, HTTPSink(statuses=[500] * 3) as sink:
+        db = Database(os.path.join(tmp, 'test.db'))
+        subscription_id = WebhookSubscription.add(db, 'tms', sink.url, 'secret')
+        channel = webhook_channel_name(subscription_id)
+        dispatcher = ChannelDispatcher(db, [], backoff=0.2, max_backoff=10, max_attempts=3)
+        for subscription in dispatcher.refresh():
+            subscription.transport.retries = 0
+        incidents = make_incidents(db)
+
+        # Attempt 1 fails; nothing is due again until its 0.2 s backoff is over
+        assert dispatcher.push(incidents) == {channel: False}
+        assert dispatcher.push([]) == {}
+        time.sleep(0.25)
+        # Attempt 2 fails and backs off 0.4 s, so 0.25 s later it is still waiting
+        assert dispatcher.push([]) == {channel: False}
+        time.sleep(0.25)
+        assert dispatcher.push([]) == {}
+        time.sleep(0.3)
+        # Attempt 3 is the last: the rows are dead letters, not retried again
+        assert dispatcher.push([]) == {channel: False}
+        time.sleep(1)
+        assert dispatcher.push([]) == {}
+
+        dead = AlertOutbox.dead_letters(db, channel)
+        assert len(dead) == 3 and all(row['attempts'] == 3 and '500' in row['last_error'] for row in dead)
+        assert not sink.requests
+
+        # An admin retry sends the dead letters in one batch, now that the endpoint is back
+        assert len(AlertOutbox.retry_failed(db, channel)) == 3
+        assert dispatcher.push([]) == {channel: True}
+        assert len(delivered(sink)) == 1 and len(delivered(sink)[0]) == 3
+        assert AlertOutbox.dead_letters(db, channel) == []
+
+    print("✅ Backoff and dead-lettering working")
+
+
+def test_webhook_api():
+    """Test the admin API validates, creates, lists, pauses and removes webhook subscriptions"""
+    print("\n🧩 Testing webhook API...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.DATABASE_PATH = os.path.join(tmp, 'test.db')
+        import app as web
+        web.scheduler.pause()
+        # The app may already be imported against another database
+        original_db, web.db = web.db, Database(Config.DATABASE_PATH)
+        client = web.app.test_client()
+        client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+
+        for bad in ({'name': 'tms'}, {'name': 'tms', 'url': 'ftp://tms'},
+                    {'name': 'tms', 'url': 'https://tms.example.com/hook', 'categories': ['potholes']},
+                    {'name': 'tms', 'url': 'https://tms.example.com/hook', 'corridors': ['IH-999']},
+                    {'name': 'tms', 'url': 'https://tms.example.com/hook', 'min_severity': 9}):
+            assert client.post('/api/webhooks', json=bad).status_code == 400
+
+        response = client.post('/api/webhooks', json={'name': 'tms', 'url': 'https://tms.example.com/hook',
+                                                      'categories': ['wreck'], 'corridors': ['IH-10'],
+                                                      'min_severity': 3})
+        assert response.status_code == 201
+        created = response.get_json()
+        assert len(created['secret']) == 64
+        assert client.post('/api/webhooks', json={'name': 'tms', 'url': 'https://x.example.com'}).status_code == 409
+
+        listed = client.get('/api/webhooks').get_json()
+        assert len(listed) == 1 and 'secret' not in listed[0]
+        assert listed[0]['corridors'] == 'IH-10' and listed[0]['deliveries']['failed'] == 0
+
+        assert client.post(f"/api/webhooks/{created['id']}/toggle").get_json()['active'] is False
+        assert client.get(f"/api/webhooks/{created['id']}/dead_letters").get_json() == []
+        assert client.post(f"/api/webhooks/{created['id']}/retry").get_json()['incidents'] == 0
+        assert client.get('/webhooks').status_code == 200
+        assert client.delete(f"/api/webhooks/{created['id']}").status_code == 200
+        assert client.delete(f"/api/webhooks/{created['id']}").status_code == 404
+        web.db = original_db
+
+    print("✅ Webhook API working")
+
+
+def main():
+    """Run all tests"""
+    test_subscription_filters_and_signing()
+    test_filters_match_every_flagged_category()
+    test_changes_apply_on_next_push()
+    test_backoff_then_dead_letter()
+    test_webhook_api()
+    print("\n🎉 All webhook tests passed!")
+
+
+if __name__ == "__main__":
+    main()
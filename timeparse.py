@@ -0,0 +1,59 @@
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import pytz
+
+central_tz = pytz.timezone('America/Chicago')
+
+# "3:16 PM", "Verified at 3:16pm" or 24-hour "15:16"
+TIME_PATTERN = re.compile(r'(\d{1,2}):(\d{2})(?:\s*([AaPp])[Mm])?')
+
+# A clock time this far past "now" is read as yesterday's (e.g. "11:55 PM" seen at 12:10 AM)
+FUTURE_TOLERANCE = timedelta(minutes=15)
+
+
+@lru_cache(maxsize=4096)
+def parse_clock(text):
+    """(hour, minute) on a 24-hour clock from a status string, or None; statuses repeat every cycle, so memoized"""
+    if not text:
+        return None
+    match = TIME_PATTERN.search(text)
+    if not match:
+        return None
+
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2)), match.group(3)
+    if minute > 59:
+        return None
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem in 'Pp' else 0)
+    elif hour > 23:
+        return None
+    return hour, minute
+
+
+def format_clock(clock):
+    """Display form used on incidents, e.g. '3:16 PM'"""
+    hour, minute = clock
+    return f"{hour % 12 or 12}:{minute:02d} {'PM' if hour >= 12 else 'AM'}"
+
+
+def clock_timestamp(clock, now=None):
+    """Epoch seconds for the most recent Central Time occurrence of a clock time"""
+    now = now or datetime.now(central_tz)
+    local_now = now.astimezone(central_tz)
+    day = local_now.date()
+    moment = central_tz.localize(datetime(day.year, day.month, day.day, *clock))
+    if moment - local_now > FUTURE_TOLERANCE:
+        day -= timedelta(days=1)
+        moment = central_tz.localize(datetime(day.year, day.month, day.day, *clock))
+    return int(moment.timestamp())
+
+
+def incident_timestamp(text, now=None):
+    """Epoch seconds for a status or display time string, falling back to now when it has no time"""
+    now = now or datetime.now(central_tz)
+    clock = parse_clock(text)
+    return clock_timestamp(clock, now) if clock else int(now.timestamp())
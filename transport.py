@@ -0,0 +1,157 @@
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+from metrics import HTTP_REQUEST_SECONDS, HTTP_RETRIES, CIRCUIT_OPENED
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    # gzip/deflate always; br (and zstd) when urllib3 has a decoder installed
+    'Accept-Encoding': ACCEPT_ENCODING,
+}
+
+# Responses worth retrying; anything else is returned to the caller
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised without touching the network while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Opens after consecutive failed requests, then lets a single probe through after a cool-down"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=120.0, name='transtar'):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+                CIRCUIT_OPENED.inc(target=self.name)
+                logger.warning(f"🔌 Circuit to {self.name} opened after {self.failures} failures")
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class Transport:
+    """Pooled HTTP session with split timeouts, jittered retries and a circuit breaker"""
+
+    def __init__(self, connect_timeout=5.0, read_timeout=15.0, retries=2, backoff=0.5, max_backoff=4.0,
+                 pool_maxsize=4, breaker=None, headers=None):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+
+        # One long-lived session keeps TLS connections warm between cycles
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+
+    def _sleep_before_retry(self, attempt, response, stop_at):
+        """Full-jitter exponential backoff, honouring Retry-After, never past the budget"""
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), self.max_backoff))
+        if stop_at is not None:
+            delay = min(delay, max(0.0, stop_at - time.monotonic()))
+        time.sleep(delay)
+
+    def get(self, url, budget=None, **kwargs):
+        """GET with retries; budget caps the total seconds spent including backoff"""
+        return self.request('GET', url, budget, **kwargs)
+
+    def post(self, url, budget=None, **kwargs):
+        """POST with the same retries; callers make the body safe to repeat (an idempotency key)"""
+        return self.request('POST', url, budget, **kwargs)
+
+    def request(self, method, url, budget=None, **kwargs):
+        """Send a request with retries; budget caps the total seconds spent including backoff"""
+        target = self.breaker.name
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {self.breaker.name}; skipping {url}")
+
+        stop_at = time.monotonic() + budget if budget is not None else None
+        last_error = None
+        for attempt in range(self.retries + 1):
+            read_timeout = self.read_timeout
+            if stop_at is not None:
+                read_timeout = min(read_timeout, stop_at - time.monotonic())
+                if read_timeout <= 0:
+                    break
+
+            response = None
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url,
+                                                timeout=(min(self.connect_timeout, read_timeout), read_timeout),
+                                                **kwargs)
+                if response.status_code not in RETRY_STATUSES:
+                    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, target=target, outcome='ok')
+                    self.breaker.record_success()
+                    return response
+                last_error = requests.HTTPError(f"{response.status_code} from {url}", response=response)
+                HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, target=target, outcome='retryable_status')
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+                outcome = 'timeout' if isinstance(e, requests.Timeout) else 'connection_error'
+                HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, target=target, outcome=outcome)
+            except Exception:
+                # Not worth retrying (redirect loops, bad encodings, invalid URLs), but the breaker
+                # must still hear about it, or a half-open probe would never be released
+                HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, target=target, outcome='error')
+                self.breaker.record_failure()
+                raise
+
+            if attempt < self.retries:
+                HTTP_RETRIES.inc(target=target)
+                logger.warning(f"🔁 Retrying {url} after attempt {attempt + 1}: {last_error}")
+                self._sleep_before_retry(attempt, response, stop_at)
+
+        self.breaker.record_failure()
+        raise last_error or requests.Timeout(f"Budget exhausted before requesting {url}")